@@ -0,0 +1,74 @@
+"""Compares the conversion of SPARQL results into DataFrames (previous per-row vs. columnar).
+
+Both the conversion of local rdflib results (`sparql_result_to_df`) and of
+remote SPARQL JSON results (`sparql_json_to_dataframe`) are measured.
+
+Usage:
+
+    python benchmarks/bench_conversion.py --sizes 10000 100000
+"""
+import argparse
+import json
+import time
+
+import pandas as pd
+
+from gldb.query.metadata_query import parse_literal, sparql_result_to_df
+from gldb.query.utils import _cast_cell, sparql_json_to_dataframe
+from synthetic import make_graph
+
+QUERY = """
+PREFIX ex: <http://example.org/>
+SELECT ?dataset ?creator ?size ?mean ?created WHERE {
+    ?dataset a ex:Dataset ;
+             ex:creator ?creator ;
+             ex:size ?size ;
+             ex:mean ?mean ;
+             ex:created ?created .
+}
+"""
+
+
+def legacy_sparql_result_to_df(bindings):
+    """Conversion as implemented up to v2.1.1 (one dict per row, one cast per cell)."""
+    return pd.DataFrame([{str(k): parse_literal(v) for k, v in binding.items()} for binding in bindings])
+
+
+def legacy_sparql_json_to_dataframe(results_json):
+    """Conversion as implemented up to v2.1.1 (one `_cast_cell` call per cell)."""
+    vars_ = results_json["head"]["vars"]
+    rows = [{var: _cast_cell(b.get(var), True) for var in vars_} for b in results_json["results"]["bindings"]]
+    return pd.DataFrame(rows, columns=vars_)
+
+
+def best_of(func, *args, repeat: int = 3) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000],
+                        help="number of result rows")
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'source':>7} {'legacy [s]':>11} {'columnar [s]':>13} {'speedup':>8}")
+    for size in args.sizes:
+        # every dataset contributes six triples and one result row:
+        result = make_graph(6 * size).query(QUERY)
+        results_json = json.loads(result.serialize(format="json"))
+        for source, legacy, columnar, data in (
+                ("local", legacy_sparql_result_to_df, sparql_result_to_df, result.bindings),
+                ("json", legacy_sparql_json_to_dataframe, sparql_json_to_dataframe, results_json),
+        ):
+            legacy_time = best_of(legacy, data)
+            columnar_time = best_of(columnar, data)
+            print(f"{len(result):>8} {source:>7} {legacy_time:>11.3f} {columnar_time:>13.3f} "
+                  f"{legacy_time / columnar_time:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Compares payload size and decode time of SPARQL SELECT results in JSON, TSV and CSV.
+
+The payloads are serialized locally from the same result, so the numbers do not
+include the network transfer. JSON is decoded with `json.loads` followed by
+`sparql_json_to_dataframe`, as `RemoteSparqlQuery` does.
+
+Usage:
+
+    python benchmarks/bench_result_formats.py --sizes 10000 100000
+"""
+import argparse
+import json
+
+from gldb.query.utils import sparql_csv_to_dataframe, sparql_json_to_dataframe, sparql_tsv_to_dataframe
+from bench_conversion import QUERY, best_of
+from synthetic import make_graph
+
+
+def to_tsv(result) -> bytes:
+    """Serializes a SELECT result as text/tab-separated-values (not provided by rdflib)."""
+    lines = ["\t".join(f"?{var}" for var in result.vars)]
+    for row in result:
+        lines.append("\t".join("" if term is None else term.n3() for term in row))
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000],
+                        help="number of result rows")
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'format':>7} {'size [MB]':>10} {'decode [s]':>11}")
+    for size in args.sizes:
+        result = make_graph(6 * size).query(QUERY)
+        payloads = {
+            "json": (result.serialize(format="json"), lambda data: sparql_json_to_dataframe(json.loads(data))),
+            "tsv": (to_tsv(result), sparql_tsv_to_dataframe),
+            "csv": (result.serialize(format="csv"), sparql_csv_to_dataframe),
+        }
+        for name, (payload, decode) in payloads.items():
+            decode_time = best_of(decode, payload)
+            print(f"{len(result):>8} {name:>7} {len(payload) / 1e6:>10.2f} {decode_time:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
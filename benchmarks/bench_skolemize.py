@@ -0,0 +1,62 @@
+"""Compares per-file ingest time of the previous and the current blank node skolemization.
+
+Usage:
+
+    python benchmarks/bench_skolemize.py --sizes 10000 100000 1000000
+"""
+import argparse
+import pathlib
+import tempfile
+import time
+
+import rdflib
+
+from gldb.ingest import SKOLEM_BASE_IRI, skolemize
+from synthetic import write_graph
+
+
+def legacy_skolemize(g: rdflib.Graph) -> rdflib.Graph:
+    """Skolemization as implemented up to v2.1.1 (remove and add every triple)."""
+    for s, p, o in g:
+        if isinstance(s, rdflib.BNode):
+            new_s = rdflib.URIRef(f"{SKOLEM_BASE_IRI}{s}")
+        else:
+            new_s = s
+        if isinstance(o, rdflib.BNode):
+            new_o = rdflib.URIRef(f"{SKOLEM_BASE_IRI}{o}")
+        else:
+            new_o = o
+        g.remove((s, p, o))
+        g.add((new_s, p, new_o))
+    return g
+
+
+def time_ingest(filename: pathlib.Path, skolemize_func) -> tuple:
+    """Returns the time to parse the file and the time to skolemize it."""
+    t0 = time.perf_counter()
+    g = rdflib.Graph()
+    g.parse(filename)
+    t1 = time.perf_counter()
+    skolemize_func(g)
+    t2 = time.perf_counter()
+    return t1 - t0, t2 - t1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--bnode-ratio", type=float, default=0.2)
+    args = parser.parse_args()
+
+    print(f"{'triples':>10} {'parse [s]':>10} {'legacy [s]':>11} {'bulk [s]':>9} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in args.sizes:
+            filename = write_graph(pathlib.Path(tmp_dir) / f"data{size}.nt", size, args.bnode_ratio)
+            parse_time, legacy_time = time_ingest(filename, legacy_skolemize)
+            _, bulk_time = time_ingest(filename, skolemize)
+            print(f"{size:>10} {parse_time:>10.3f} {legacy_time:>11.3f} {bulk_time:>9.3f} "
+                  f"{legacy_time / bulk_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
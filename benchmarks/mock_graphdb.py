@@ -0,0 +1,119 @@
+"""A local mock of the GraphDB HTTP API for the benchmarks.
+
+It answers the requests of `gldb.stores.GraphDB` which the benchmarks use:
+
+- `GET /rest/repositories/<repo>`: repository info
+- `POST /repositories/<repo>/statements`: uploads (plain, gzip-encoded or chunked), which are
+  read completely and discarded
+- `GET|POST /repositories/<repo>?query=...`: SELECT queries, answered with a fixed result
+
+Usage:
+
+    with MockGraphDB(select_results={"json": payload}) as server:
+        db = GraphDB(server.endpoint, server.repository)
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+
+CONTENT_TYPES = {
+    "json": "application/sparql-results+json",
+    "tsv": "text/tab-separated-values",
+    "csv": "text/csv",
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, as GraphDB
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes = b"", content_type: str = "application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self) -> int:
+        """Reads the request body and returns its size in bytes."""
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            n_bytes = 0
+            while True:
+                size = int(self.rfile.readline().split(b";")[0], 16)
+                if size == 0:
+                    self.rfile.readline()
+                    return n_bytes
+                n_bytes += len(self.rfile.read(size))
+                self.rfile.readline()
+        return len(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+
+    def _select(self):
+        accept = self.headers.get("Accept", "")
+        for fmt, content_type in CONTENT_TYPES.items():
+            if content_type in accept and fmt in self.server.select_results:
+                return self._send(200, self.server.select_results[fmt], content_type)
+        self._send(406, b"No result in an accepted format.", "text/plain")
+
+    def do_GET(self):
+        repo_path = f"/repositories/{self.server.repository}"
+        if self.path == f"/rest/repositories/{self.server.repository}":
+            return self._send(200, json.dumps({"id": self.server.repository}).encode())
+        if self.path.startswith(f"{repo_path}?"):
+            return self._select()
+        self._send(404, b"Not found", "text/plain")
+
+    def do_POST(self):
+        n_bytes = self._read_body()
+        if self.path == f"/repositories/{self.server.repository}/statements":
+            with self.server.lock:
+                self.server.uploaded_bytes += n_bytes
+            return self._send(204)
+        if self.path.split("?")[0] == f"/repositories/{self.server.repository}":
+            return self._select()
+        self._send(404, b"Not found", "text/plain")
+
+
+class MockGraphDB:
+    """Runs the mock server in a background thread on a free local port.
+
+    Parameters
+    ----------
+    repository : str, optional
+        Name of the repository. Default is "benchmark".
+    select_results : Dict[str, bytes], optional
+        The payload of every SELECT query per result format ("json", "tsv", "csv").
+    """
+
+    def __init__(self, repository: str = "benchmark", select_results: Dict[str, bytes] = None):
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.repository = repository
+        self._server.select_results = select_results or {}
+        self._server.uploaded_bytes = 0
+        self._server.lock = threading.Lock()
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def endpoint(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def repository(self) -> str:
+        return self._server.repository
+
+    @property
+    def uploaded_bytes(self) -> int:
+        """Number of bytes (as sent, i.e. possibly compressed) received by uploads."""
+        return self._server.uploaded_bytes
+
+    def __enter__(self) -> "MockGraphDB":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
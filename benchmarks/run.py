@@ -0,0 +1,203 @@
+"""Benchmark suite of the ingest, query and conversion paths.
+
+Every benchmark runs once per size (number of synthetic triples) in a fresh
+subprocess, so that the reported peak RSS belongs to that benchmark alone. The
+GraphDB benchmarks run against the local mock server in `mock_graphdb.py`, so
+they measure the client side only.
+
+Per benchmark, the latency percentiles of the timed calls, the throughput
+(items per second at the median latency) and the peak RSS after the setup and
+after the timed calls are recorded. Results can be written to a JSON file and
+compared with the file of a previous run (e.g. of the last release).
+
+Usage:
+
+    python benchmarks/run.py --sizes 10000 100000 1000000 --output results.json
+    python benchmarks/run.py --benchmarks remote_query upload --compare results.json
+"""
+import argparse
+import contextlib
+import json
+import math
+import pathlib
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Tuple
+
+from bench_conversion import QUERY
+from bench_result_formats import to_tsv
+from mock_graphdb import MockGraphDB
+from synthetic import make_graph, write_graph
+
+__this_file__ = pathlib.Path(__file__).resolve()
+
+
+def _ingest(size: int, tmp_dir: pathlib.Path, stack: contextlib.ExitStack) -> Tuple[Callable, int, str]:
+    from gldb.stores import InMemoryRDFStore
+    (tmp_dir / "data").mkdir()
+    write_graph(tmp_dir / "data" / "graph.ttl", size)
+    # the constructor calls update(), which parses the file:
+    return lambda: InMemoryRDFStore(tmp_dir / "data"), size, "triples"
+
+
+def _local_query(size: int, tmp_dir: pathlib.Path, stack: contextlib.ExitStack) -> Tuple[Callable, int, str]:
+    from gldb.query import SparqlQuery
+    from gldb.stores import InMemoryRDFStore
+    (tmp_dir / "data").mkdir()
+    write_graph(tmp_dir / "data" / "graph.ttl", size)
+    store = InMemoryRDFStore(tmp_dir / "data")
+    query = SparqlQuery(QUERY)
+    return lambda: query.execute(store), len(query.execute(store).data), "rows"
+
+
+def _result_to_df(size: int, tmp_dir: pathlib.Path, stack: contextlib.ExitStack) -> Tuple[Callable, int, str]:
+    from gldb.query.metadata_query import sparql_result_to_df
+    bindings = make_graph(size).query(QUERY).bindings
+    return lambda: sparql_result_to_df(bindings), len(bindings), "rows"
+
+
+def _json_to_df(size: int, tmp_dir: pathlib.Path, stack: contextlib.ExitStack) -> Tuple[Callable, int, str]:
+    from gldb.query.utils import sparql_json_to_dataframe
+    results_json = json.loads(make_graph(size).query(QUERY).serialize(format="json"))
+    return (lambda: sparql_json_to_dataframe(results_json),
+            len(results_json["results"]["bindings"]), "rows")
+
+
+def _remote_query(size: int, tmp_dir: pathlib.Path, stack: contextlib.ExitStack) -> Tuple[Callable, int, str]:
+    from gldb.query import RemoteSparqlQuery
+    from gldb.stores import GraphDB
+    result = make_graph(size).query(QUERY)
+    server = stack.enter_context(MockGraphDB(select_results={"json": result.serialize(format="json"),
+                                                             "tsv": to_tsv(result)}))
+    store = GraphDB(server.endpoint, server.repository)
+    query = RemoteSparqlQuery(QUERY)
+    return lambda: query.execute(store), len(result), "rows"
+
+
+def _upload(size: int, tmp_dir: pathlib.Path, stack: contextlib.ExitStack) -> Tuple[Callable, int, str]:
+    from gldb.stores import GraphDB
+    filename = write_graph(tmp_dir / "graph.ttl", size)
+    server = stack.enter_context(MockGraphDB())
+    store = GraphDB(server.endpoint, server.repository)
+    return lambda: store.upload_file(filename), size, "triples"
+
+
+BENCHMARKS: Dict[str, Tuple[str, Callable]] = {
+    "ingest": ("InMemoryRDFStore.update", _ingest),
+    "local_query": ("SparqlQuery.execute", _local_query),
+    "result_to_df": ("sparql_result_to_df", _result_to_df),
+    "json_to_df": ("sparql_json_to_dataframe", _json_to_df),
+    "remote_query": ("RemoteSparqlQuery.execute (mock GraphDB)", _remote_query),
+    "upload": ("GraphDB.upload_file (mock GraphDB)", _upload),
+}
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Returns the p-th percentile (nearest rank) of sorted values."""
+    return sorted_values[max(0, math.ceil(p / 100 * len(sorted_values)) - 1)]
+
+
+def peak_rss_mb() -> float:
+    """Returns the peak resident set size of this process in MB (None if unknown)."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS:
+    return rss / 1e6 if sys.platform == "darwin" else rss / 1e3
+
+
+def run_benchmark(name: str, size: int, repeat: int, warmup: int) -> Dict:
+    """Runs one benchmark in this process and returns its measurements."""
+    with tempfile.TemporaryDirectory() as tmp_dir, contextlib.ExitStack() as stack:
+        func, n_items, unit = BENCHMARKS[name][1](size, pathlib.Path(tmp_dir), stack)
+        setup_rss = peak_rss_mb()
+        for _ in range(warmup):
+            func()
+        times = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            func()
+            times.append(time.perf_counter() - t0)
+    times.sort()
+    p50 = percentile(times, 50)
+    return {
+        "benchmark": name,
+        "target": BENCHMARKS[name][0],
+        "size": size,
+        "items": n_items,
+        "unit": unit,
+        "repeat": repeat,
+        "times": times,
+        "min": times[0],
+        "mean": sum(times) / len(times),
+        "p50": p50,
+        "p90": percentile(times, 90),
+        "p99": percentile(times, 99),
+        "throughput": n_items / p50 if p50 > 0 else float("inf"),
+        "setup_peak_rss_mb": setup_rss,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_in_subprocess(name: str, size: int, repeat: int, warmup: int) -> Dict:
+    out = subprocess.run(
+        [sys.executable, str(__this_file__), "--worker", name, "--sizes", str(size),
+         "--repeat", str(repeat), "--warmup", str(warmup)],
+        stdout=subprocess.PIPE, text=True, check=True
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--benchmarks", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000],
+                        help="number of synthetic triples")
+    parser.add_argument("--repeat", type=int, default=10, help="number of timed calls")
+    parser.add_argument("--warmup", type=int, default=1, help="number of untimed calls")
+    parser.add_argument("--output", type=pathlib.Path, help="JSON file to write the results to")
+    parser.add_argument("--compare", type=pathlib.Path, help="JSON file of a previous run to compare with")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_benchmark(args.worker, args.sizes[0], args.repeat, args.warmup)))
+        return
+
+    baseline = {}
+    if args.compare:
+        baseline = {(r["benchmark"], r["size"]): r for r in json.loads(args.compare.read_text())["results"]}
+
+    from gldb import __version__
+    print(f"{'benchmark':>13} {'size':>8} {'p50 [s]':>9} {'p90 [s]':>9} {'p99 [s]':>9} "
+          f"{'throughput':>19} {'peak RSS [MB]':>14}" + (f" {'p50 vs. baseline':>17}" if baseline else ""))
+    results = []
+    for name in args.benchmarks:
+        for size in args.sizes:
+            r = run_in_subprocess(name, size, args.repeat, args.warmup)
+            results.append(r)
+            line = (f"{name:>13} {size:>8} {r['p50']:>9.4f} {r['p90']:>9.4f} {r['p99']:>9.4f} "
+                    f"{r['throughput']:>9.0f} {r['unit'] + '/s':<9} {r['peak_rss_mb'] or float('nan'):>14.1f}")
+            previous = baseline.get((name, size))
+            if previous:
+                line += f" {r['p50'] / previous['p50']:>16.2f}x"
+            print(line, flush=True)
+
+    if args.output:
+        args.output.write_text(json.dumps({
+            "gldb_version": __version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "results": results,
+        }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Synthetic RDF data for the benchmarks."""
+import pathlib
+import random
+from typing import Union
+
+import rdflib
+
+EX = rdflib.Namespace("http://example.org/")
+XSD = rdflib.XSD
+
+
+def make_graph(n_triples: int, bnode_ratio: float = 0.2, seed: int = 42) -> rdflib.Graph:
+    """Returns a graph of datasets with `n_triples` triples.
+
+    Every dataset has a creator, which is a blank node for `bnode_ratio` of
+    the datasets. The remaining triples are typed literals and IRIs.
+    """
+    rng = random.Random(seed)
+    g = rdflib.Graph()
+    g.bind("ex", EX)
+    i = 0
+    while len(g) < n_triples:
+        dataset = EX[f"dataset{i}"]
+        if rng.random() < bnode_ratio:
+            creator = rdflib.BNode()
+        else:
+            creator = EX[f"person{i}"]
+        g.add((dataset, rdflib.RDF.type, EX.Dataset))
+        g.add((dataset, EX.creator, creator))
+        g.add((creator, EX.name, rdflib.Literal(f"Person {i}")))
+        g.add((dataset, EX.size, rdflib.Literal(rng.randint(0, 10 ** 6), datatype=XSD.integer)))
+        g.add((dataset, EX.mean, rdflib.Literal(rng.random(), datatype=XSD.double)))
+        g.add((dataset, EX.created, rdflib.Literal(f"2024-01-{1 + i % 28:02d}T12:00:00", datatype=XSD.dateTime)))
+        i += 1
+    return g
+
+
+def write_graph(filename: Union[str, pathlib.Path], n_triples: int, bnode_ratio: float = 0.2,
+                fmt: str = None) -> pathlib.Path:
+    """Writes a synthetic graph to `filename`. The format is derived from the suffix if not given."""
+    filename = pathlib.Path(filename)
+    make_graph(n_triples, bnode_ratio).serialize(
+        filename, format=fmt or rdflib.util.guess_format(str(filename)), encoding="utf-8"
+    )
+    return filename
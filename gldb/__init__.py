@@ -1,36 +1,113 @@
+import atexit
+import importlib
 import logging
 import pathlib
-from logging.handlers import RotatingFileHandler
-
-import appdirs
 
 from ._version import __version__
 
-USER_LOG_DIR = pathlib.Path(appdirs.user_log_dir(__package__, version=__version__))
-USER_LOG_DIR.mkdir(parents=True, exist_ok=True)
-
-DEFAULT_LOGGING_LEVEL = logging.DEBUG
+# production default; use configure_logging(logging.DEBUG) for debugging:
+DEFAULT_LOGGING_LEVEL = logging.WARNING
 _formatter = logging.Formatter(
     '%(asctime)s,%(msecs)d %(levelname)-8s [%(filename)s:%(lineno)d] %(message)s',
     datefmt='%Y-%m-%d_%H:%M:%S')
 
-_stream_handler = logging.StreamHandler()
-_stream_handler.setLevel(DEFAULT_LOGGING_LEVEL)
-_stream_handler.setFormatter(_formatter)
+logger = logging.getLogger(__package__)
+logger.setLevel(DEFAULT_LOGGING_LEVEL)
+_queue_listener = None  # QueueListener of configure_logging(use_queue=True)
 
-_file_handler = RotatingFileHandler(USER_LOG_DIR / f'{__package__}.log')
-_file_handler.setLevel(logging.DEBUG)  # log everything to file!
-_file_handler.setFormatter(_formatter)
+# Importing the package must stay cheap: the public classes are imported from
+# their (heavy) submodules on first access (PEP 562):
+_LAZY_ATTRIBUTES = {
+    'GenericLinkedDatabase': '.gldb',
+    'DataStore': '.stores',
+    'MetadataStore': '.stores',
+}
 
-logger = logging.getLogger(__package__)
-logger.addHandler(_stream_handler)
-logger.addHandler(_file_handler)
+__all__ = ['GenericLinkedDatabase', 'DataStore', 'MetadataStore', 'configure_logging', 'stop_logging']
 
-logger = logging.getLogger(__package__)
-logger.addHandler(_stream_handler)
-logger.addHandler(_file_handler)
 
-from .gldb import GenericLinkedDatabase
-from gldb.stores import DataStore, MetadataStore
+def __getattr__(name):
+    if name == 'USER_LOG_DIR':
+        return get_user_log_dir()
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES) | {'USER_LOG_DIR'})
+
+
+def get_user_log_dir() -> pathlib.Path:
+    """Returns the directory of the log file. The directory is not created."""
+    import appdirs
+    return pathlib.Path(appdirs.user_log_dir(__package__, version=__version__))
+
+
+def configure_logging(level: int = DEFAULT_LOGGING_LEVEL, log_file: bool = True,
+                      use_queue: bool = False) -> logging.Logger:
+    """Attaches a stream handler and (optionally) a rotating file handler to the
+    package logger. Logging is not configured on import, so applications opt in by
+    calling this function. Calling it again replaces the handlers.
+
+    Parameters
+    ----------
+    level : int, optional
+        Level of the package logger. Records below it are discarded before they are
+        formatted. Default is `DEFAULT_LOGGING_LEVEL` (WARNING).
+    log_file : bool, optional
+        If True, records are also written to `<USER_LOG_DIR>/gldb.log`. Default is True.
+    use_queue : bool, optional
+        If True, the logger only puts records into a queue and a `QueueListener`
+        formats and writes them in a background thread, so that logging does not
+        block queries and uploads. Pending records are written on exit or by
+        `stop_logging()`. Default is False.
+
+    Returns
+    -------
+    logging.Logger
+        The package logger.
+    """
+    import queue
+    global _queue_listener
+    stop_logging()
+
+    from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+    handlers = [logging.StreamHandler()]
+    if log_file:
+        user_log_dir = get_user_log_dir()
+        user_log_dir.mkdir(parents=True, exist_ok=True)
+        handlers.append(RotatingFileHandler(user_log_dir / f'{__package__}.log'))
+    for handler in handlers:
+        handler.setFormatter(_formatter)
+
+    if use_queue:
+        _queue_listener = QueueListener(queue.SimpleQueue(), *handlers, respect_handler_level=True)
+        _queue_listener.start()
+        handlers = [QueueHandler(_queue_listener.queue)]
+    for handler in handlers:
+        handler._gldb_handler = True
+        logger.addHandler(handler)
+    logger.setLevel(level)
+    return logger
+
+
+def stop_logging():
+    """Removes the handlers added by `configure_logging()`. In queue mode, the
+    pending records are written before the background thread stops."""
+    global _queue_listener
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        for handler in _queue_listener.handlers:
+            handler.close()
+        _queue_listener = None
+    for handler in [h for h in logger.handlers if getattr(h, '_gldb_handler', False)]:
+        logger.removeHandler(handler)
+        handler.close()
+
 
-__all__ = ['GenericLinkedDatabase', 'DataStore', 'MetadataStore']
+atexit.register(stop_logging)
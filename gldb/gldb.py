@@ -1,10 +1,59 @@
+import functools
 import logging
-from typing import Dict
+import pathlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, List, Mapping, Optional, Union
 
-from .stores import Store, StoreManager
+import rdflib
+
+from .stores import DataStore, MetadataStore, Store, StoreManager
+
+if TYPE_CHECKING:
+    # gldb.query needs pandas, which is an optional dependency:
+    import pandas as pd
+
+    from .query import (FederatedQueryResult, LazyFederatedQueryResult, Query, QueryResult, QueryResultCache,
+                        SparqlQuery)
 
 logger = logging.getLogger("gldb")
 
+# maximum number of subjects in the VALUES clause of one metadata query:
+METADATA_BATCH_SIZE = 1000
+
+
+def _metadata_query(subjects: List[str]) -> "SparqlQuery":
+    """Returns the query for all predicates and objects of the given subjects."""
+    from .query import SparqlQuery
+    values = " ".join(rdflib.URIRef(s).n3() for s in subjects)
+    # the query text differs for every batch, so it is not kept in the cache of compiled queries:
+    return SparqlQuery(f"SELECT ?s ?p ?o WHERE {{ VALUES ?s {{ {values} }} ?s ?p ?o . }}",
+                       description="Metadata of the federated query results", prepared=False)
+
+
+def _metadata_by_subject(data: "pd.DataFrame") -> Dict[str, Dict[str, Any]]:
+    """Groups the rows (s, p, o) by subject into {predicate: object}. Predicates with
+    several objects map to a list of objects."""
+    metadata = {}
+    for s, p, o in data[["s", "p", "o"]].itertuples(index=False):
+        entry = metadata.setdefault(s, {})
+        if p not in entry:
+            entry[p] = o
+        elif isinstance(entry[p], list):
+            entry[p].append(o)
+        else:
+            entry[p] = [entry[p], o]
+    return metadata
+
+
+def _payload_key(data_store: str, row: Dict[str, Any]) -> Optional[Hashable]:
+    """Returns the cache key of the data of a result row or None if the row is not hashable."""
+    key = (data_store, tuple(row.items()))
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
 
 class GenericLinkedDatabase:
 
@@ -16,7 +65,7 @@ class GenericLinkedDatabase:
         for store_name, store in stores.items():
             if not isinstance(store, Store):
                 raise TypeError(f"Expected Store, got {type(store)}")
-            logger.debug(f"Adding store {store_name} to the database.")
+            logger.debug("Adding store %s to the database.", store_name)
             self.stores.add_store(store_name, store)
 
     @property
@@ -37,9 +86,117 @@ class GenericLinkedDatabase:
             self.stores.data_stores
         )
 
-    # @abstractmethod
-    # def linked_upload(self, filename: Union[str, pathlib.Path]):
-    #     """Uploads the file to both stores and links them."""
+    def _get_store(self, store_name: str, store_type: type = Store) -> Any:
+        store = self.stores.stores.get(store_name)
+        if store is None:
+            raise ValueError(f"Unknown store: '{store_name}'. Available stores: {list(self.stores.stores)}.")
+        if not isinstance(store, store_type):
+            raise TypeError(f"Store '{store_name}' is not a {store_type.__name__}.")
+        return store
+
+    def execute_query(self, store_name: str, query: "Query", **kwargs) -> "QueryResult":
+        """Executes a query against the store with the given name."""
+        return query.execute(self._get_store(store_name), **kwargs)
+
+    def linked_upload(
+            self,
+            data_filename: Union[str, pathlib.Path],
+            metadata_filename: Union[str, pathlib.Path],
+            data_store: str,
+            metadata_store: str
+    ) -> bool:
+        """Uploads a data file and the metadata file describing it to a data store and a
+        metadata store. The metadata is uploaded first, so that the data can always be found."""
+        self._get_store(metadata_store, MetadataStore).upload_file(metadata_filename)
+        self._get_store(data_store, DataStore).upload_file(data_filename)
+        return True
+
+    def federated_query(
+            self,
+            query: "SparqlQuery",
+            metadata_store: str,
+            data_store: str,
+            data_loader: Callable[[DataStore, Dict[str, Any]], Any],
+            subject: str = "dataset",
+            bindings: Mapping[str, Any] = None,
+            max_workers: int = 4,
+            lazy: bool = False,
+            prefetch: int = 0,
+            cache: "QueryResultCache" = None
+    ) -> Union[List["FederatedQueryResult"], List["LazyFederatedQueryResult"]]:
+        """Finds data by its metadata and loads it from a data store.
+
+        The query is executed once against the metadata store. The metadata of all
+        result subjects is then fetched with a single query (using a VALUES clause)
+        and the data of all rows is loaded concurrently.
+
+        Parameters
+        ----------
+        query : SparqlQuery
+            The query of the metadata store. Every result row refers to one dataset.
+        metadata_store : str
+            Name of the metadata store.
+        data_store : str
+            Name of the data store.
+        data_loader : Callable[[DataStore, Dict[str, Any]], Any]
+            Loads the data of a result row (passed as {variable: value}) from the data store.
+        subject : str, optional
+            The query variable whose values are the IRIs to collect the metadata of.
+            Default is "dataset".
+        bindings : Mapping[str, Any], optional
+            Passed to `query.execute()`.
+        max_workers : int, optional
+            Number of threads loading data. Default is 4.
+        lazy : bool, optional
+            If True, `LazyFederatedQueryResult`s are returned, whose data is only loaded
+            when it is accessed, so that results can be filtered by their metadata first.
+            Default is False.
+        prefetch : int, optional
+            Lazy results only: number of following results whose data is loaded in the
+            background when the data of a result is accessed. Default is 0.
+        cache : QueryResultCache, optional
+            Lazy results only: cache of loaded data, which may be shared between queries.
+            Data is cached per data store and result row. Default is None.
+
+        Returns
+        -------
+        List[FederatedQueryResult]
+            One result per row of the query result, in the same order. The metadata is a
+            dict {predicate: object} (a list of objects for repeated predicates).
+        """
+        from .query import FederatedQueryResult, LazyFederatedQueryResult
+        from .query.query import LazyPayloads
+
+        meta_store = self._get_store(metadata_store, MetadataStore)
+        data_store_ = self._get_store(data_store, DataStore)
+        rows = query.execute(meta_store, bindings=bindings).data.to_dict("records")
+        if not rows:
+            return []
+        if subject not in rows[0]:
+            raise ValueError(f"The query has no variable '{subject}'. Variables: {list(rows[0])}.")
+
+        subjects = list(dict.fromkeys(str(row[subject]) for row in rows))
+        metadata = {}
+        for i in range(0, len(subjects), METADATA_BATCH_SIZE):
+            result = _metadata_query(subjects[i:i + METADATA_BATCH_SIZE]).execute(meta_store)
+            if len(result.data):
+                metadata.update(_metadata_by_subject(result.data))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Fetched the metadata of %d subjects.", len(subjects))
 
-    # def execute_query(self, store_name: str, query: Query) -> QueryResult:
-    #     return self.store_manager.execute_query(store_name, query)
+        if lazy:
+            payloads = LazyPayloads(
+                [functools.partial(data_loader, data_store_, row) for row in rows],
+                keys=[_payload_key(data_store, row) for row in rows] if cache is not None else None,
+                cache=cache, prefetch=prefetch, max_workers=max_workers
+            )
+            return [
+                LazyFederatedQueryResult(metadata.get(str(row[subject]), {}), payloads, i)
+                for i, row in enumerate(rows)
+            ]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            data = list(executor.map(lambda row: data_loader(data_store_, row), rows))
+        return [
+            FederatedQueryResult(data=d, metadata=metadata.get(str(row[subject]), {}))
+            for row, d in zip(rows, data)
+        ]
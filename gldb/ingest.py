@@ -0,0 +1,464 @@
+import bz2
+import gzip
+import hashlib
+import lzma
+import os
+import pathlib
+import pickle
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import IO, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import rdflib
+from rdflib.plugins.parsers.ntriples import ParseError, W3CNTriplesParser, r_tail, r_wspace
+from rdflib.plugins.stores.memory import Memory
+
+from gldb import logger, metrics
+
+SKOLEM_BASE_IRI = "https://example.org/"
+
+# line-based formats, which are parsed in batches without building a temporary graph:
+LINE_BASED_FORMATS = {".nt", ".nq"}
+
+# compressed files are decompressed on the fly while parsing:
+COMPRESSIONS = {".gz": gzip, ".bz2": bz2, ".xz": lzma}
+
+
+def split_compression(filename: Union[str, pathlib.Path]) -> Tuple[str, Optional[str]]:
+    """Returns the RDF suffix and the compression suffix (or None) of a filename.
+
+    Example: "data.ttl.gz" -> (".ttl", ".gz")
+    """
+    filename = pathlib.Path(filename)
+    suffix = filename.suffix.lower()
+    if suffix in COMPRESSIONS:
+        return pathlib.Path(filename.stem).suffix.lower(), suffix
+    return suffix, None
+
+
+def open_rdf(filename: Union[str, pathlib.Path], mode: str = "rb", **kwargs) -> IO:
+    """Opens a (possibly compressed) RDF file. Compressed files are decompressed while reading."""
+    _, compression = split_compression(filename)
+    if compression is None:
+        return open(filename, mode, **kwargs)
+    return COMPRESSIONS[compression].open(filename, mode, **kwargs)
+
+
+_CACHE_FORMAT_VERSION = 1
+
+
+def _skolemizer(base_iri: str = SKOLEM_BASE_IRI, labels: Optional[Dict] = None):
+    """Returns a function mapping blank nodes to skolem IRIs (other nodes are returned as is).
+
+    The IRI is `base_iri` followed by the id of the blank node or, if `labels` is
+    given, by its entry in `labels`.
+    """
+    BNode = rdflib.BNode
+    skolem_iris = {}
+
+    def _skolem(node):
+        if not isinstance(node, BNode):
+            return node
+        iri = skolem_iris.get(node)
+        if iri is None:
+            label = node if labels is None else labels[node]
+            iri = skolem_iris[node] = rdflib.URIRef(f"{base_iri}{label}")
+        return iri
+
+    return _skolem
+
+
+def skolemize(g: rdflib.Graph) -> rdflib.Graph:
+    """Replaces blank nodes in subject and object position by IRIs based on `SKOLEM_BASE_IRI`.
+
+    The graph is scanned once and only triples containing a blank node are
+    rewritten, in bulk. Triples without blank nodes are not touched.
+    """
+    BNode = rdflib.BNode
+    bnode_triples = [t for t in g if isinstance(t[0], BNode) or isinstance(t[2], BNode)]
+    if not bnode_triples:
+        return g
+    _skolem = _skolemizer()
+    for t in bnode_triples:
+        g.remove(t)
+    g.addN((_skolem(s), p, _skolem(o), g) for s, p, o in bnode_triples)
+    return g
+
+
+def file_skolem_base(filename: Union[str, pathlib.Path]) -> str:
+    """Returns the base IRI of the deterministic skolem IRIs of a file, which
+    is `SKOLEM_BASE_IRI` followed by a hash of the absolute path."""
+    key = hashlib.sha256(str(pathlib.Path(filename).resolve()).encode("utf-8")).hexdigest()[:16]
+    return f"{SKOLEM_BASE_IRI}{key}/"
+
+
+class _LabelContext(dict):
+    """Blank node context of the line parsers, which keeps the labels of the file
+    as blank node ids instead of generating random ones."""
+
+    def get(self, key, default=None):
+        return key
+
+
+class _TripleSink:
+    """Collects the triples of the line parsers."""
+
+    def __init__(self):
+        self.triples = []
+
+    def triple(self, s, p, o):
+        self.triples.append((s, p, o))
+
+
+class _NQuadsLineParser(W3CNTriplesParser):
+    """N-Quads line parser, which passes triples to the sink and drops the graph name."""
+
+    def parseline(self, bnode_context=None) -> None:
+        self.eat(r_wspace)
+        if (not self.line) or self.line.startswith("#"):
+            return  # The line is empty or a comment
+
+        subject = self.subject(bnode_context)
+        self.eat(r_wspace)
+        predicate = self.predicate()
+        self.eat(r_wspace)
+        obj = self.object(bnode_context)
+        self.eat(r_wspace)
+        self.uriref() or self.nodeid(bnode_context)  # graph name
+        self.eat(r_tail)
+
+        if self.line:
+            raise ParseError("Trailing garbage")
+        self.sink.triple(subject, predicate, obj)
+
+
+def iter_triple_batches(filename: Union[str, pathlib.Path], batch_size: int = 100_000,
+                        stable_bnodes: bool = False) -> Iterator[List[Tuple]]:
+    """Parses an N-Triples or N-Quads file in batches of skolemized triples.
+
+    The file is read in buffered chunks, so the memory needed for parsing is
+    bounded by `batch_size` and not by the file size. Graph names of N-Quads
+    are dropped.
+
+    Parameters
+    ----------
+    filename : Union[str, pathlib.Path]
+        The file to parse (.nt or .nq).
+    batch_size : int, optional
+        Maximum number of triples per batch. Default is 100 000.
+    stable_bnodes : bool, optional
+        If True, the skolem IRIs are built from the path of the file (see
+        `file_skolem_base()`) and the blank node labels in the file, so parsing
+        the file again yields the same IRIs. Default is False (random IRIs).
+
+    Yields
+    ------
+    List[Tuple]
+        The next batch of triples.
+    """
+    if batch_size < 1:
+        raise ValueError(f"batch_size must be at least 1, got {batch_size}.")
+    if split_compression(filename)[0] == ".nq":
+        parser_cls = _NQuadsLineParser
+    else:
+        parser_cls = W3CNTriplesParser
+    sink = _TripleSink()
+    # blank node labels are scoped to the document, so one context is used for all batches:
+    if stable_bnodes:
+        parser = parser_cls(sink=sink, bnode_context=_LabelContext())
+        _skolem = _skolemizer(file_skolem_base(filename))
+    else:
+        parser = parser_cls(sink=sink, bnode_context={})
+        _skolem = _skolemizer()
+    with open_rdf(filename, "rt", encoding="utf-8", newline="") as f:
+        parser.file = f
+        parser.buffer = ""
+        while True:
+            parser.line = line = parser.readline()
+            if line is None:
+                break
+            try:
+                parser.parseline()
+            except ParseError as e:
+                raise ValueError(f"Could not parse file '{filename}'. Error: {e} in line {line!r}")
+            if len(sink.triples) >= batch_size:
+                yield [(_skolem(s), p, _skolem(o)) for s, p, o in sink.triples]
+                sink.triples = []
+    if sink.triples:
+        yield [(_skolem(s), p, _skolem(o)) for s, p, o in sink.triples]
+
+
+class _BNodeOrderMemory(Memory):
+    """Memory store, which numbers the blank nodes in the order the parser adds them."""
+
+    def __init__(self):
+        super().__init__()
+        self.bnode_positions = {}
+
+    def add(self, triple, context, quoted=False):
+        for node in (triple[0], triple[2]):
+            if isinstance(node, rdflib.BNode) and node not in self.bnode_positions:
+                self.bnode_positions[node] = f"b{len(self.bnode_positions)}"
+        super().add(triple, context, quoted)
+
+
+def _parse(g: rdflib.Graph, filename: Union[str, pathlib.Path]) -> rdflib.Graph:
+    suffix, compression = split_compression(filename)
+    try:
+        if compression is None:
+            g.parse(filename)
+        else:
+            with open_rdf(filename) as f:
+                g.parse(source=f, format=rdflib.util.guess_format(f"file{suffix}"),
+                        publicID=pathlib.Path(filename).resolve().as_uri())
+    except Exception as e:
+        raise ValueError(f"Could not parse file '{filename}'. Error: {e}")
+    return g
+
+
+def parse_file(filename: Union[str, pathlib.Path]) -> rdflib.Graph:
+    """Parses a (possibly compressed) RDF file and returns the skolemized graph."""
+    if split_compression(filename)[0] in LINE_BASED_FORMATS:
+        g = rdflib.Graph()
+        for batch in iter_triple_batches(filename):
+            g.addN((s, p, o, g) for s, p, o in batch)
+        return g
+    return skolemize(_parse(rdflib.Graph(), filename))
+
+
+def iter_stable_triple_batches(filename: Union[str, pathlib.Path], batch_size: int = 100_000) -> Iterator[List[Tuple]]:
+    """Parses an RDF file in batches of skolemized triples, which are the same every
+    time the file is parsed.
+
+    Blank nodes get skolem IRIs based on the path of the file (see
+    `file_skolem_base()`) and on their label (N-Triples, N-Quads) or their
+    position in the document (other formats). N-Triples and N-Quads are
+    streamed in the order of the file (see `iter_triple_batches()`), other
+    formats are parsed completely and their triples are sorted.
+
+    Parameters
+    ----------
+    filename : Union[str, pathlib.Path]
+        The file to parse.
+    batch_size : int, optional
+        Maximum number of triples per batch. Default is 100 000.
+
+    Yields
+    ------
+    List[Tuple]
+        The next batch of triples.
+    """
+    if split_compression(filename)[0] in LINE_BASED_FORMATS:
+        yield from iter_triple_batches(filename, batch_size, stable_bnodes=True)
+        return
+    if batch_size < 1:
+        raise ValueError(f"batch_size must be at least 1, got {batch_size}.")
+    store = _BNodeOrderMemory()
+    g = _parse(rdflib.Graph(store=store), filename)
+    _skolem = _skolemizer(file_skolem_base(filename), store.bnode_positions)
+    triples = sorted(((_skolem(s), p, _skolem(o)) for s, p, o in g),
+                     key=lambda t: (t[0].n3(), t[1].n3(), t[2].n3()))
+    for i in range(0, len(triples), batch_size):
+        yield triples[i:i + batch_size]
+
+
+def file_digest(filename: Union[str, pathlib.Path], chunk_size: int = 1 << 20) -> str:
+    """Returns the sha256 hex digest of the file content."""
+    h = hashlib.sha256()
+    with open(filename, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class FileState(NamedTuple):
+    """Size, modification time and content hash of a file, used to detect changes."""
+    size: int
+    mtime_ns: int
+    sha256: str
+
+    @classmethod
+    def from_path(cls, filename: Union[str, pathlib.Path]) -> "FileState":
+        stat = os.stat(filename)
+        return cls(size=stat.st_size, mtime_ns=stat.st_mtime_ns, sha256=file_digest(filename))
+
+    def is_outdated(self, filename: Union[str, pathlib.Path]) -> Tuple[bool, "FileState"]:
+        """Checks whether the file changed since the state was taken.
+
+        The content hash is only computed if size and modification time do not
+        already decide. Returns whether the content changed and the current state.
+        """
+        stat = os.stat(filename)
+        if stat.st_size == self.size and stat.st_mtime_ns == self.mtime_ns:
+            return False, self
+        if stat.st_size != self.size:
+            return True, FileState(stat.st_size, stat.st_mtime_ns, "")
+        current = FileState(stat.st_size, stat.st_mtime_ns, file_digest(filename))
+        return current.sha256 != self.sha256, current
+
+
+def _pack_triples(triples: Iterable[Tuple]) -> Tuple[List, array]:
+    """Packs triples into a term table and a flat array of term indices."""
+    terms: List = []
+    lookup: Dict = {}
+    index = array("L")
+    for triple in triples:
+        for term in triple:
+            i = lookup.get(term)
+            if i is None:
+                i = lookup[term] = len(terms)
+                terms.append(term)
+            index.append(i)
+    return terms, index
+
+
+def _unpack_triples(terms: List, index: array) -> rdflib.Graph:
+    g = rdflib.Graph()
+    it = iter(index)
+    g.addN((terms[s], terms[p], terms[o], g) for s, p, o in zip(it, it, it))
+    return g
+
+
+class GraphCache:
+    """On-disk cache of parsed and skolemized RDF files.
+
+    Each source file gets one cache entry, named after the hash of its absolute
+    path. An entry is valid as long as the size and modification time of the
+    source file did not change. If only the modification time changed, the content
+    hash decides, so touching a file does not force it to be parsed again.
+
+    Entries are pickled, so the cache directory must only be writable by trusted users.
+
+    Parameters
+    ----------
+    cache_dir : Union[str, pathlib.Path]
+        Directory in which the cache entries are stored. Created if it does not exist.
+    """
+
+    def __init__(self, cache_dir: Union[str, pathlib.Path]):
+        self._cache_dir = pathlib.Path(cache_dir).resolve()
+        self._cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def cache_dir(self) -> pathlib.Path:
+        """Returns the directory where cache entries are stored."""
+        return self._cache_dir
+
+    def _entry_path(self, filename: pathlib.Path) -> pathlib.Path:
+        key = hashlib.sha1(str(filename).encode("utf-8")).hexdigest()
+        return self._cache_dir / f"{key}.pickle"
+
+    def load(self, filename: Union[str, pathlib.Path]) -> Optional[rdflib.Graph]:
+        """Returns the cached graph of the file or None if there is no valid cache entry."""
+        filename = pathlib.Path(filename).resolve()
+        entry_path = self._entry_path(filename)
+        if not entry_path.exists():
+            return None
+        try:
+            with open(entry_path, "rb") as f:
+                entry = pickle.load(f)
+        except Exception as e:
+            logger.debug("Ignoring unreadable cache entry %s: %s", entry_path, e)
+            return None
+        if entry.get("version") != _CACHE_FORMAT_VERSION or entry.get("path") != str(filename):
+            return None
+        stat = os.stat(filename)
+        if stat.st_size != entry["size"]:
+            return None
+        if stat.st_mtime_ns != entry["mtime_ns"]:
+            if file_digest(filename) != entry["sha256"]:
+                return None
+            # content is unchanged, remember the new modification time:
+            entry["mtime_ns"] = stat.st_mtime_ns
+            self._write_entry(entry_path, entry)
+        return _unpack_triples(entry["terms"], entry["index"])
+
+    def store(self, filename: Union[str, pathlib.Path], graph: rdflib.Graph):
+        """Writes the (skolemized) graph of the file to the cache."""
+        filename = pathlib.Path(filename).resolve()
+        stat = os.stat(filename)
+        terms, index = _pack_triples(graph)
+        entry = {
+            "version": _CACHE_FORMAT_VERSION,
+            "path": str(filename),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": file_digest(filename),
+            "terms": terms,
+            "index": index,
+        }
+        self._write_entry(self._entry_path(filename), entry)
+
+    def _write_entry(self, entry_path: pathlib.Path, entry: Dict):
+        tmp_path = entry_path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, entry_path)
+
+    def clear(self):
+        """Removes all cache entries."""
+        for entry_path in self._cache_dir.glob("*.pickle"):
+            entry_path.unlink()
+
+
+def load_cached_graph(filename: pathlib.Path, cache: GraphCache) -> Optional[rdflib.Graph]:
+    """Returns the graph of the file from the cache or None if there is no valid cache entry."""
+    g = cache.load(filename)
+    if g is None:
+        metrics.GRAPH_CACHE_REQUESTS.inc(result="miss")
+        return None
+    metrics.GRAPH_CACHE_REQUESTS.inc(result="hit")
+    logger.debug("Loaded '%s' from the graph cache.", filename)
+    return g
+
+
+def load_graph(filename: pathlib.Path, cache: Optional[GraphCache] = None) -> rdflib.Graph:
+    """Returns the skolemized graph of the file, using the cache if given."""
+    if cache is None:
+        return parse_file(filename)
+    g = load_cached_graph(filename, cache)
+    if g is not None:
+        return g
+    g = parse_file(filename)
+    cache.store(filename, g)
+    return g
+
+
+def _load_packed(filename: pathlib.Path, cache: Optional[GraphCache]) -> Tuple[List, array]:
+    """Worker function of `load_graphs`. Packed triples are much cheaper to send between processes."""
+    return _pack_triples(load_graph(filename, cache))
+
+
+def load_graphs(
+        filenames: Sequence[pathlib.Path],
+        cache: Optional[GraphCache] = None,
+        n_workers: int = 1
+) -> Iterator[Tuple[pathlib.Path, rdflib.Graph]]:
+    """Loads the skolemized graphs of the files, optionally in parallel.
+
+    Parameters
+    ----------
+    filenames : Sequence[pathlib.Path]
+        The files to load.
+    cache : GraphCache, optional
+        Cache of parsed files. Default is None (no cache).
+    n_workers : int, optional
+        Number of worker processes used for parsing. With 1 (default), files
+        are parsed in the current process.
+
+    Yields
+    ------
+    Tuple[pathlib.Path, rdflib.Graph]
+        The filename and its graph, in the order of `filenames` regardless of
+        the number of workers.
+    """
+    if n_workers < 1:
+        raise ValueError(f"n_workers must be at least 1, got {n_workers}.")
+    if n_workers == 1 or len(filenames) < 2:
+        for filename in filenames:
+            yield filename, load_graph(filename, cache)
+        return
+    with ProcessPoolExecutor(max_workers=min(n_workers, len(filenames))) as executor:
+        packed = executor.map(_load_packed, filenames, [cache] * len(filenames))
+        for filename, (terms, index) in zip(filenames, packed):
+            yield filename, _unpack_triples(terms, index)
@@ -0,0 +1,195 @@
+"""Timing breakdown of queries and hooks to report them.
+
+Every `QueryResult` carries the `QueryTimings` of its query. In addition, queries
+and GraphDB REST calls are reported as `InstrumentationEvent`s to the registered
+hooks, e.g.:
+
+    from gldb import instrumentation
+
+    instrumentation.register_hook(lambda event: print(event.name, event.seconds, event.timings))
+
+Events are only created if a hook is registered. `enable_opentelemetry()`
+registers a hook reporting the events as OpenTelemetry spans.
+"""
+import contextlib
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from gldb import logger
+
+
+@dataclass
+class QueryTimings:
+    """Durations (in seconds) of the stages of a query.
+
+    Attributes
+    ----------
+    parse : float
+        Parsing the query text. 0 if the compiled query was cached.
+    plan : float
+        Translating the parsed query into SPARQL algebra. 0 if the compiled query was cached.
+    execute : float
+        Evaluating the query in the store (rdflib for local stores).
+    transfer : float
+        Round-trip to a remote store, including the evaluation by the endpoint and,
+        for JSON results, parsing the response.
+    decode : float
+        Building the DataFrame from the result.
+    rows : int, optional
+        Number of result rows.
+    bytes : int, optional
+        Size of the received result. None if unknown.
+    cached : bool
+        Whether the result was taken from a `QueryResultCache`.
+    """
+    parse: float = 0.0
+    plan: float = 0.0
+    execute: float = 0.0
+    transfer: float = 0.0
+    decode: float = 0.0
+    rows: Optional[int] = None
+    bytes: Optional[int] = None
+    cached: bool = False
+
+    @property
+    def total(self) -> float:
+        """Sum of all stages in seconds."""
+        return self.parse + self.plan + self.execute + self.transfer + self.decode
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Returns the timings including the total as dict."""
+        return {**asdict(self), "total": self.total}
+
+
+@dataclass
+class InstrumentationEvent:
+    """A reported operation.
+
+    Attributes
+    ----------
+    kind : str
+        "query" for query executions and "http" for GraphDB REST calls.
+    name : str
+        Name of the query class or method and URL of the request.
+    start : float
+        Start time as seconds since the epoch.
+    seconds : float
+        Duration of the operation.
+    attributes : Dict[str, Any]
+        Further information, e.g. the store of a query or the status code of a request.
+    timings : QueryTimings, optional
+        Timing breakdown of queries.
+    error : Exception, optional
+        The exception raised by the operation, if any.
+    """
+    kind: str
+    name: str
+    start: float
+    seconds: float = 0.0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    timings: Optional[QueryTimings] = None
+    error: Optional[BaseException] = None
+
+
+Hook = Callable[[InstrumentationEvent], None]
+
+_hooks: Tuple[Hook, ...] = ()
+_hooks_lock = threading.Lock()
+
+
+def register_hook(hook: Hook) -> Hook:
+    """Registers a function which is called with every `InstrumentationEvent`.
+
+    Hooks are called synchronously in the thread of the operation, so they should
+    return quickly. Exceptions raised by hooks are logged and ignored. Returns the
+    hook, so that this function can be used as a decorator.
+    """
+    global _hooks
+    with _hooks_lock:
+        _hooks = _hooks + (hook,)
+    return hook
+
+
+def unregister_hook(hook: Hook):
+    """Removes a hook registered with `register_hook()`."""
+    global _hooks
+    with _hooks_lock:
+        _hooks = tuple(h for h in _hooks if h is not hook)
+
+
+def clear_hooks():
+    """Removes all hooks."""
+    global _hooks
+    with _hooks_lock:
+        _hooks = ()
+
+
+def hooks_enabled() -> bool:
+    """Returns whether any hook is registered."""
+    return bool(_hooks)
+
+
+def emit(event: InstrumentationEvent):
+    """Passes the event to all registered hooks."""
+    for hook in _hooks:
+        try:
+            hook(event)
+        except Exception as e:
+            logger.warning("Instrumentation hook %r failed: %s", hook, e)
+
+
+@contextlib.contextmanager
+def measure(kind: str, name: str, **attributes) -> Iterator[InstrumentationEvent]:
+    """Times the block and emits an event for it. The block may add attributes
+    and timings to the yielded event. Exceptions are recorded and re-raised."""
+    event = InstrumentationEvent(kind, name, start=time.time(), attributes=attributes)
+    t0 = time.perf_counter()
+    try:
+        yield event
+    except BaseException as e:
+        event.error = e
+        raise
+    finally:
+        event.seconds = time.perf_counter() - t0
+        emit(event)
+
+
+class OpenTelemetryHook:
+    """Reports events as OpenTelemetry spans named "gldb.<kind> <name>".
+
+    The spans are created when the operation finished, with its start and end
+    time, as children of the span that is current in the thread of the operation.
+
+    Parameters
+    ----------
+    tracer : opentelemetry.trace.Tracer, optional
+        The tracer to create the spans with. Default is the tracer "gldb" of the
+        global tracer provider.
+    """
+
+    def __init__(self, tracer=None):
+        if tracer is None:
+            try:
+                from opentelemetry import trace
+            except ImportError:
+                raise ImportError("Please install opentelemetry-api to use this class: 'pip install gldb[otel]'")
+            tracer = trace.get_tracer("gldb")
+        self._tracer = tracer
+
+    def __call__(self, event: InstrumentationEvent):
+        attributes = {f"gldb.{k}": v for k, v in event.attributes.items() if v is not None}
+        if event.timings is not None:
+            attributes.update({f"gldb.timings.{k}": v for k, v in event.timings.as_dict().items() if v is not None})
+        start_ns = int(event.start * 1e9)
+        span = self._tracer.start_span(f"gldb.{event.kind} {event.name}", start_time=start_ns,
+                                       attributes=attributes)
+        if event.error is not None:
+            span.record_exception(event.error)
+        span.end(end_time=start_ns + int(event.seconds * 1e9))
+
+
+def enable_opentelemetry(tracer=None) -> OpenTelemetryHook:
+    """Registers an `OpenTelemetryHook` and returns it (see `unregister_hook()`)."""
+    return register_hook(OpenTelemetryHook(tracer))
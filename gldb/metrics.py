@@ -0,0 +1,312 @@
+"""Metrics of stores, GraphDB requests, queries and caches in the Prometheus text format.
+
+Metrics are disabled by default. Then, recording a value returns immediately.
+After `enable()`, the values are collected in `REGISTRY` and can be exported, e.g.:
+
+    from gldb import metrics
+
+    metrics.enable()
+    metrics.start_http_server(9464)           # serves http://127.0.0.1:9464/metrics
+    metrics.write_textfile("gldb.prom")      # e.g. for the node_exporter textfile collector
+
+Counters, gauges and histograms take their labels as keyword arguments when a
+value is recorded, e.g. `HTTP_REQUESTS.inc(endpoint="http://localhost:7200")`.
+"""
+import bisect
+import os
+import pathlib
+import threading
+from typing import Dict, List, Sequence, Tuple, Union
+
+from . import instrumentation
+
+_enabled = False
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r'\"')
+
+
+def _escape_help(value: str) -> str:
+    return value.replace("\\", r"\\").replace("\n", r"\n")
+
+
+def _format_labels(key: LabelKey) -> str:
+    if not key:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in key) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Registry:
+    """Collection of metrics, which are rendered together."""
+
+    def __init__(self):
+        self._metrics: Dict[str, "_Metric"] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: "_Metric"):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"A metric named '{metric.name}' is registered already.")
+            self._metrics[metric.name] = metric
+
+    @property
+    def metrics(self) -> List["_Metric"]:
+        return list(self._metrics.values())
+
+    def reset(self):
+        """Clears the values of all metrics."""
+        for metric in self.metrics:
+            metric.reset()
+
+    def render(self) -> str:
+        """Returns all metrics in the Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {_escape_help(metric.documentation)}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name: str, documentation: str, registry: Registry = REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def value(self, **labels) -> float:
+        """Returns the current value for the labels (0 if none was recorded)."""
+        return self._values.get(_label_key(labels), 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(key)} {_format_value(v)}" for key, v in values]
+
+    def _add(self, amount: float, labels: Dict):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Counter(_Metric):
+    """A value that only increases, e.g. the number of requests. Names should end with `_total`."""
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        if not _enabled:
+            return
+        if amount < 0:
+            raise ValueError("Counters can only be increased.")
+        self._add(amount, labels)
+
+
+class Gauge(_Metric):
+    """A value that can go up and down, e.g. the number of requests in flight."""
+    type = "gauge"
+
+    def inc(self, amount: float = 1, **labels):
+        if _enabled:
+            self._add(amount, labels)
+
+    def dec(self, amount: float = 1, **labels):
+        if _enabled:
+            self._add(-amount, labels)
+
+    def set(self, value: float, **labels):
+        if not _enabled:
+            return
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+
+class Histogram(_Metric):
+    """Distribution of observed values (e.g. durations in seconds) in cumulative buckets.
+
+    Parameters
+    ----------
+    buckets : Sequence[float], optional
+        Upper bounds of the buckets. Default are `DEFAULT_BUCKETS` (5 ms to 10 s).
+    """
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float] = DEFAULT_BUCKETS,
+                 registry: Registry = REGISTRY):
+        super().__init__(name, documentation, registry)
+        self._buckets = tuple(sorted(buckets))
+        # per label key: [count per bucket (the last one is +Inf), sum]
+        self._values: Dict[LabelKey, list] = {}
+
+    def observe(self, value: float, **labels):
+        if not _enabled:
+            return
+        key = _label_key(labels)
+        index = bisect.bisect_left(self._buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self._buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def value(self, **labels) -> Tuple[int, float]:
+        """Returns the number and the sum of the observed values for the labels."""
+        entry = self._values.get(_label_key(labels))
+        if entry is None:
+            return 0, 0.0
+        return sum(entry[0]), entry[1]
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        lines = []
+        for key, (counts, total) in values:
+            cumulative = 0
+            for upper, count in zip(self._buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(key + (("le", _format_value(upper)),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+        return lines
+
+
+# stores:
+FILES_UPLOADED = Counter("gldb_files_uploaded_total", "Files uploaded to a store.")
+FILES_PARSED = Counter("gldb_files_parsed_total", "RDF files loaded (parsed or from the graph cache) by an InMemoryRDFStore.")
+PARSE_FAILURES = Counter("gldb_parse_failures_total", "RDF files which could not be parsed.")
+TRIPLES_LOADED = Counter("gldb_triples_loaded_total", "Triples loaded from parsed RDF files.")
+STORE_FILES = Gauge("gldb_store_files", "Files tracked by an InMemoryRDFStore.")
+# GraphDB:
+HTTP_REQUESTS = Counter("gldb_http_requests_total", "Requests to GraphDB REST endpoints (retried requests count once).")
+HTTP_ERRORS = Counter("gldb_http_errors_total", "GraphDB requests which failed or returned an error status.")
+HTTP_REQUESTS_IN_FLIGHT = Gauge("gldb_http_requests_in_flight", "GraphDB requests in progress.")
+HTTP_REQUEST_SECONDS = Histogram("gldb_http_request_seconds", "Duration of GraphDB requests.")
+# queries:
+QUERIES = Counter("gldb_queries_total", "Executed queries.")
+QUERY_SECONDS = Histogram("gldb_query_seconds", "Duration of queries.")
+STORE_MANAGER_QUERIES = Counter("gldb_store_manager_queries_total",
+                                "Queries sent to stores by StoreManager.execute_all().")
+STORE_MANAGER_QUERY_SECONDS = Histogram("gldb_store_manager_query_seconds",
+                                        "Duration of queries sent by StoreManager.execute_all().")
+# caches:
+QUERY_CACHE_REQUESTS = Counter("gldb_query_cache_requests_total", "Lookups in query result caches.")
+QUERY_CACHE_EVICTIONS = Counter("gldb_query_cache_evictions_total", "Results evicted from query result caches.")
+GRAPH_CACHE_REQUESTS = Counter("gldb_graph_cache_requests_total",
+                               "Lookups in caches of parsed files (in the parsing process).")
+
+
+def _record_event(event: instrumentation.InstrumentationEvent):
+    """Records queries and GraphDB requests reported to the instrumentation hooks."""
+    if event.kind == "http":
+        endpoint = event.attributes.get("endpoint")
+        method = event.attributes.get("method")
+        status = event.attributes.get("status")
+        HTTP_REQUESTS.inc(endpoint=endpoint, method=method, status=status if status is not None else "error")
+        if event.error is not None:
+            HTTP_ERRORS.inc(endpoint=endpoint, reason=type(event.error).__name__)
+        elif status >= 400:
+            HTTP_ERRORS.inc(endpoint=endpoint, reason=status)
+        HTTP_REQUEST_SECONDS.observe(event.seconds, endpoint=endpoint, method=method)
+    elif event.kind == "query":
+        store = event.attributes.get("store")
+        QUERIES.inc(query=event.name, store=store, status="error" if event.error is not None else "success")
+        QUERY_SECONDS.observe(event.seconds, query=event.name, store=store)
+
+
+def is_enabled() -> bool:
+    """Returns whether metrics are collected."""
+    return _enabled
+
+
+def enable():
+    """Starts collecting metrics. Queries and GraphDB requests are recorded through an
+    instrumentation hook (see `gldb.instrumentation`)."""
+    global _enabled
+    if not _enabled:
+        _enabled = True
+        instrumentation.register_hook(_record_event)
+
+
+def disable():
+    """Stops collecting metrics. The values collected so far are kept."""
+    global _enabled
+    _enabled = False
+    instrumentation.unregister_hook(_record_event)
+
+
+def render(registry: Registry = REGISTRY) -> str:
+    """Returns the metrics in the Prometheus text exposition format."""
+    return registry.render()
+
+
+def write_textfile(filename: Union[str, pathlib.Path], registry: Registry = REGISTRY) -> pathlib.Path:
+    """Writes the metrics to a file. The file is replaced atomically, so that readers
+    (e.g. the textfile collector of the node_exporter) never see a partial file."""
+    filename = pathlib.Path(filename)
+    tmp_filename = filename.with_name(f"{filename.name}.{os.getpid()}.tmp")
+    tmp_filename.write_text(render(registry), encoding="utf-8")
+    os.replace(tmp_filename, filename)
+    return filename
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def start_http_server(port: int, addr: str = "127.0.0.1", registry: Registry = REGISTRY):
+    """Serves the metrics at `http://<addr>:<port>/metrics` from a daemon thread.
+
+    Returns the server, which is stopped with `server.shutdown()`. Pass port 0 to
+    use a free port (see `server.server_address`).
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class _MetricsHandler(BaseHTTPRequestHandler):
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = render(registry).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((addr, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -1,4 +1,5 @@
-from .data_store_query import DataStoreQuery
+from .cache import QueryResultCache, CacheStats
+from .data_store_query import DataStoreQuery, ParquetQuery
 from .metadata_query import MetadataStoreQuery
 from .metadata_query import SparqlQuery, RemoteSparqlQuery
-from .query import Query, QueryResult, FederatedQueryResult
+from .query import Query, QueryResult, FederatedQueryResult, LazyFederatedQueryResult
@@ -0,0 +1,119 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Hashable, Optional
+
+from gldb import metrics
+from gldb.query.query import QueryResult
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    """Statistics of a `QueryResultCache`."""
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    maxsize: int
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups that were served from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class QueryResultCache:
+    """Thread-safe LRU cache of query results with an optional time to live.
+
+    Keys are built by the queries from the query text, the bindings and the
+    version of the store (see `InMemoryRDFStore.version`). The version changes
+    whenever the store content changes, so stale results are never returned.
+
+    The cache can also hold the data of lazy federated query results
+    (see `GenericLinkedDatabase.federated_query()`).
+
+    Parameters
+    ----------
+    maxsize : int, optional
+        Maximum number of cached results. Default is 128.
+    ttl : float, optional
+        Time to live of a result in seconds. Default is None (no expiry).
+    """
+
+    def __init__(self, maxsize: int = 128, ttl: Optional[float] = None):
+        if maxsize < 1:
+            raise ValueError(f"maxsize must be at least 1, got {maxsize}.")
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(maxsize={self._maxsize}, ttl={self._ttl})"
+
+    def get(self, key: Hashable) -> Optional[QueryResult]:
+        """Returns the cached result or None if there is none (or it expired)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, result = entry
+                if expires is None or time.monotonic() < expires:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    metrics.QUERY_CACHE_REQUESTS.inc(result="hit")
+                    return result
+                del self._entries[key]
+            self._misses += 1
+            metrics.QUERY_CACHE_REQUESTS.inc(result="miss")
+            return None
+
+    def put(self, key: Hashable, result: QueryResult):
+        """Caches the result, evicting the least recently used one if the cache is full."""
+        expires = None if self._ttl is None else time.monotonic() + self._ttl
+        with self._lock:
+            self._entries[key] = (expires, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+                metrics.QUERY_CACHE_EVICTIONS.inc()
+
+    def clear(self):
+        """Removes all cached results. The statistics are kept."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> CacheStats:
+        """Returns hit, miss and eviction counts."""
+        with self._lock:
+            return CacheStats(hits=self._hits, misses=self._misses, evictions=self._evictions,
+                              size=len(self._entries), maxsize=self._maxsize)
+
+
+def make_cache_key(query: str, store: Any, *args, **kwargs) -> Optional[Hashable]:
+    """Returns the cache key of a query execution or None if it cannot be cached.
+
+    Executions can be cached if the store has a `version` and all arguments are hashable.
+    """
+    version = getattr(store, "version", None)
+    if version is None:
+        return None
+    frozen_kwargs = []
+    for k, v in sorted(kwargs.items()):
+        if isinstance(v, dict):
+            v = tuple(sorted(v.items(), key=lambda item: str(item[0])))
+        frozen_kwargs.append((k, v))
+    key = (query, version, args, tuple(frozen_kwargs))
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
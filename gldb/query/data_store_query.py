@@ -1,7 +1,52 @@
+import time
 from abc import ABC
+from typing import List
 
-from gldb.query.query import Query
+from gldb.instrumentation import QueryTimings
+from gldb.query.query import Query, QueryResult
 
 
 class DataStoreQuery(Query, ABC):
     """Data store query interface (concrete implementations can be sql or non sql query)."""
+
+
+class ParquetQuery(DataStoreQuery):
+    """Query of a table of a `ParquetDataStore`.
+
+    Parameters
+    ----------
+    table : str
+        Name of the table.
+    columns : List[str], optional
+        Columns to return. Only these columns are read. Default is None (all columns).
+    filters : optional
+        Row filter as a `pyarrow.compute.Expression` or in disjunctive normal form,
+        e.g. [("temperature", ">", 20)]. Row groups which cannot match are not read.
+    description : str, optional
+        A description of the query.
+    """
+
+    def __init__(self, table: str, columns: List[str] = None, filters=None, description: str = None):
+        super().__init__(table, description)
+        self.columns = columns
+        self.filters = filters
+
+    def __eq__(self, other):
+        if not isinstance(other, ParquetQuery):
+            return NotImplemented
+        # filters may be pyarrow expressions, whose == is an expression as well:
+        return (super().__eq__(other) and self.columns == other.columns
+                and str(self.filters) == str(other.filters))
+
+    def execute(self, store, *args, **kwargs) -> QueryResult:
+        """Reads the table from the store and returns it as a pandas DataFrame."""
+        return self._instrumented(store, self._execute, store)
+
+    def _execute(self, store) -> QueryResult:
+        t0 = time.perf_counter()
+        table = store.read(self.query, columns=self.columns, filters=self.filters)
+        t1 = time.perf_counter()
+        data = table.to_pandas()
+        timings = QueryTimings(execute=t1 - t0, decode=time.perf_counter() - t1, rows=len(data),
+                               bytes=table.nbytes)
+        return QueryResult(self, data=data, description=self.description, timings=timings)
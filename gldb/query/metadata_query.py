@@ -1,12 +1,24 @@
+import asyncio
+import functools
+import logging
+import re
+import threading
+import time
 from abc import ABC
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple, Union
 
 import pandas as pd
 import rdflib
+from rdflib.plugins.sparql.algebra import translateQuery
+from rdflib.plugins.sparql.parser import parseQuery
+from rdflib.plugins.sparql.sparql import Query as PreparedQuery
 
-from gldb import logger
+from gldb import instrumentation, logger
+from gldb.instrumentation import QueryTimings
 from gldb.query.query import Query, QueryResult
-from gldb.stores import RDFStore, RemoteSparqlStore
-from .utils import sparql_json_to_dataframe
+from gldb.stores import _RESULT_CONTENT_TYPES, RDFStore, RemoteSparqlStore
+from .cache import QueryResultCache, make_cache_key
+from .utils import _DTYPES, _typed_column, sparql_results_to_dataframe
 
 
 def parse_literal(literal):
@@ -17,8 +29,126 @@ def parse_literal(literal):
     return literal
 
 
-def sparql_result_to_df(bindings):
-    return pd.DataFrame([{str(k): parse_literal(v) for k, v in binding.items()} for binding in bindings])
+def _term_column(values: List) -> Union[pd.Series, List]:
+    """Converts the RDF terms of one result variable (None for unbound) into a typed column.
+
+    Columns of IRIs become categoricals if IRIs repeat (strings otherwise). Columns of
+    literals with one common datatype are converted in bulk: integers to Int64, floats
+    and doubles to float64, booleans to boolean and date-times to datetime64. Any other
+    column is returned as a list of Python values.
+    """
+    present = [v for v in values if v is not None]
+    types = set(map(type, present))
+    if types == {rdflib.URIRef}:
+        strings = [None if v is None else str(v) for v in values]
+        if len(set(strings)) <= len(strings) // 2:
+            return pd.Series(pd.Categorical(strings))
+        return strings
+    if types == {rdflib.Literal}:
+        datatypes = {str(v.datatype) for v in present}
+        dtype = _DTYPES.get(datatypes.pop()) if len(datatypes) == 1 else None
+        if dtype is not None:
+            py_values = [None if v is None else v.value for v in values]
+            # ill-typed literals have no Python value and are kept as they are:
+            if sum(p is None for p in py_values) == len(values) - len(present):
+                typed = _typed_column(py_values, dtype)
+                if typed is not None:
+                    return typed
+    return [parse_literal(v) for v in values]
+
+
+def sparql_result_to_df(bindings) -> pd.DataFrame:
+    """Converts rdflib SPARQL result bindings into a DataFrame.
+
+    The values of each variable are gathered into one column, which is then
+    converted at once (see `_term_column`). Columns are ordered by first appearance.
+    """
+    # rdflib's FrozenBindings wrap a plain dict, which is much faster to access:
+    rows = [getattr(binding, "_d", binding) for binding in bindings]
+    variables = []
+    known = set()
+    for row in rows:
+        if not known.issuperset(row):
+            for k in row:
+                if k not in known:
+                    known.add(k)
+                    variables.append(k)
+    return pd.DataFrame({
+        str(var): _term_column([row.get(var) for row in rows])
+        for var in variables
+    })
+
+
+PREPARED_QUERY_CACHE_SIZE = 512
+
+# durations (parse, plan) of the last compilation in the current thread:
+_compile_timings = threading.local()
+# the pyparsing grammar of rdflib is not thread-safe (e.g. for `aexecute()` in executor threads), so
+# every query text must be parsed by `_compile_query` instead of passing it to `Graph.query`:
+_parse_lock = threading.Lock()
+
+# positional parameters of `rdflib.Graph.query` after the query:
+_GRAPH_QUERY_PARAMETERS = ("processor", "result", "initNs", "initBindings", "use_store_provided")
+
+
+def _compile_query(query: str, namespaces: Mapping[str, Any], base: Optional[str]) -> PreparedQuery:
+    # same as rdflib's prepareQuery, but timing the two stages:
+    with _parse_lock:
+        t0 = time.perf_counter()
+        parsed = parseQuery(query)
+        t1 = time.perf_counter()
+    prepared = translateQuery(parsed, base, dict(namespaces))
+    prepared._original_args = (query, dict(namespaces), base)
+    _compile_timings.value = (t1 - t0, time.perf_counter() - t1)
+    return prepared
+
+
+@functools.lru_cache(maxsize=PREPARED_QUERY_CACHE_SIZE)
+def _prepare_query(query: str, namespaces: Tuple[Tuple[str, str], ...], base: Optional[str]) -> PreparedQuery:
+    return _compile_query(query, dict(namespaces), base)
+
+
+def prepare_query(query: str, namespaces: Mapping[str, Any] = None, base: str = None) -> PreparedQuery:
+    """Returns the query parsed and translated to SPARQL algebra.
+
+    Compiled queries are kept in a process-wide LRU cache, so each query is
+    parsed only once per set of namespaces.
+
+    Parameters
+    ----------
+    query : str
+        The SPARQL query.
+    namespaces : Mapping[str, Any], optional
+        Prefixes which may be used in the query without declaring them.
+    base : str, optional
+        Base IRI to resolve relative IRIs.
+    """
+    namespaces = tuple(sorted((str(k), str(v)) for k, v in (namespaces or {}).items()))
+    return _prepare_query(query, namespaces, base)
+
+
+def prepared_query_cache_info():
+    """Returns hits, misses and size of the cache of compiled queries."""
+    return _prepare_query.cache_info()
+
+
+def _to_init_bindings(bindings: Mapping[str, Any]) -> Dict[rdflib.Variable, rdflib.term.Identifier]:
+    """Converts {name: value} to rdflib initBindings. Values which are not RDF terms become literals."""
+    return {
+        rdflib.Variable(str(k).lstrip("?$")): v if isinstance(v, rdflib.term.Identifier) else rdflib.Literal(v)
+        for k, v in bindings.items()
+    }
+
+
+def _values_clause(bindings: Mapping[str, Any]) -> str:
+    """Returns a trailing VALUES clause, which binds the variables of a query text like
+    `initBindings` (see `_to_init_bindings`)."""
+    init_bindings = _to_init_bindings(bindings)
+    if any(isinstance(v, rdflib.BNode) for v in init_bindings.values()):
+        raise ValueError("Blank nodes cannot be bound in the query text.")
+    variables = " ".join(var.n3() for var in init_bindings)
+    values = " ".join(value.n3() for value in init_bindings.values())
+    return f"VALUES ({variables}) {{ ({values}) }}"
 
 
 class MetadataStoreQuery(Query, ABC):
@@ -26,9 +156,40 @@ class MetadataStoreQuery(Query, ABC):
 
 
 class SparqlQuery(MetadataStoreQuery):
-    """A SPARQL query interface for RDF stores."""
+    """A SPARQL query interface for RDF stores.
+
+    Local queries are compiled once (see `prepare_query`) and executed with
+    bindings, so the same query text is not parsed again, e.g.:
+
+        query = SparqlQuery("SELECT ?ds WHERE { ?ds dcterms:created ?date }")
+        query.execute(store, bindings={"date": "2024-01-01"})
 
-    def execute(self, store: RDFStore, *args, **kwargs) -> QueryResult:
+    Parameters
+    ----------
+    query : str
+        The SPARQL query.
+    description : str, optional
+        A description of the query.
+    cache : QueryResultCache, optional
+        Cache of query results, which may be shared between queries. Results are only
+        cached for stores with a `version` (e.g. `InMemoryRDFStore`). Default is None.
+    prepared : bool, optional
+        If False, local queries are compiled on every execution instead of being kept in
+        the cache of compiled queries, e.g. for generated queries which are executed only
+        once. Default is True.
+    """
+
+    def __init__(self, query: str, description: str = None, cache: Optional[QueryResultCache] = None,
+                 prepared: bool = True):
+        super().__init__(query, description)
+        self.cache = cache
+        self.prepared = prepared
+
+    def prepare(self, namespaces: Mapping[str, Any] = None, base: str = None) -> PreparedQuery:
+        """Returns the compiled query (see `prepare_query`)."""
+        return prepare_query(self.query, namespaces, base)
+
+    def execute(self, store: RDFStore, *args, bindings: Mapping[str, Any] = None, **kwargs) -> QueryResult:
         """Execute the SPARQL query against the given RDF store.
 
         Parameters
@@ -37,6 +198,10 @@ class SparqlQuery(MetadataStoreQuery):
             The RDF store to execute the query against.
         *args
             Additional positional arguments to pass to the store's query method.
+        bindings : Mapping[str, Any], optional
+            Values of query variables, e.g. {"date": "2024-01-01"}. Values which are not
+            RDF terms are converted to literals. Use `rdflib.URIRef` for IRIs. For remote
+            stores, the values are appended to the query as a VALUES clause.
         **kwargs
             Additional keyword arguments to pass to the store's query method.
 
@@ -46,43 +211,209 @@ class SparqlQuery(MetadataStoreQuery):
             The result of the query execution.
         """
         if isinstance(store, RemoteSparqlStore):
-            return RemoteSparqlQuery(self.query, self.description).execute(store)
-        res = store.graph.query(self.query, *args, **kwargs)
+            return self._remote_query(bindings).execute(store)
+        return self._instrumented(store, self._execute_cached, store, *args, bindings=bindings, **kwargs)
+
+    def _execute_cached(self, store: RDFStore, *args, bindings: Mapping[str, Any] = None, **kwargs) -> QueryResult:
+        cache_key = None
+        if self.cache is not None:
+            cache_key = make_cache_key(self.query, store, *args, bindings=bindings, **kwargs)
+            if cache_key is not None:
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    return QueryResult(
+                        query=self,
+                        data=cached.data.copy(),
+                        description=self.description,
+                        derived_graph=cached.derived_graph,
+                        timings=QueryTimings(rows=len(cached.data), cached=True)
+                    )
+        result = self._execute(store, *args, bindings=bindings, **kwargs)
+        if cache_key is not None:
+            # the caller may modify the returned data, so a copy is cached:
+            self.cache.put(cache_key, QueryResult(query=self, data=result.data.copy(),
+                                                  derived_graph=result.derived_graph))
+        return result
+
+    async def aexecute(self, store: RDFStore, *args, bindings: Mapping[str, Any] = None, **kwargs) -> QueryResult:
+        """Async counterpart of `execute()`.
+
+        Queries of remote stores are sent with the async HTTP client of the store.
+        Local queries are evaluated by rdflib in the default executor of the loop.
+        """
+        if isinstance(store, RemoteSparqlStore):
+            return await self._remote_query(bindings).aexecute(store)
+        return await super().aexecute(store, *args, bindings=bindings, **kwargs)
+
+    def _remote_query(self, bindings: Optional[Mapping[str, Any]]) -> "RemoteSparqlQuery":
+        """Returns the query for remote stores, which cannot take bindings separately."""
+        query = self.query
+        if bindings:
+            query = f"{query.rstrip()}\n{_values_clause(bindings)}"
+        return RemoteSparqlQuery(query, self.description)
+
+    def _execute(self, store: RDFStore, *args, bindings: Mapping[str, Any] = None, **kwargs) -> QueryResult:
+        timings = QueryTimings()
+        graph = store.graph
+        kwargs.update(zip(_GRAPH_QUERY_PARAMETERS, args))
+        if bindings:
+            kwargs["initBindings"] = {**(kwargs.get("initBindings") or {}), **_to_init_bindings(bindings)}
+        if kwargs.get("processor", "sparql") != "sparql":
+            # other query processors parse the query themselves:
+            t0 = time.perf_counter()
+            res = graph.query(self.query, **kwargs)
+        else:
+            _compile_timings.value = (0.0, 0.0)
+            namespaces = kwargs.pop("initNs", None) or dict(graph.namespaces())
+            base = kwargs.pop("base", None)
+            if self.prepared:
+                prepared = self.prepare(namespaces, base)
+            else:
+                prepared = _compile_query(self.query, namespaces, base)
+            timings.parse, timings.plan = _compile_timings.value
+            t0 = time.perf_counter()
+            res = graph.query(prepared, **kwargs)
         bindings = res.bindings
+        t1 = time.perf_counter()
+        timings.execute = t1 - t0
         try:
             derived_graph = res.graph
         except AttributeError:
             derived_graph = None
         if bindings is None:
-            return QueryResult(
-                query=self,
-                data=pd.DataFrame(),
-                description=self.description,
-                derived_graph=derived_graph
-            )
+            data = pd.DataFrame()
+        else:
+            data = sparql_result_to_df(bindings)
+        timings.decode = time.perf_counter() - t1
+        timings.rows = len(data)
         return QueryResult(
             query=self,
-            data=sparql_result_to_df(bindings),
+            data=data,
             description=self.description,
-            derived_graph=derived_graph
+            derived_graph=derived_graph,
+            timings=timings
         )
 
 
+# solution modifiers after the closing brace of the WHERE clause:
+_LIMIT_OFFSET = re.compile(r"\b(LIMIT|OFFSET)\s+\d+", re.IGNORECASE)
+
+
 class RemoteSparqlQuery(MetadataStoreQuery):
 
+    def paged_query(self, limit: int, offset: int) -> str:
+        """Returns the query restricted to the rows `offset` to `offset + limit`."""
+        if _LIMIT_OFFSET.search(self.query[self.query.rfind("}") + 1:]):
+            raise ValueError("Cannot page a query which has a LIMIT or OFFSET already.")
+        return f"{self.query.rstrip()}\nLIMIT {limit}\nOFFSET {offset}"
+
+    def iter_chunks(self, store: RemoteSparqlStore, page_size: int = 10_000,
+                    max_pages: int = None, nullable: bool = False) -> Iterator[pd.DataFrame]:
+        """Executes a SELECT query page by page and yields every page as a DataFrame.
+
+        Every page is requested with LIMIT/OFFSET, so only one page is held in
+        memory at a time. Requesting stops after the first page with less than
+        `page_size` rows. The query should have an ORDER BY clause, otherwise the
+        endpoint does not guarantee that the pages are disjoint.
+
+        Parameters
+        ----------
+        store : RemoteSparqlStore
+            The store to execute the query against. Results must be returned as JSON, TSV or CSV.
+        page_size : int, optional
+            Number of rows per page. Default is 10,000.
+        max_pages : int, optional
+            Maximum number of pages to request. Default is None (all).
+        nullable : bool, optional
+            Passed to `sparql_results_to_dataframe`. Default is False.
+
+        Yields
+        ------
+        pd.DataFrame
+            The rows of one page. The first page is yielded even if it is empty.
+        """
+        if page_size < 1:
+            raise ValueError(f"page_size must be at least 1, got {page_size}.")
+        sparql = store.wrapper
+        debug = logger.isEnabledFor(logging.DEBUG)
+        page = 0
+        while max_pages is None or page < max_pages:
+            sparql.setQuery(self.paged_query(page_size, page * page_size))
+            data = sparql_results_to_dataframe(sparql.queryAndConvert(), store.return_format, nullable=nullable)
+            if page > 0 and len(data) == 0:
+                return
+            if debug:
+                logger.debug("Received page %d with %d rows", page, len(data))
+            yield data
+            if len(data) < page_size:
+                return
+            page += 1
+
+    async def aexecute(self, store: RemoteSparqlStore, *args, **kwargs) -> QueryResult:
+        """Async counterpart of `execute()` using the async HTTP client of the store
+        (see `RemoteSparqlStore.aquery()`).
+
+        Result formats other than JSON, TSV and CSV (e.g. of DESCRIBE queries) are
+        requested with `execute()` in the default executor of the loop.
+        """
+        if store.return_format not in _RESULT_CONTENT_TYPES:
+            return await super().aexecute(store, *args, **kwargs)
+        if not instrumentation.hooks_enabled():
+            return await self._aexecute(store)
+        with instrumentation.measure("query", type(self).__name__, store=type(store).__name__,
+                                     description=self.description) as event:
+            result = await self._aexecute(store)
+            event.timings = result.timings
+        return result
+
+    async def _aexecute(self, store: RemoteSparqlStore) -> QueryResult:
+        t0 = time.perf_counter()
+        results = await store.aquery(self.query)
+        t1 = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        try:
+            data = await loop.run_in_executor(None, sparql_results_to_dataframe, results, store.return_format)
+        except Exception as e:
+            logger.debug("Failed to convert SPARQL results to DataFrame: %s", e)
+            data = results
+        return QueryResult(
+            query=self,
+            data=data,
+            description=self.description,
+            timings=_remote_timings(results, data, t0, t1)
+        )
+
     def execute(self, store: RemoteSparqlStore, *args, **kwargs) -> QueryResult:
+        return self._instrumented(store, self._execute, store)
+
+    def _execute(self, store: RemoteSparqlStore) -> QueryResult:
         sparql = store.wrapper
         sparql.setQuery(self.query)
 
+        t0 = time.perf_counter()
         results = sparql.queryAndConvert()
+        t1 = time.perf_counter()
 
         try:
-            data = sparql_json_to_dataframe(results)
+            data = sparql_results_to_dataframe(results, store.return_format)
         except Exception as e:
             logger.debug("Failed to convert SPARQL results to DataFrame: %s", e)
             data = results
         return QueryResult(
             query=self,
             data=data,
-            description=self.description
+            description=self.description,
+            timings=_remote_timings(results, data, t0, t1)
         )
+
+
+def _remote_timings(results, data, t0: float, t1: float) -> QueryTimings:
+    """Returns the timings of a remote query, which was sent at `t0`, answered at `t1`
+    and converted into `data` until now."""
+    return QueryTimings(
+        transfer=t1 - t0,
+        decode=time.perf_counter() - t1,
+        rows=len(data) if isinstance(data, pd.DataFrame) else None,
+        # TSV and CSV results are returned as they were received:
+        bytes=len(results) if isinstance(results, bytes) else None
+    )
@@ -1,10 +1,16 @@
+import asyncio
+import functools
+import threading
 from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Any, Dict
+from typing import Any, Callable, Dict, Hashable, List
 from typing import Optional
 
 from rdflib import Graph
 
+from .. import instrumentation
+from ..instrumentation import QueryTimings
 from ..stores import Store
 
 
@@ -14,15 +20,35 @@ class AbstractQuery(ABC):
     def execute(self, store: Store) -> "QueryResult":
         """Executes the query."""
 
+    async def aexecute(self, store: Store, *args, **kwargs) -> "QueryResult":
+        """Executes the query without blocking the event loop.
+
+        By default, `execute()` runs in the default executor of the loop.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(self.execute, store, *args, **kwargs))
+
+    def _instrumented(self, store: Store, func: Callable[..., "QueryResult"], *args, **kwargs) -> "QueryResult":
+        """Calls `func` and reports the execution with the timings of the returned result
+        to the instrumentation hooks (see `gldb.instrumentation`)."""
+        if not instrumentation.hooks_enabled():
+            return func(*args, **kwargs)
+        with instrumentation.measure("query", type(self).__name__, store=type(store).__name__,
+                                     description=getattr(self, "description", None)) as event:
+            result = func(*args, **kwargs)
+            event.timings = result.timings
+        return result
+
 
 class QueryResult:
 
     def __init__(self, query: AbstractQuery, data: Any, description: Optional[str] = None,
-                 derived_graph: Optional[Graph] = None):
+                 derived_graph: Optional[Graph] = None, timings: Optional[QueryTimings] = None):
         self.query = query
         self.data = data
         self.description = description
         self.derived_graph = derived_graph
+        self.timings = timings
 
     def __len__(self):
         return len(self.data)
@@ -37,6 +63,105 @@ class FederatedQueryResult:
     metadata: Dict
 
 
+class LazyPayloads:
+    """Loads the data of lazy federated query results on demand.
+
+    Every payload is loaded at most once. Accessing payload i schedules the
+    payloads i+1 to i+`prefetch` to be loaded in the background. Payloads are
+    looked up in and added to `cache` (if given), which may be shared between
+    federated queries.
+
+    Parameters
+    ----------
+    loaders : List[Callable[[], Any]]
+        Function loading each payload.
+    keys : List[Hashable], optional
+        Cache keys of the payloads. Payloads with key None are not cached.
+    cache : QueryResultCache, optional
+        LRU cache of loaded payloads. Default is None.
+    prefetch : int, optional
+        Number of following payloads to load in the background. Default is 0.
+    max_workers : int, optional
+        Number of threads for prefetching. Default is 4.
+    """
+
+    def __init__(self, loaders: List[Callable[[], Any]], keys: List[Optional[Hashable]] = None,
+                 cache=None, prefetch: int = 0, max_workers: int = 4):
+        self._loaders = loaders
+        self._keys = keys if keys is not None else [None] * len(loaders)
+        self._cache = cache
+        self._prefetch = prefetch
+        self._futures: List[Optional[Future]] = [None] * len(loaders)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers) if prefetch > 0 else None
+
+    def __len__(self):
+        return len(self._loaders)
+
+    def _load(self, i: int) -> Any:
+        key = self._keys[i]
+        if self._cache is not None and key is not None:
+            cached = self._cache.get(key)
+            if cached is not None:
+                return cached
+        data = self._loaders[i]()
+        if self._cache is not None and key is not None:
+            self._cache.put(key, data)
+        return data
+
+    def _future(self, i: int, background: bool) -> Future:
+        """Returns the future of payload i. Loads it in this thread unless `background`."""
+        with self._lock:
+            future = self._futures[i]
+            if future is not None:
+                return future
+            if background:
+                future = self._futures[i] = self._executor.submit(self._load, i)
+                return future
+            future = self._futures[i] = Future()
+        try:
+            future.set_result(self._load(i))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def loaded(self, i: int) -> bool:
+        """Whether payload i has been loaded."""
+        future = self._futures[i]
+        return future is not None and future.done()
+
+    def get(self, i: int) -> Any:
+        """Returns payload i, loading it (and prefetching the following ones) if needed."""
+        for j in range(i + 1, min(i + 1 + self._prefetch, len(self))):
+            self._future(j, background=True)
+        return self._future(i, background=False).result()
+
+
+class LazyFederatedQueryResult:
+    """Federated query result whose data is loaded on first access of `data`.
+
+    Has the same attributes as `FederatedQueryResult`, so results can be filtered
+    by their metadata without loading any data.
+    """
+
+    def __init__(self, metadata: Dict, payloads: LazyPayloads, index: int):
+        self.metadata = metadata
+        self._payloads = payloads
+        self._index = index
+
+    @property
+    def data(self) -> Any:
+        return self._payloads.get(self._index)
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the data has been loaded."""
+        return self._payloads.loaded(self._index)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(loaded={self.loaded}, metadata={self.metadata})"
+
+
 class Query(AbstractQuery, ABC):
 
     def __init__(self, query, description=None):
@@ -1,6 +1,10 @@
+import io
 import json
+import re
 from datetime import datetime, date, time
 from decimal import Decimal
+from operator import itemgetter
+from typing import Dict, List, Optional, Tuple, Union
 
 import pandas as pd
 from rdflib import Graph
@@ -15,6 +19,14 @@ _NUM_DT = {
 _FLOAT_DT = {_XSD + "float", _XSD + "double"}
 _DEC_DT = {_XSD + "decimal"}
 
+# pandas dtypes of literal columns with a common datatype:
+_DTYPES = {
+    **{dt: "Int64" for dt in _NUM_DT},
+    **{dt: "float64" for dt in _FLOAT_DT},
+    _XSD + "boolean": "boolean",
+    _XSD + "dateTime": "datetime64",
+}
+
 
 def sparql_query_to_jsonld(graph: Graph, query: str) -> dict:
     results = graph.query(query)
@@ -96,17 +108,273 @@ def _cast_cell(cell, cast_literals: bool):
     return v
 
 
-def sparql_json_to_dataframe(results_json: dict, cast_literals: bool = True) -> pd.DataFrame:
+def _parse_datetime(v: str) -> datetime:
+    return datetime.fromisoformat(v.replace("Z", "+00:00"))
+
+
+def _parse_boolean(v: str) -> bool:
+    return v.lower() == "true"
+
+
+# casters applied to all values of a datatype at once (same results as `_cast_cell`):
+_CASTERS = {
+    **{dt: int for dt in _NUM_DT},
+    **{dt: float for dt in _FLOAT_DT},
+    **{dt: Decimal for dt in _DEC_DT},
+    _XSD + "boolean": _parse_boolean,
+    _XSD + "dateTime": _parse_datetime,
+    _XSD + "date": date.fromisoformat,
+    _XSD + "time": time.fromisoformat,
+}
+
+
+def _typed_column(values: List, dtype: str) -> Optional[pd.Series]:
+    """Returns the Python values (None for missing) as a column of a nullable pandas dtype
+    (see `_DTYPES`) or None if they cannot be represented by it."""
+    try:
+        if dtype == "datetime64":
+            return pd.Series(pd.to_datetime(values))
+        return pd.Series(pd.array(values, dtype=dtype))
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+_GET_VALUE = itemgetter("value")
+
+
+def _values(cells: List[Dict]) -> List:
+    try:
+        return list(map(_GET_VALUE, cells))
+    except KeyError:
+        return [c.get("value") for c in cells]
+
+
+def _cast_group(cells: List[Dict], caster) -> List:
+    """Casts the values of literals of the same datatype, falling back to `_cast_cell`
+    if any of them is ill-typed."""
+    try:
+        return list(map(caster, _values(cells)))
+    except Exception:
+        return [_cast_cell(c, True) for c in cells]
+
+
+def _decode_column(cells: List[Optional[Dict]], nullable: bool = False) -> Union[List, pd.Series]:
+    """Casts the binding objects of one variable (None if unbound).
+
+    Cells are grouped by datatype and every group is cast at once, which gives
+    the same values as calling `_cast_cell` on every cell.
+    """
+    present = cells if None not in cells else [c for c in cells if c is not None]
+    datatypes = {c.get("datatype") for c in present}
+    groups: Dict[str, List] = {}
+    if datatypes.isdisjoint(_CASTERS):
+        # IRIs, blank nodes and literals that are not cast
+        present_values = _values(present)
+    elif len(datatypes) == 1 and {c.get("type") for c in present} == {"literal"}:
+        # common case: all literals of a variable have the same datatype
+        dt = datatypes.pop()
+        present_values = groups[dt] = _cast_group(present, _CASTERS[dt])
+    else:
+        present_values = _values(present)
+        indices: Dict[str, List[int]] = {}
+        for i, c in enumerate(present):
+            dt = c.get("datatype")
+            if dt in _CASTERS and c.get("type") == "literal":
+                indices.setdefault(dt, []).append(i)
+        for dt, group in indices.items():
+            groups[dt] = _cast_group([present[i] for i in group], _CASTERS[dt])
+            for i, v in zip(group, groups[dt]):
+                present_values[i] = v
+
+    if len(present) == len(cells):
+        values = present_values
+    else:
+        it = iter(present_values)
+        values = [None if c is None else next(it) for c in cells]
+
+    if nullable and groups:
+        dtypes = {_DTYPES.get(dt) for dt in groups}
+        # only if all bound values have such a datatype and could be cast:
+        if len(dtypes) == 1 and None not in dtypes and sum(map(len, groups.values())) == len(present) and not any(
+                isinstance(v, str) for group in groups.values() for v in group):
+            typed = _typed_column(values, dtypes.pop())
+            if typed is not None:
+                return typed
+    return values
+
+
+def sparql_json_to_dataframe(results_json: dict, cast_literals: bool = True,
+                             nullable: bool = False) -> pd.DataFrame:
     """
     Turn a SPARQL SELECT JSON result into a pandas DataFrame.
     Columns are exactly results['head']['vars'] and missing bindings become None.
+
+    Literals are cast column by column (grouped by datatype) with the same
+    results as `_cast_cell`. With `nullable=True`, columns of a single integer,
+    float, boolean or dateTime datatype become Int64, float64, boolean and
+    datetime64 columns, in which missing bindings are <NA>/NaN/NaT.
     """
     vars_ = results_json.get("head", {}).get("vars", [])
-    rows = []
-    for b in results_json.get("results", {}).get("bindings", []):
-        row = {var: _cast_cell(b.get(var), cast_literals) for var in vars_}
-        rows.append(row)
-    return pd.DataFrame(rows, columns=vars_)
+    bindings = results_json.get("results", {}).get("bindings", [])
+    if not bindings:
+        return pd.DataFrame([], columns=vars_)
+    columns = {}
+    for var in vars_:
+        cells = [b.get(var) for b in bindings]
+        if cast_literals:
+            columns[var] = _decode_column(cells, nullable)
+        else:
+            columns[var] = [None if c is None else c.get("value") for c in cells]
+    return pd.DataFrame(columns, columns=vars_, index=pd.RangeIndex(len(bindings)))
+
+
+# escape sequences of string literals in SPARQL TSV results:
+_TSV_ESCAPE = re.compile(r"\\(u[0-9A-Fa-f]{4}|U[0-9A-Fa-f]{8}|.)")
+_TSV_ESCAPES = {"t": "\t", "n": "\n", "r": "\r", "b": "\b", "f": "\f", '"': '"', "'": "'", "\\": "\\"}
+
+
+def _unescape(match) -> str:
+    seq = match.group(1)
+    if seq[0] in "uU" and len(seq) > 1:
+        return chr(int(seq[1:], 16))
+    return _TSV_ESCAPES.get(seq, seq)
+
+
+def _tsv_cell(term: str) -> Optional[Dict]:
+    """Returns the SPARQL JSON binding object of an RDF term of a TSV result."""
+    if not term:
+        return None
+    first = term[0]
+    if first == "<":
+        return {"type": "uri", "value": term[1:-1]}
+    if first == '"':
+        end = term.rfind('"')
+        value = term[1:end]
+        if "\\" in value:
+            value = _TSV_ESCAPE.sub(_unescape, value)
+        cell = {"type": "literal", "value": value}
+        suffix = term[end + 1:]
+        if suffix.startswith("^^<"):
+            cell["datatype"] = suffix[3:-1]
+        elif suffix.startswith("@"):
+            cell["xml:lang"] = suffix[1:]
+        return cell
+    if term.startswith("_:"):
+        return {"type": "bnode", "value": term[2:]}
+    # numbers and booleans may be written in their short Turtle form:
+    if term in ("true", "false"):
+        return {"type": "literal", "value": term, "datatype": _XSD + "boolean"}
+    if "e" in term or "E" in term:
+        return {"type": "literal", "value": term, "datatype": _XSD + "double"}
+    if "." in term:
+        return {"type": "literal", "value": term, "datatype": _XSD + "decimal"}
+    return {"type": "literal", "value": term, "datatype": _XSD + "integer"}
+
+
+def _tsv_typed_column(terms: List[str], nullable: bool) -> Optional[Union[List, pd.Series]]:
+    """Casts a TSV column of literals which all have the same datatype and are all bound,
+    without creating binding objects. Returns None for any other column."""
+    first = terms[0]
+    if first[:1] == '"':
+        end = first.rfind('"')
+        suffix = first[end:]
+        if not suffix.startswith('"^^<'):
+            return None
+        dt = suffix[4:-1]
+        if dt not in _CASTERS or not all(t[:1] == '"' and t.endswith(suffix) for t in terms):
+            return None
+        lexical = [t[1:-len(suffix)] for t in terms]
+    elif first[:1].isdigit() or first[:1] in "+-":
+        # integers in their short Turtle form
+        dt = _XSD + "integer"
+        lexical = terms
+    else:
+        return None
+    try:
+        values = list(map(_CASTERS[dt], lexical))
+    except Exception:
+        return None
+    if nullable:
+        typed = _typed_column(values, _DTYPES[dt]) if dt in _DTYPES else None
+        if typed is not None:
+            return typed
+    return values
+
+
+def _split_lines(results: Union[str, bytes]) -> Tuple[str, List[str]]:
+    if isinstance(results, bytes):
+        results = results.decode("utf-8")
+    # str.splitlines() would also split literals at characters like U+0085 or U+2028:
+    lines = results.split("\n")
+    if lines[-1] == "":
+        lines.pop()
+    if not lines:
+        return "", []
+    if "\r" in results:
+        lines = [line[:-1] if line.endswith("\r") else line for line in lines]
+    # an empty line is a row in which a single variable is unbound
+    return lines[0], lines[1:]
+
+
+def sparql_tsv_to_dataframe(results: Union[str, bytes], cast_literals: bool = True,
+                            nullable: bool = False) -> pd.DataFrame:
+    """
+    Turn a SPARQL SELECT TSV result (text/tab-separated-values) into a pandas DataFrame.
+
+    The result has the same values and dtypes as the one of `sparql_json_to_dataframe`
+    for the same query. TSV is more compact than JSON and faster to decode.
+    """
+    header, lines = _split_lines(results)
+    vars_ = [var.lstrip("?$") for var in header.split("\t")] if header else []
+    if not lines:
+        return pd.DataFrame([], columns=vars_)
+    rows = [line.split("\t") for line in lines]
+    columns = {}
+    for j, var in enumerate(vars_):
+        terms = [row[j] for row in rows]
+        if all(t[:1] == "<" for t in terms):
+            # IRIs only, which is common enough to be worth a shortcut
+            columns[var] = [t[1:-1] for t in terms]
+            continue
+        if cast_literals:
+            typed = _tsv_typed_column(terms, nullable)
+            if typed is not None:
+                columns[var] = typed
+                continue
+        cells = list(map(_tsv_cell, terms))
+        if cast_literals:
+            columns[var] = _decode_column(cells, nullable)
+        else:
+            columns[var] = [None if c is None else c.get("value") for c in cells]
+    return pd.DataFrame(columns, columns=vars_, index=pd.RangeIndex(len(rows)))
+
+
+def sparql_csv_to_dataframe(results: Union[str, bytes]) -> pd.DataFrame:
+    """
+    Turn a SPARQL SELECT CSV result (text/csv) into a pandas DataFrame.
+
+    CSV results carry no datatypes, so all values are returned as strings.
+    Missing bindings become None.
+    """
+    if isinstance(results, str):
+        results = results.encode("utf-8")
+    if not results.strip():
+        return pd.DataFrame()
+    # an empty line is a row in which a single variable is unbound:
+    df = pd.read_csv(io.BytesIO(results), dtype=str, keep_default_na=False, na_values=[""],
+                     skip_blank_lines=False)
+    return df.astype(object).where(df.notna(), None)
+
+
+def sparql_results_to_dataframe(results, result_format: str = "json", nullable: bool = False) -> pd.DataFrame:
+    """Turn a SPARQL SELECT result of the given format ("json", "tsv" or "csv") into a pandas DataFrame."""
+    if result_format == "json":
+        return sparql_json_to_dataframe(results, nullable=nullable)
+    if result_format == "tsv":
+        return sparql_tsv_to_dataframe(results, nullable=nullable)
+    if result_format == "csv":
+        return sparql_csv_to_dataframe(results)
+    raise ValueError(f"Unsupported result format: {result_format}. Expected 'json', 'tsv' or 'csv'.")
 
 
 if __name__ == "__main__":
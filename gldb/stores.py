@@ -1,12 +1,25 @@
+import asyncio
+import contextlib
+import functools
+import gzip
+import itertools
+import logging
 import pathlib
 import shutil
+import time
+import zlib
 from abc import ABC, abstractmethod
-from typing import Dict, Union, Any
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Union, Any, Optional, Tuple
 
 import rdflib
 import requests
+import requests.adapters
 
-from gldb import logger
+from gldb import instrumentation, logger, metrics
+from .ingest import (COMPRESSIONS, FileState, GraphCache, LINE_BASED_FORMATS, iter_stable_triple_batches,
+                     iter_triple_batches, load_cached_graph, load_graphs, open_rdf, split_compression)
 
 
 class Store(ABC):
@@ -89,9 +102,40 @@ class RDFStore(MetadataStore, ABC):
     #     return SparqlQuery(self.graph)
 
 
-class RemoteSparqlStore(MetadataStore):
+# Accept headers of the result formats supported by `RemoteSparqlStore.aquery()`:
+_RESULT_CONTENT_TYPES = {
+    "json": "application/sparql-results+json",
+    "tsv": "text/tab-separated-values",
+    "csv": "text/csv",
+}
+
+
+def _make_httpx_client(pool_maxsize: int, **kwargs):
+    try:
+        import httpx
+    except ImportError:
+        raise ImportError("Please install httpx to use the async API: 'pip install gldb[async]'")
+    return httpx.AsyncClient(limits=httpx.Limits(max_connections=pool_maxsize), timeout=None, **kwargs)
+
 
-    def __init__(self, endpoint_url, return_format: str = None):
+class RemoteSparqlStore(MetadataStore):
+    """Store of a remote SPARQL endpoint.
+
+    Parameters
+    ----------
+    endpoint_url : str
+        URL of the SPARQL endpoint.
+    return_format : str, optional
+        Result format requested from the endpoint, e.g. "json" (default of
+        SPARQLWrapper), "tsv" or "csv". SELECT results in TSV are smaller and
+        faster to decode than in JSON and are converted to the same DataFrames.
+        CSV results have no datatypes, so all values are strings.
+    pool_maxsize : int, optional
+        Maximum number of pooled connections of the async API (see `aquery()`).
+        Default is 10.
+    """
+
+    def __init__(self, endpoint_url, return_format: str = None, pool_maxsize: int = 10):
         try:
             from SPARQLWrapper import SPARQLWrapper
         except ImportError:
@@ -100,11 +144,57 @@ class RemoteSparqlStore(MetadataStore):
         self._wrapper = SPARQLWrapper(endpoint_url)
         if return_format is not None:
             self._wrapper.setReturnFormat(return_format)
+        self._return_format = self._wrapper.returnFormat
+        self._endpoint_url = endpoint_url
+        self._pool_maxsize = pool_maxsize
+        self._async_client = None
 
     @property
     def wrapper(self):
         return self._wrapper
 
+    @property
+    def return_format(self) -> str:
+        """The result format requested from the endpoint."""
+        return self._return_format
+
+    @property
+    def async_client(self):
+        """The `httpx.AsyncClient` of the async API, which is created on first use."""
+        if self._async_client is None:
+            self._async_client = self._make_async_client()
+        return self._async_client
+
+    def _make_async_client(self):
+        return _make_httpx_client(self._pool_maxsize)
+
+    async def aclose(self):
+        """Closes the pooled connections of the async API."""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+
+    async def _arequest(self, method: str, url: str, **kwargs):
+        return await self.async_client.request(method, url, **kwargs)
+
+    async def aquery(self, query: str) -> Union[Dict, bytes]:
+        """Sends a query to the endpoint without blocking the event loop.
+
+        Returns the parsed JSON result if `return_format` is "json" and the raw
+        result otherwise ("tsv", "csv").
+        """
+        content_type = _RESULT_CONTENT_TYPES.get(self.return_format)
+        if content_type is None:
+            raise ValueError(f"The async API supports the result formats {sorted(_RESULT_CONTENT_TYPES)}, "
+                             f"not '{self.return_format}'.")
+        response = await self._arequest("POST", self._endpoint_url, data={"query": query},
+                                        headers={"Accept": content_type})
+        if response.status_code != 200:
+            raise RuntimeError(f"Query failed: {response.status_code} {response.text}")
+        if self.return_format == "json":
+            return response.json()
+        return response.content
+
     # @property
     # def query(self) -> RemoteSparqlQuery:
     #     """Return graph for the DbPedia metadata store."""
@@ -121,6 +211,19 @@ class RemoteSparqlStore(MetadataStore):
         raise NotImplementedError("Remote SPARQL Store does not support file uploads.")
 
 
+@dataclass(frozen=True)
+class StoreResult:
+    """Outcome of a query executed against one store by `StoreManager.execute_all()`."""
+    store_name: str
+    result: Any = None  # the QueryResult, None if the execution failed
+    error: Optional[BaseException] = None
+    seconds: float = 0.0
+
+    @property
+    def success(self) -> bool:
+        return self.error is None
+
+
 class StoreManager:
     """Store manager that manages the interaction between stores."""
 
@@ -163,19 +266,184 @@ class StoreManager:
             raise ValueError(f"DataStore with name {store_name} already exists.")
         self.stores[store_name] = store
 
+    def _select_stores(self, stores: Optional[Iterable[str]]) -> List[str]:
+        names = list(self.stores if stores is None else stores)
+        unknown = [name for name in names if name not in self.stores]
+        if unknown:
+            raise ValueError(f"Unknown stores: {unknown}. Available stores: {list(self.stores)}.")
+        return names
+
+    def execute_all(
+            self,
+            query,
+            stores: Iterable[str] = None,
+            max_workers: int = None,
+            timeout: float = None,
+            **kwargs
+    ) -> Dict[str, StoreResult]:
+        """Executes a query against several stores concurrently.
+
+        The query is executed in a thread per store, so the total latency is the one
+        of the slowest store instead of the sum. Failures are reported per store
+        and do not affect the other stores.
+
+        Parameters
+        ----------
+        query : Query
+            The query to execute, e.g. a `SparqlQuery`.
+        stores : Iterable[str], optional
+            Names of the stores to query, e.g. `manager.metadata_stores`. Default is all stores.
+        max_workers : int, optional
+            Number of threads. Default is one per store.
+        timeout : float, optional
+            Seconds to wait for all stores. Stores which did not answer in time are
+            reported with a `TimeoutError` (their threads are not interrupted).
+            Default is None (wait for all).
+        **kwargs
+            Additional keyword arguments passed to `query.execute()`.
+
+        Returns
+        -------
+        Dict[str, StoreResult]
+            The result, error and execution time per store name, in the order of `stores`.
+        """
+        names = self._select_stores(stores)
+        if not names:
+            return {}
+
+        def _execute(name: str) -> StoreResult:
+            start = time.perf_counter()
+            try:
+                result = query.execute(self.stores[name], **kwargs)
+            except Exception as e:
+                logger.debug("Query failed for store '%s': %s", name, e)
+                return StoreResult(name, error=e, seconds=time.perf_counter() - start)
+            return StoreResult(name, result=result, seconds=time.perf_counter() - start)
+
+        executor = ThreadPoolExecutor(max_workers=max_workers or len(names))
+        futures = {}
+        try:
+            for name in names:
+                futures[name] = executor.submit(_execute, name)
+            wait(futures.values(), timeout=timeout)
+        finally:
+            # stores which did not start in time are not queried anymore (shutdown(cancel_futures=True)
+            # requires Python 3.9):
+            for future in futures.values():
+                future.cancel()
+            executor.shutdown(wait=False)
+        results = {}
+        for name, future in futures.items():
+            if future.done() and not future.cancelled():
+                results[name] = future.result()
+            else:
+                results[name] = StoreResult(name, error=TimeoutError(
+                    f"Store '{name}' did not answer within {timeout} s."), seconds=timeout)
+        _record_store_results(results)
+        return results
+
+    async def aexecute_all(self, query, stores: Iterable[str] = None, timeout: float = None,
+                           **kwargs) -> Dict[str, StoreResult]:
+        """Async counterpart of `execute_all()`, which awaits `query.aexecute()` for all stores."""
+        names = self._select_stores(stores)
+
+        async def _execute(name: str) -> StoreResult:
+            start = time.perf_counter()
+            try:
+                result = await asyncio.wait_for(query.aexecute(self.stores[name], **kwargs), timeout)
+            except asyncio.TimeoutError:
+                return StoreResult(name, error=TimeoutError(
+                    f"Store '{name}' did not answer within {timeout} s."), seconds=time.perf_counter() - start)
+            except Exception as e:
+                logger.debug("Query failed for store '%s': %s", name, e)
+                return StoreResult(name, error=e, seconds=time.perf_counter() - start)
+            return StoreResult(name, result=result, seconds=time.perf_counter() - start)
+
+        results = dict(zip(names, await asyncio.gather(*(_execute(name) for name in names))))
+        _record_store_results(results)
+        return results
+
+
+def _record_store_results(results: Dict[str, StoreResult]):
+    """Counts the outcomes of `StoreManager.execute_all()` per store."""
+    if not metrics.is_enabled():
+        return
+    for name, r in results.items():
+        if r.success:
+            status = "success"
+        elif isinstance(r.error, TimeoutError):
+            status = "timeout"
+        else:
+            status = "error"
+        metrics.STORE_MANAGER_QUERIES.inc(store=name, status=status)
+        if r.seconds is not None:
+            metrics.STORE_MANAGER_QUERY_SECONDS.observe(r.seconds, store=name)
+
 
 # concrete implementations of Store
 
-class InMemoryRDFStore(RDFStore):
-    """In-memory RDF database that can upload files and return a combined graph."""
+# process-wide, so that versions of different stores never coincide:
+_store_versions = itertools.count(1)
+
+# line-based files of at least this size (in bytes) are streamed even if a process pool could parse them:
+STREAMING_MIN_SIZE = 64 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class SyncResult:
+    """Files that were added, modified and removed by `InMemoryRDFStore.update()`."""
+    added: List[pathlib.Path] = field(default_factory=list)
+    modified: List[pathlib.Path] = field(default_factory=list)
+    removed: List[pathlib.Path] = field(default_factory=list)
+
+    def __bool__(self):
+        return bool(self.added or self.modified or self.removed)
+
 
-    _expected_file_extensions = {".ttl", ".rdf", ".jsonld", ".nt", ".xml", ".n3"}
+class InMemoryRDFStore(RDFStore):
+    """In-memory RDF database that can upload files and return a combined graph.
+
+    Parameters
+    ----------
+    data_dir : Union[str, pathlib.Path]
+        Directory containing the RDF files. Created if it does not exist.
+    recursive_exploration : bool, optional
+        Whether to search the data directory recursively. Default is False.
+    formats : Union[str, List[str]], optional
+        File formats (extensions) to consider. Default are all supported formats. Files
+        compressed with gzip (.gz), bzip2 (.bz2) or xz (.xz) are considered as well
+        (e.g. "data.ttl.gz") and decompressed while parsing.
+    cache_dir : Union[str, pathlib.Path], optional
+        Directory of a persistent cache of parsed files. If given, unchanged files are
+        loaded from the cache instead of being parsed again. Default is None (no cache).
+    n_workers : int, optional
+        Number of processes used to parse files in `update()`. Files are merged into
+        the combined graph in sorted order, independent of the number of workers.
+        Default is 1 (parse in the current process).
+    named_graphs : bool, optional
+        If True, every file is stored as a named graph (identified by the file URI) of an
+        `rdflib.Dataset` and `graph` returns the dataset, which queries as the union of all
+        files. Each triple is then held only once and its source file stays queryable via
+        `GRAPH`. If False (default), triples are kept per file and in a combined graph.
+    batch_size : int, optional
+        New N-Triples and N-Quads files, which are not in the graph cache, are not parsed into
+        a temporary graph but streamed into the store in batches of this many triples (and
+        written to the cache afterwards). With `n_workers` > 1, only files of at least
+        `STREAMING_MIN_SIZE` bytes are streamed, smaller ones are parsed by the process pool.
+        Graph names of N-Quads are dropped. Default is 100 000.
+    """
+
+    _expected_file_extensions = {".ttl", ".rdf", ".jsonld", ".nt", ".nq", ".xml", ".n3"}
 
     def __init__(
             self,
             data_dir: Union[str, pathlib.Path],
             recursive_exploration: bool = False,
-            formats=None
+            formats=None,
+            cache_dir: Union[str, pathlib.Path] = None,
+            n_workers: int = 1,
+            named_graphs: bool = False,
+            batch_size: int = 100_000
     ):
         if formats is None:
             formats = self._expected_file_extensions
@@ -194,9 +462,21 @@ class InMemoryRDFStore(RDFStore):
         self._data_dir = pathlib.Path(data_dir).resolve()
         self._data_dir.mkdir(parents=True, exist_ok=True)
         self._recursive_exploration = recursive_exploration
-        self._filenames = []
-        self._graphs = {}
-        self._combined_graph = rdflib.Graph()
+        self._file_states: Dict[pathlib.Path, FileState] = {}
+        self._graphs: Dict[pathlib.Path, rdflib.Graph] = {}
+        # number of files asserting each triple of the combined graph (not used with named graphs):
+        self._triple_counts: Dict[Tuple, int] = {}
+        self._named_graphs = named_graphs
+        if named_graphs:
+            self._combined_graph = rdflib.Dataset(default_union=True)
+        else:
+            self._combined_graph = rdflib.Graph()
+        self._graph_cache = GraphCache(cache_dir) if cache_dir is not None else None
+        if n_workers < 1:
+            raise ValueError(f"n_workers must be at least 1, got {n_workers}.")
+        self._n_workers = n_workers
+        self._batch_size = batch_size
+        self._version = next(_store_versions)
         self.update()
 
     @property
@@ -204,85 +484,435 @@ class InMemoryRDFStore(RDFStore):
         """Returns the data directory where files are stored."""
         return self._data_dir
 
-    def update(self):
-        for _ext in self._expected_file_extensions:
+    @property
+    def version(self) -> int:
+        """Returns a number identifying the current content of the store.
+
+        It changes whenever `update()` or `upload_file()` change the store and is unique
+        across all stores of the process. Query result caches use it to detect stale
+        results. Changes made directly to `graph` are not tracked.
+        """
+        return self._version
+
+    @property
+    def graph_cache(self) -> Optional[GraphCache]:
+        """Returns the cache of parsed files or None if caching is disabled."""
+        return self._graph_cache
+
+    def update(self) -> SyncResult:
+        """Synchronizes the store with the data directory.
+
+        New files are parsed and added, deleted files are removed and modified files
+        are parsed again. Only the difference between the old and the new triples of
+        a modified file is applied to the combined graph. Triples which are still
+        asserted by another file are kept.
+
+        Returns
+        -------
+        SyncResult
+            The added, modified and removed files.
+        """
+        scanned = set(self._scan_data_dir())
+        removed = sorted(f for f in self._file_states if not f.exists())
+        for filename in removed:
+            self._remove_file(filename)
+        modified = sorted(f for f in self._file_states if self._is_modified(f))
+        added = sorted(scanned.difference(self._file_states))
+        self._load_files(added + modified)
+        if (removed or modified) and logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Synchronized '%s': %d added, %d modified, %d removed.",
+                         self.data_dir, len(added), len(modified), len(removed))
+        return SyncResult(added=added, modified=modified, removed=removed)
+
+    def _scan_data_dir(self):
+        """Yields all files in the data directory with an expected extension."""
+        patterns = [f"*{_ext}{_compression}"
+                    for _ext in self._expected_file_extensions
+                    for _compression in ("", *COMPRESSIONS)]
+        for pattern in patterns:
             if self._recursive_exploration:
-                self._filenames.extend([f.resolve().absolute() for f in self.data_dir.rglob(f"*{_ext}")])
+                files = self.data_dir.rglob(pattern)
             else:
-                self._filenames.extend([f.resolve().absolute() for f in self.data_dir.glob(f"*{_ext}")])
-        self._filenames = list(set(self._filenames))  # remove duplicates
-        for filename in self._filenames:
-            self._add_to_graph(filename)
+                files = self.data_dir.glob(pattern)
+            for f in files:
+                yield f.resolve().absolute()
 
     @property
-    def filenames(self):
+    def filenames(self) -> List[pathlib.Path]:
         """Returns the list of filenames uploaded to the store."""
-        return self._filenames
+        return sorted(self._graphs)
+
+    def file_graph(self, filename: Union[str, pathlib.Path]) -> rdflib.Graph:
+        """Returns the graph of a single file of the store."""
+        return self._graphs[pathlib.Path(filename).resolve().absolute()]
 
     def upload_file(self, filename) -> bool:
+        """Uploads an RDF file to the store.
+
+        Files outside the data directory are copied into it first. Uploading a file
+        which is already part of the store updates its triples if it changed.
+        """
         filename = pathlib.Path(filename).resolve().absolute()
         if not filename.exists():
             raise FileNotFoundError(f"File {filename} not found.")
-        if filename.suffix not in self._expected_file_extensions:
-            raise ValueError(f"File type {filename.suffix} not supported.")
-        if filename in self._filenames:
-            self._filenames.remove(filename)
-        self._filenames.append(filename)
-        if filename.parent != self.data_dir:
-            shutil.copy(filename, self.data_dir / filename.name)
-        self._add_to_graph(filename)
+        suffix, _ = split_compression(filename)
+        if suffix not in self._expected_file_extensions:
+            raise ValueError(f"File type {suffix} not supported.")
+        if self.data_dir not in filename.parents:
+            target = self.data_dir / filename.name
+            shutil.copy(filename, target)
+            filename = target
+        if filename not in self._file_states or self._is_modified(filename):
+            self._load_files([filename])
+        metrics.FILES_UPLOADED.inc(store=type(self).__name__)
         return True
 
-    def _add_to_graph(self, filename: pathlib.Path):
-        """Adds the RDF graph from the file to the combined graph."""
-        g = self._graphs.get(filename, None)
-        if not g:
+    def _is_modified(self, filename: pathlib.Path) -> bool:
+        """Returns whether the content of a tracked file changed since it was loaded."""
+        outdated, state = self._file_states[filename].is_outdated(filename)
+        if not outdated:
+            # at most the modification time changed:
+            self._file_states[filename] = state
+        return outdated
+
+    def _load_files(self, filenames: List[pathlib.Path]):
+        """Parses the files and applies their triples to the combined graph."""
+        if filenames:
+            with self._changing():
+                self._apply_files(filenames)
+        metrics.STORE_FILES.set(len(self._file_states), data_dir=self.data_dir)
+
+    def _apply_files(self, filenames: List[pathlib.Path]):
+        states = {filename: FileState.from_path(filename) for filename in filenames}
+        streamed, parsed = [], []
+        for f in filenames:
+            if self._is_streamed(f, states[f]):
+                streamed.append(f)
+            else:
+                parsed.append(f)
+        for filename in streamed:
+            with _count_parsed_file(filename):
+                self._load_streamed_file(filename, states[filename])
+        graphs = load_graphs(parsed, self._graph_cache, self._n_workers)
+        for filename in parsed:
+            with _count_parsed_file(filename):
+                g = next(graphs)[1]
+            self._set_file_graph(filename, g)
+            self._file_states[filename] = states[filename]
+
+    @contextlib.contextmanager
+    def _changing(self):
+        """Changes the version before and after the block, which changes the store. Results
+        cached by queries running meanwhile are thus never returned afterwards."""
+        self._version = next(_store_versions)
+        try:
+            yield
+        finally:
+            self._version = next(_store_versions)
+
+    def _is_streamed(self, filename: pathlib.Path, state: FileState) -> bool:
+        """Returns whether a file is added by `_stream_file()` instead of the process pool."""
+        if split_compression(filename)[0] not in LINE_BASED_FORMATS or filename in self._graphs:
+            return False
+        return self._n_workers == 1 or state.size >= STREAMING_MIN_SIZE
+
+    def _load_streamed_file(self, filename: pathlib.Path, state: FileState):
+        """Adds a new line-based file from the graph cache or, if it is not cached, by
+        streaming it (see `_stream_file()`) and writing it to the cache."""
+        cache = self._graph_cache
+        g = load_cached_graph(filename, cache) if cache is not None else None
+        if g is not None:
+            self._set_file_graph(filename, g)
+            self._file_states[filename] = state
+            return
+        g = self._stream_file(filename, state)
+        if cache is not None:
+            cache.store(filename, g)
+
+    def _stream_file(self, filename: pathlib.Path, state: FileState) -> rdflib.Graph:
+        """Adds a new line-based file batch by batch without building a temporary graph and
+        returns the graph of the file."""
+        if self._named_graphs:
+            g = self._combined_graph.graph(rdflib.URIRef(filename.as_uri()))
+        else:
             g = rdflib.Graph()
-            try:
-                g.parse(filename)
-            except Exception as e:
-                raise ValueError(f"Could not parse file '{filename}'. Error: {e}")
-            for s, p, o in g:
-                if isinstance(s, rdflib.BNode):
-                    new_s = rdflib.URIRef(f"https://example.org/{s}")
-                else:
-                    new_s = s
-                if isinstance(o, rdflib.BNode):
-                    new_o = rdflib.URIRef(f"https://example.org/{o}")
-                else:
-                    new_o = o
-                g.remove((s, p, o))
-                g.add((new_s, p, new_o))
-            self._graphs[filename] = g
-            self._combined_graph += g
+        self._graphs[filename] = g
+        self._file_states[filename] = state
+        try:
+            for batch in iter_triple_batches(filename, self._batch_size):
+                if not self._named_graphs:
+                    # count every triple once per file, even if the file repeats it:
+                    batch = [t for t in dict.fromkeys(batch) if t not in g]
+                    self._add_triples(batch)
+                g.addN((s, p, o, g) for s, p, o in batch)
+                metrics.TRIPLES_LOADED.inc(len(batch))
+        except Exception:
+            # do not keep a partially loaded file:
+            self._remove_file(filename)
+            raise
+        return g
+
+    def _set_file_graph(self, filename: pathlib.Path, g: rdflib.Graph):
+        """Sets the graph of a file and applies the difference to the combined graph."""
+        if self._named_graphs:
+            return self._set_named_graph(filename, g)
+        old_graph = self._graphs.get(filename)
+        if old_graph is None:
+            self._add_triples(g)
+        else:
+            old_triples, new_triples = set(old_graph), set(g)
+            self._discard_triples(old_triples - new_triples)
+            self._add_triples(new_triples - old_triples)
+        self._graphs[filename] = g
+        metrics.TRIPLES_LOADED.inc(len(g))
+
+    def _set_named_graph(self, filename: pathlib.Path, g: rdflib.Graph):
+        """Applies the difference between the parsed graph and the named graph of the file."""
+        named_graph = self._graphs.get(filename)
+        if named_graph is None:
+            named_graph = self._combined_graph.graph(rdflib.URIRef(filename.as_uri()))
+            added = g
+        else:
+            old_triples, new_triples = set(named_graph), set(g)
+            for t in old_triples - new_triples:
+                named_graph.remove(t)
+            added = new_triples - old_triples
+        named_graph.addN((s, p, o, named_graph) for s, p, o in added)
+        self._graphs[filename] = named_graph
+        metrics.TRIPLES_LOADED.inc(len(g))
+
+    def _remove_file(self, filename: pathlib.Path):
+        """Removes a file and all triples that are not asserted by another file."""
+        with self._changing():
+            g = self._graphs.pop(filename)
+            self._file_states.pop(filename)
+            if self._named_graphs:
+                self._combined_graph.remove_graph(g)
+            else:
+                self._discard_triples(g)
+
+    def _add_triples(self, triples: Iterable[Tuple]):
+        """Adds triples of a file to the combined graph. Each triple must be passed once per file."""
+        counts = self._triple_counts
+        added = []
+        for t in triples:
+            n = counts.get(t, 0)
+            counts[t] = n + 1
+            if n == 0:
+                added.append(t)
+        combined_graph = self._combined_graph
+        combined_graph.addN((s, p, o, combined_graph) for s, p, o in added)
+
+    def _discard_triples(self, triples: Iterable[Tuple]):
+        """Removes triples of a file from the combined graph unless another file asserts them."""
+        counts = self._triple_counts
+        for t in triples:
+            n = counts.pop(t)
+            if n > 1:
+                counts[t] = n - 1
+            else:
+                self._combined_graph.remove(t)
 
     @property
     def graph(self) -> rdflib.Graph:
         return self._combined_graph
 
 
-class GraphDB(RemoteSparqlStore):
-    """GraphDB RDF database store."""
+@contextlib.contextmanager
+def _count_parsed_file(filename: pathlib.Path):
+    """Counts the file as parsed or, if the block raises, as failed."""
+    fmt = split_compression(filename)[0].lstrip(".")
+    try:
+        yield
+    except Exception:
+        metrics.PARSE_FAILURES.inc(format=fmt)
+        raise
+    metrics.FILES_PARSED.inc(format=fmt)
+
+
+@contextlib.contextmanager
+def _observed_request(endpoint: str, method: str, url: str):
+    """Reports a GraphDB request to the instrumentation hooks, which include the
+    metrics if enabled, and counts it as in flight while the block runs."""
+    metrics.HTTP_REQUESTS_IN_FLIGHT.inc(endpoint=endpoint)
+    try:
+        with instrumentation.measure("http", f"{method} {url}", endpoint=endpoint, method=method) as event:
+            yield event
+    finally:
+        metrics.HTTP_REQUESTS_IN_FLIGHT.dec(endpoint=endpoint)
+
+
+_RDF_CONTENT_TYPES = {
+    ".ttl": "text/turtle",
+    ".rdf": "application/rdf+xml",
+    ".jsonld": "application/ld+json",
+    ".nt": "application/n-triples",
+    ".nq": "application/n-quads",
+    ".trig": "application/trig",
+}
+_QUAD_FORMATS = {".nq", ".trig"}
+
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+
+class BatchUploadError(RuntimeError):
+    """Raised if a batch of a batched upload fails. Pass `batch_index` as `start_batch` to resume."""
+
+    def __init__(self, message: str, batch_index: int):
+        super().__init__(message)
+        self.batch_index = batch_index
 
-    def __init__(self, endpoint: str, repository: str, username: str = None, password: str = None):
-        super().__init__(f"{endpoint}/repositories/{repository}")
+
+def _iter_upload_body(filename: pathlib.Path, gzip_encode: bool, chunk_size: int = UPLOAD_CHUNK_SIZE):
+    """Yields the request body of a file upload chunk by chunk.
+
+    Gzip files are passed through. Other files are decompressed if needed and
+    gzip-encoded on the fly if `gzip_encode` is True.
+    """
+    if split_compression(filename)[1] == ".gz":
+        with open(filename, "rb") as f:
+            yield from iter(lambda: f.read(chunk_size), b"")
+        return
+    compressor = zlib.compressobj(wbits=31) if gzip_encode else None  # wbits=31: gzip container
+    with open_rdf(filename) as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            if compressor is None:
+                yield chunk
+            else:
+                compressed = compressor.compress(chunk)
+                if compressed:
+                    yield compressed
+    if compressor is not None:
+        yield compressor.flush()
+
+
+def _iter_ntriples_batches(filename: pathlib.Path, batch_size: int):
+    """Yields the triples of an RDF file as N-Triples documents of at most `batch_size` triples.
+
+    The batches are the same every time (see `iter_stable_triple_batches()`), so
+    an upload can be resumed at any batch.
+    """
+    for batch in iter_stable_triple_batches(filename, batch_size):
+        g = rdflib.Graph()
+        g.addN((s, p, o, g) for s, p, o in batch)
+        yield g.serialize(format="nt", encoding="utf-8")
+
+
+# The following helpers evaluate both requests and httpx responses:
+
+def _check_upload(response) -> bool:
+    if response.status_code in (200, 201, 204):
+        return True
+    raise RuntimeError(f"Upload failed: {response.status_code} {response.text}")
+
+
+def _repository_info(response, repo: str) -> Dict:
+    if response.status_code == 200:
+        return response.json()
+    if response.status_code == 404:
+        logger.debug("Repository '%s' does not exist.", repo)
+        return {}
+    if response.status_code == 401:
+        raise RuntimeError(f"Unauthorized access to repository '{repo}'. Check your credentials.")
+    if response.status_code == 403:
+        raise RuntimeError(f"Forbidden access to repository '{repo}'. Check your permissions.")
+    raise RuntimeError(f"Error fetching repository info: {response.status_code} {response.text}")
+
+
+def _triple_count(response, key: str) -> int:
+    if response.status_code == 200:
         try:
-            from SPARQLWrapper import SPARQLWrapper, JSON
-        except ImportError:
-            raise ImportError("Please install SPARQLWrapper to use this class: pip install SPARQLWrapper")
+            data = response.json()
+            return int(data.get(key, 0))
+        except Exception:
+            raise RuntimeError(f"Error parsing the triple number: {response.text}")
+    else:
+        raise RuntimeError(f"Error fetching the triple number: {response.status_code} {response.text}")
+
+
+@dataclass(frozen=True)
+class UploadReport:
+    """Outcome and timing of a single file upload of `GraphDB.upload_files()`."""
+    filename: pathlib.Path
+    success: bool
+    seconds: float
+    n_bytes: int
+    error: Optional[Exception] = None
+
+    @property
+    def throughput(self) -> float:
+        """Uploaded bytes (as stored on disk) per second."""
+        return self.n_bytes / self.seconds if self.seconds > 0 else float("inf")
+
+
+class GraphDB(RemoteSparqlStore):
+    """GraphDB RDF database store.
+
+    All REST calls share one `requests.Session`, so connections are kept alive and
+    reused. Failed connections and the status codes 429, 502, 503 and 504 are retried
+    with exponential backoff.
+
+    The methods prefixed with "a" (`aupload_file()`, `acount_triples()`, ...) are
+    coroutines with the same behavior, which use a pooled `httpx.AsyncClient`
+    (`pip install gldb[async]`).
+
+    Parameters
+    ----------
+    endpoint : str
+        URL of the GraphDB instance, e.g. "http://localhost:7200".
+    repository : str
+        Name of the repository.
+    username : str, optional
+        Username for authentication.
+    password : str, optional
+        Password for authentication.
+    max_retries : int, optional
+        Number of retries of a failed request. Default is 3.
+    backoff_factor : float, optional
+        The n-th retry waits `backoff_factor * 2 ** (n - 1)` seconds. Default is 0.5.
+    pool_maxsize : int, optional
+        Maximum number of pooled connections (of the blocking and of the async API),
+        which should not be smaller than the number of workers of `upload_files()`.
+        Default is 10.
+    result_format : str, optional
+        Format of query results, "json", "tsv" or "csv" (see `RemoteSparqlStore`).
+        Default is "json".
+    """
+
+    _retry_status_codes = (429, 502, 503, 504)
+
+    def __init__(
+            self,
+            endpoint: str,
+            repository: str,
+            username: str = None,
+            password: str = None,
+            max_retries: int = 3,
+            backoff_factor: float = 0.5,
+            pool_maxsize: int = 10,
+            result_format: str = "json"
+    ):
+        super().__init__(f"{endpoint}/repositories/{repository}", return_format=result_format,
+                         pool_maxsize=pool_maxsize)
         self._endpoint = endpoint
         self._repository = repository
         self._username = username
         self._password = password
-        self._wrapper.setReturnFormat(JSON)
+        self._max_retries = max_retries
+        self._backoff_factor = backoff_factor
+        self._session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
         if self.username and self.password:
             self._wrapper.setCredentials(self.username, self.password)
+            self._session.auth = (self.username, self.password)
 
         repo_info = self.get_repository_info(self.repository)
         if not repo_info:
-            logger.info(f"The repository '{self.repository}' does not exist. "
+            logger.info("The repository '%s' does not exist. "
                         "Call create_repository('config.ttl') with a valid configuration "
-                        "('config.ttl') file to create it.")
+                        "('config.ttl') file to create it.", self.repository)
 
     @property
     def endpoint(self) -> str:
@@ -300,32 +930,276 @@ class GraphDB(RemoteSparqlStore):
     def password(self) -> str:
         return self._password
 
-    def upload_file(self, filename: Union[str, pathlib.Path]) -> bool:
-        """Uploads an RDF file to das GraphDB-Repository."""
+    @property
+    def session(self) -> requests.Session:
+        """Returns the HTTP session used for all REST calls."""
+        return self._session
+
+    def close(self):
+        """Closes the pooled connections."""
+        self._session.close()
+
+    def _make_async_client(self):
+        auth = (self.username, self.password) if self.username and self.password else None
+        return _make_httpx_client(self._pool_maxsize, auth=auth)
+
+    async def _arequest(self, method: str, url: str, content_factory: Callable = None, **kwargs):
+        """Async counterpart of `_request()`. Streamed bodies are passed as `content_factory`."""
+        if not instrumentation.hooks_enabled():
+            return await self._asend(method, url, content_factory, **kwargs)
+        with _observed_request(self.endpoint, method, url) as event:
+            response = await self._asend(method, url, content_factory, **kwargs)
+            event.attributes.update(status=response.status_code, bytes=len(response.content))
+        return response
+
+    async def _asend(self, method: str, url: str, content_factory: Callable = None, **kwargs):
+        import httpx
+        for attempt in range(self._max_retries + 1):
+            if attempt > 0:
+                await asyncio.sleep(self._backoff_factor * 2 ** (attempt - 1))
+            if content_factory is not None:
+                kwargs["content"] = content_factory()
+            try:
+                response = await self.async_client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                if attempt == self._max_retries:
+                    raise
+                logger.debug("%s %s failed (%s). Retrying.", method, url, e)
+                continue
+            if response.status_code not in self._retry_status_codes or attempt == self._max_retries:
+                return response
+            logger.debug("%s %s returned %d. Retrying.", method, url, response.status_code)
+
+    def _request(self, method: str, url: str, data_factory: Callable = None, **kwargs) -> requests.Response:
+        """Sends a request with the pooled session and retries it on connection errors and
+        on the status codes in `_retry_status_codes`. The request (including all attempts)
+        is reported to the instrumentation hooks.
+
+        Streamed request bodies can only be sent once, so they are passed as `data_factory`,
+        which is called for every attempt to create the body.
+        """
+        if not instrumentation.hooks_enabled():
+            return self._send(method, url, data_factory, **kwargs)
+        with _observed_request(self.endpoint, method, url) as event:
+            response = self._send(method, url, data_factory, **kwargs)
+            event.attributes.update(status=response.status_code, bytes=len(response.content))
+        return response
+
+    def _send(self, method: str, url: str, data_factory: Callable = None, **kwargs) -> requests.Response:
+        for attempt in range(self._max_retries + 1):
+            if attempt > 0:
+                time.sleep(self._backoff_factor * 2 ** (attempt - 1))
+            if data_factory is not None:
+                kwargs["data"] = data_factory()
+            try:
+                response = self._session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self._max_retries:
+                    raise
+                logger.debug("%s %s failed (%s). Retrying.", method, url, e)
+                continue
+            if response.status_code not in self._retry_status_codes or attempt == self._max_retries:
+                return response
+            logger.debug("%s %s returned %d. Retrying.", method, url, response.status_code)
+
+    def upload_file(
+            self,
+            filename: Union[str, pathlib.Path],
+            compress: bool = False,
+            batch_size: int = None,
+            start_batch: int = 0
+    ) -> bool:
+        """Uploads an RDF file to das GraphDB-Repository.
+
+        The file is streamed with chunked transfer encoding, so it is never held in
+        memory as a whole. Compressed files (.gz, .bz2, .xz) are sent gzip-encoded
+        (`Content-Encoding: gzip`) without decompressing them on disk.
+
+        Parameters
+        ----------
+        filename : Union[str, pathlib.Path]
+            The RDF file to upload.
+        compress : bool, optional
+            Whether to gzip-encode uncompressed files for the upload. Default is False.
+        batch_size : int, optional
+            If given, the file is split on the client side into N-Triples documents of at
+            most `batch_size` triples, which are uploaded one after another. Blank nodes are
+            skolemized, so that they are consistent across batches. Not supported for
+            formats with named graphs (.nq, .trig). Default is None (upload as one request).
+        start_batch : int, optional
+            Index of the first batch to upload, to resume a failed batched upload
+            (see `BatchUploadError.batch_index`). Default is 0.
+        """
+        filename, headers, gzip_encode = self._prepare_upload(filename, compress, batch_size)
+        if batch_size is not None:
+            uploaded = self._upload_batches(filename, batch_size, start_batch, compress)
+        else:
+            uploaded = self._post_statements(lambda: _iter_upload_body(filename, gzip_encode), headers)
+        metrics.FILES_UPLOADED.inc(store=type(self).__name__, endpoint=self.endpoint)
+        return uploaded
+
+    @staticmethod
+    def _prepare_upload(filename: Union[str, pathlib.Path], compress: bool,
+                        batch_size: Optional[int]) -> Tuple[pathlib.Path, Dict, bool]:
+        """Checks the file to upload and returns its absolute path, the request headers and
+        whether the body is gzip-encoded."""
         filename = pathlib.Path(filename).resolve().absolute()
         if not filename.exists():
             raise FileNotFoundError(f"File {filename} not found.")
         # Determine content type based on file extension
-        ext = filename.suffix.lower()
-        if ext == ".ttl":
-            content_type = "text/turtle"
-        elif ext == ".rdf":
-            content_type = "application/rdf+xml"
-        elif ext == ".jsonld":
-            content_type = "application/ld+json"
-        else:
+        ext, compression = split_compression(filename)
+        content_type = _RDF_CONTENT_TYPES.get(ext)
+        if content_type is None:
             raise ValueError(f"File form '{ext}' not supported.")
-        # Target URL
-        url = f"{self.endpoint}/repositories/{self.repository}/statements"
-        with open(filename, "rb") as f:
-            data = f.read()
+        if batch_size is not None and ext in _QUAD_FORMATS:
+            raise ValueError(f"Batched uploads do not support named graphs ('{ext}').")
+        gzip_encode = compression is not None or compress
         headers = {"Content-Type": content_type}
-        auth = (self.username, self.password) if self.username and self.password else None
-        response = requests.post(url, data=data, headers=headers, auth=auth)
-        if response.status_code in (200, 201, 204):
-            return True
-        else:
-            raise RuntimeError(f"Upload failed: {response.status_code} {response.text}")
+        if gzip_encode:
+            headers["Content-Encoding"] = "gzip"
+        return filename, headers, gzip_encode
+
+    async def aupload_file(
+            self,
+            filename: Union[str, pathlib.Path],
+            compress: bool = False,
+            batch_size: int = None,
+            start_batch: int = 0
+    ) -> bool:
+        """Async counterpart of `upload_file()`.
+
+        The file is read in a thread and streamed to GraphDB. Batched uploads
+        (`batch_size`) parse the file, so they run in a thread as a whole.
+        """
+        filename, headers, gzip_encode = self._prepare_upload(filename, compress, batch_size)
+        loop = asyncio.get_running_loop()
+        if batch_size is not None:
+            uploaded = await loop.run_in_executor(None, functools.partial(
+                self._upload_batches, filename, batch_size, start_batch, compress))
+            metrics.FILES_UPLOADED.inc(store=type(self).__name__, endpoint=self.endpoint)
+            return uploaded
+
+        async def _aiter_body():
+            chunks = _iter_upload_body(filename, gzip_encode)
+            while True:
+                chunk = await loop.run_in_executor(None, next, chunks, None)
+                if chunk is None:
+                    return
+                yield chunk
+
+        url = f"{self.endpoint}/repositories/{self.repository}/statements"
+        response = await self._arequest("POST", url, content_factory=_aiter_body, headers=headers)
+        uploaded = _check_upload(response)
+        metrics.FILES_UPLOADED.inc(store=type(self).__name__, endpoint=self.endpoint)
+        return uploaded
+
+    def _upload_batches(self, filename: pathlib.Path, batch_size: int, start_batch: int, compress: bool) -> bool:
+        headers = {"Content-Type": _RDF_CONTENT_TYPES[".nt"]}
+        if compress:
+            headers["Content-Encoding"] = "gzip"
+        debug = logger.isEnabledFor(logging.DEBUG)
+        for i, data in enumerate(_iter_ntriples_batches(filename, batch_size)):
+            if i < start_batch:
+                continue
+            if compress:
+                data = gzip.compress(data)
+            try:
+                self._post_statements(lambda: data, headers)
+            except Exception as e:
+                raise BatchUploadError(
+                    f"Upload of batch {i} of '{filename}' failed: {e}. "
+                    f"Pass start_batch={i} to resume.", batch_index=i
+                ) from e
+            if debug:
+                logger.debug("Uploaded batch %d of '%s'.", i, filename)
+        return True
+
+    def _post_statements(self, data_factory: Callable, headers: Dict) -> bool:
+        """Posts RDF data (bytes or an iterable of bytes chunks returned by `data_factory`)
+        to the statements endpoint."""
+        url = f"{self.endpoint}/repositories/{self.repository}/statements"
+        response = self._request("POST", url, data_factory=data_factory, headers=headers)
+        return _check_upload(response)
+
+    def upload_files(
+            self,
+            filenames: List[Union[str, pathlib.Path]],
+            max_workers: int = 4,
+            raise_on_error: bool = False,
+            **kwargs
+    ) -> List[UploadReport]:
+        """Uploads many files concurrently over the pooled session.
+
+        Parameters
+        ----------
+        filenames : List[Union[str, pathlib.Path]]
+            The RDF files to upload.
+        max_workers : int, optional
+            Number of concurrent uploads. Default is 4.
+        raise_on_error : bool, optional
+            Whether to raise the first error after all uploads finished. By default,
+            errors are only reported.
+        **kwargs
+            Additional keyword arguments passed to `upload_file()`.
+
+        Returns
+        -------
+        List[UploadReport]
+            One report per file, in the order of `filenames`.
+        """
+
+        def _upload(filename) -> UploadReport:
+            filename = pathlib.Path(filename)
+            n_bytes = filename.stat().st_size if filename.exists() else 0
+            start = time.perf_counter()
+            try:
+                self.upload_file(filename, **kwargs)
+            except Exception as e:
+                return UploadReport(filename, False, time.perf_counter() - start, n_bytes, e)
+            return UploadReport(filename, True, time.perf_counter() - start, n_bytes)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            reports = list(executor.map(_upload, filenames))
+        seconds = time.perf_counter() - start
+        n_bytes = sum(r.n_bytes for r in reports if r.success)
+        n_failed = sum(not r.success for r in reports)
+        logger.info("Uploaded %d files (%d failed, %.1f MB) in %.2f s (%.2f MB/s).",
+                    len(reports) - n_failed, n_failed, n_bytes / 1e6, seconds,
+                    n_bytes / 1e6 / seconds if seconds > 0 else float("inf"))
+        if raise_on_error:
+            for r in reports:
+                if r.error is not None:
+                    raise r.error
+        return reports
+
+    async def aupload_files(
+            self,
+            filenames: List[Union[str, pathlib.Path]],
+            max_concurrency: int = 4,
+            raise_on_error: bool = False,
+            **kwargs
+    ) -> List[UploadReport]:
+        """Async counterpart of `upload_files()`. At most `max_concurrency` files are uploaded at once."""
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def _upload(filename) -> UploadReport:
+            filename = pathlib.Path(filename)
+            n_bytes = filename.stat().st_size if filename.exists() else 0
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    await self.aupload_file(filename, **kwargs)
+                except Exception as e:
+                    return UploadReport(filename, False, time.perf_counter() - start, n_bytes, e)
+                return UploadReport(filename, True, time.perf_counter() - start, n_bytes)
+
+        reports = await asyncio.gather(*(_upload(filename) for filename in filenames))
+        if raise_on_error:
+            for r in reports:
+                if r.error is not None:
+                    raise r.error
+        return list(reports)
 
     def create_repository(self, config_path: Union[str, pathlib.Path]) -> bool:
         """Creates a GraphDB repository using a configuration file (repo-config.ttl)."""
@@ -333,10 +1207,9 @@ class GraphDB(RemoteSparqlStore):
         if not config_path.exists():
             raise FileNotFoundError(f"Config file not found: {config_path}.")
         url = f"{self.endpoint}/rest/repositories"
-        auth = (self.username, self.password) if self.username and self.password else None
         with open(config_path, "rb") as f:
-            files = {"config": (config_path.name, f, "application/x-turtle")}
-            response = requests.post(url, files=files, auth=auth)
+            files = {"config": (config_path.name, f.read(), "application/x-turtle")}
+        response = self._request("POST", url, files=files)
         if response.status_code in (201, 204):
             return True
         else:
@@ -346,8 +1219,15 @@ class GraphDB(RemoteSparqlStore):
         """Lists all repositories in the GraphDB instance."""
         url = f"{self.endpoint}/rest/repositories"
         headers = {"Accept": "application/json"}
-        auth = (self.username, self.password) if self.username and self.password else None
-        response = requests.get(url, headers=headers, auth=auth)
+        response = self._request("GET", url, headers=headers)
+        if response.status_code == 200:
+            return response.json()
+        return None
+
+    async def alist_repositories(self) -> Any:
+        """Async counterpart of `list_repositories()`."""
+        url = f"{self.endpoint}/rest/repositories"
+        response = await self._arequest("GET", url, headers={"Accept": "application/json"})
         if response.status_code == 200:
             return response.json()
         return None
@@ -357,26 +1237,22 @@ class GraphDB(RemoteSparqlStore):
         repo = repository or self.repository
         url = f"{self.endpoint}/rest/repositories/{repo}"
         headers = {"Accept": "application/json"}
-        auth = (self.username, self.password) if self.username and self.password else None
-        response = requests.get(url, headers=headers, auth=auth)
+        response = self._request("GET", url, headers=headers)
+        return _repository_info(response, repo)
 
-        if response.status_code == 200:
-            return response.json()
-        if response.status_code == 404:
-            logger.debug(f"Repository '{repo}' does not exist.")
-            return {}
-        if response.status_code == 401:
-            raise RuntimeError(f"Unauthorized access to repository '{repo}'. Check your credentials.")
-        if response.status_code == 403:
-            raise RuntimeError(f"Forbidden access to repository '{repo}'. Check your permissions.")
-        raise RuntimeError(f"Error fetching repository info: {response.status_code} {response.text}")
+    async def aget_repository_info(self, repository=None) -> Dict:
+        """Async counterpart of `get_repository_info()`."""
+        repo = repository or self.repository
+        url = f"{self.endpoint}/rest/repositories/{repo}"
+        response = await self._arequest("GET", url, headers={"Accept": "application/json"})
+        return _repository_info(response, repo)
 
     def get_or_create_repository(self, config_path: Union[str, pathlib.Path]) -> bool:
         """Gets the repository info if it exists, otherwise creates it using the provided config file."""
         if self.get_repository_info(self.repository):
-            logger.debug(f"Found existing repository '{self.repository}'.")
+            logger.debug("Found existing repository '%s'.", self.repository)
             return True
-        logger.debug(f"Repository '{self.repository}' does not exist. Creating it.")
+        logger.debug("Repository '%s' does not exist. Creating it.", self.repository)
         return self.create_repository(config_path)
 
     def count_triples(self, key: str = "total", repository: str = None) -> int:
@@ -392,23 +1268,21 @@ class GraphDB(RemoteSparqlStore):
         """
         repo = repository or self.repository
         url = f"{self.endpoint}/rest/repositories/{repo}/size"
-        auth = (self.username, self.password) if self.username and self.password else None
-        response = requests.get(url, auth=auth)
-        if response.status_code == 200:
-            try:
-                data = response.json()
-                return int(data.get(key, 0))
-            except Exception:
-                raise RuntimeError(f"Error parsing the triple number: {response.text}")
-        else:
-            raise RuntimeError(f"Error fetching the triple number: {response.status_code} {response.text}")
+        response = self._request("GET", url)
+        return _triple_count(response, key)
+
+    async def acount_triples(self, key: str = "total", repository: str = None) -> int:
+        """Async counterpart of `count_triples()`."""
+        repo = repository or self.repository
+        url = f"{self.endpoint}/rest/repositories/{repo}/size"
+        response = await self._arequest("GET", url)
+        return _triple_count(response, key)
 
     def restart_repository(self, repository: str = None) -> bool:
         """Restarts a repository in the GraphDB instance."""
         repo = repository or self.repository
         url = f"{self.endpoint}/rest/repositories/{repo}/restart"
-        auth = (self.username, self.password) if self.username and self.password else None
-        response = requests.post(url, auth=auth)
+        response = self._request("POST", url)
         if response.status_code in (200, 204):
             return True
         else:
@@ -418,9 +1292,128 @@ class GraphDB(RemoteSparqlStore):
         """Deletes a repository from the GraphDB instance."""
         repo = repository or self.repository
         url = f"{self.endpoint}/rest/repositories/{repo}"
-        auth = (self.username, self.password) if self.username and self.password else None
-        response = requests.delete(url, auth=auth)
+        response = self._request("DELETE", url)
         if response.status_code in (200, 204):
             return True
         else:
             raise RuntimeError(f"Error deleting the repository: {response.status_code} {response.text}")
+
+
+class ParquetDataStore(DataStore):
+    """Data store of columnar tables, stored as Parquet or Arrow IPC (Feather v2) files.
+
+    CSV files are converted to Parquet on upload, so reads never parse text again.
+    Tables are read memory-mapped, and only the requested columns and the row
+    groups which may match the filters are read (using the row group statistics).
+    Requires pyarrow (`pip install gldb[parquet]`).
+
+    Parameters
+    ----------
+    data_dir : Union[str, pathlib.Path]
+        Directory of the table files. Existing files are found on initialization.
+    row_group_size : int, optional
+        Maximum number of rows per row group of converted files. Smaller row groups
+        allow skipping more data when filtering. Default is 65,536.
+    compression : str, optional
+        Compression of converted files. Default is "zstd".
+    """
+
+    _table_formats = {".parquet": "parquet", ".arrow": "ipc", ".feather": "ipc"}
+
+    def __init__(self, data_dir: Union[str, pathlib.Path], row_group_size: int = 64 * 1024,
+                 compression: str = "zstd"):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ImportError("Please install pyarrow to use this class: 'pip install gldb[parquet]'")
+        self._data_dir = pathlib.Path(data_dir).resolve().absolute()
+        self._data_dir.mkdir(parents=True, exist_ok=True)
+        self._row_group_size = row_group_size
+        self._compression = compression
+        self._expected_file_extensions = {".csv", *self._table_formats}
+        self._tables: Dict[str, pathlib.Path] = {
+            f.stem: f for f in sorted(self._data_dir.iterdir()) if f.suffix in self._table_formats
+        }
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(data_dir={self._data_dir})"
+
+    @property
+    def data_dir(self) -> pathlib.Path:
+        return self._data_dir
+
+    @property
+    def tables(self) -> List[str]:
+        """Names of the tables, which are the file names without suffix."""
+        return sorted(self._tables)
+
+    def upload_file(self, filename: Union[str, pathlib.Path]) -> bool:
+        """Adds a table file to the store. CSV files are converted to Parquet, Parquet
+        and Arrow IPC files are copied. The table name is the file name without suffix."""
+        import pyarrow.csv
+        import pyarrow.parquet as pq
+
+        filename = pathlib.Path(filename).resolve().absolute()
+        if not filename.exists():
+            raise FileNotFoundError(f"File {filename} not found.")
+        suffix = filename.suffix.lower()
+        if suffix not in self._expected_file_extensions:
+            raise ValueError(f"File type '{suffix}' not supported. Expected one of "
+                             f"{sorted(self._expected_file_extensions)}.")
+        if suffix == ".csv":
+            target = self._data_dir / f"{filename.stem}.parquet"
+            pq.write_table(pyarrow.csv.read_csv(filename), target, row_group_size=self._row_group_size,
+                           compression=self._compression)
+        else:
+            target = self._data_dir / filename.name
+            if filename != target:
+                shutil.copy2(filename, target)
+        previous = self._tables.get(filename.stem)
+        if previous is not None and previous != target:
+            previous.unlink()
+        self._tables[filename.stem] = target
+        logger.debug("Added table '%s' (%s).", filename.stem, target.name)
+        metrics.FILES_UPLOADED.inc(store=type(self).__name__)
+        return True
+
+    def _table_file(self, table: str) -> pathlib.Path:
+        try:
+            return self._tables[table]
+        except KeyError:
+            raise KeyError(f"Unknown table '{table}'. Available tables: {self.tables}.") from None
+
+    def read(self, table: str, columns: List[str] = None, filters=None):
+        """Reads a table as a `pyarrow.Table`.
+
+        Parameters
+        ----------
+        table : str
+            Name of the table.
+        columns : List[str], optional
+            Columns to read. Default is None (all columns).
+        filters : optional
+            Row filter as a `pyarrow.compute.Expression` or in the disjunctive normal
+            form of `pyarrow.parquet.read_table`, e.g. [("temperature", ">", 20)].
+            Row groups of Parquet files whose statistics exclude a match are skipped.
+        """
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.parquet as pq
+
+        filename = self._table_file(table)
+        if filters is not None and not isinstance(filters, pc.Expression):
+            filters = pq.filters_to_expression(filters)
+        if self._table_formats[filename.suffix] == "parquet":
+            return pq.read_table(filename, columns=columns, filters=filters, memory_map=True)
+        # Arrow IPC files are mapped into memory without copying
+        with pa.memory_map(str(filename)) as source:
+            data = pa.ipc.open_file(source).read_all()
+        if filters is not None:
+            data = data.filter(filters)
+        if columns is not None:
+            data = data.select(columns)
+        return data
+
+    def get_all(self, table: str):
+        """Returns a table as a pandas DataFrame."""
+        return self.read(table).to_pandas()
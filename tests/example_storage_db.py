@@ -1,10 +1,13 @@
+import json
 import pathlib
 from typing import Type
 
 import pandas as pd
+import rdflib
 
 from gldb import DataStore
 from gldb.query import Query
+from gldb.stores import RemoteSparqlStore
 
 
 class CSVDbQuery(Query):
@@ -49,3 +52,24 @@ class CSVDatabase(DataStore):
 
     def get_all(self, table_name):
         return self.tables[table_name]
+
+
+class LocalSparqlStore(RemoteSparqlStore):
+    """RemoteSparqlStore, which answers the received query texts from a local graph
+    instead of an endpoint. The query texts are recorded in `queries`."""
+
+    def __init__(self, graph: rdflib.Graph):
+        self._graph = graph
+        self._wrapper = self
+        self._return_format = "json"
+        self.queries = []
+
+    def setQuery(self, query: str):
+        self.queries.append(query)
+
+    def queryAndConvert(self):
+        return json.loads(self._graph.query(self.queries[-1]).serialize(format="json"))
+
+    async def aquery(self, query: str):
+        self.setQuery(query)
+        return self.queryAndConvert()
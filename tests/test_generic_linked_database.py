@@ -1,11 +1,18 @@
 import logging
 import pathlib
 import sys
+import tempfile
 import unittest
 from typing import List
+from unittest.mock import patch
+
+import pandas as pd
+import rdflib
 
 from gldb import GenericLinkedDatabase, DataStore, MetadataStore
-from gldb.query import QueryResult, FederatedQueryResult, SparqlQuery
+from gldb.query import (FederatedQueryResult, LazyFederatedQueryResult, QueryResult, QueryResultCache,
+                        SparqlQuery)
+from gldb.query.metadata_query import prepared_query_cache_info
 from gldb.stores import RDFStore
 
 logger = logging.getLogger("gldb")
@@ -17,7 +24,12 @@ __this_dir__ = pathlib.Path(__file__).parent
 
 sys.path.insert(0, str(__this_dir__))
 from gldb.stores import InMemoryRDFStore
-from example_storage_db import CSVDatabase
+from example_storage_db import CSVDatabase, LocalSparqlStore
+
+
+def load_csv(csv_database, row) -> pd.DataFrame:
+    """Loads the table of the download URL of a result row."""
+    return csv_database.get_all(str(row["url"]).rsplit('/', 1)[-1])
 
 
 def get_temperature_data_by_date(db, date: str) -> List[FederatedQueryResult]:
@@ -28,57 +40,20 @@ def get_temperature_data_by_date(db, date: str) -> List[FederatedQueryResult]:
     PREFIX dcat: <http://www.w3.org/ns/dcat#>
 
     SELECT ?dataset ?url
-    WHERE {{
+    WHERE {
       ?dataset a dcat:Dataset .
-      ?dataset dcterms:created "{date}" .
+      ?dataset dcterms:created ?date .
       ?dataset dcat:distribution ?distribution .
       ?distribution dcat:downloadURL ?url .
-    }}
-    """.format(date=date)
-    # results = self["rdf_database"].execute_query(SparqlQuery(sparql_query))
-    _store: RDFStore = db.stores.rdf_database
-    results = SparqlQuery(sparql_query).execute(_store)
-
-    # result_data = [{str(k): parse_literal(v) for k, v in binding.items()} for binding in results.data.bindings]
-
-    federated_query_results = []
-
-    rdf_database = db.stores.rdf_database
-    for dataset, url in zip(results.data["dataset"], results.data["url"]):
-        filename = str(url).rsplit('/', 1)[-1]
-
-        data = db.stores.csv_database.get_all(filename)
-
-        # query all metadata for the dataset:
-        metadata_sparql = """
-        PREFIX dcterms: <http://purl.org/dc/terms/>
-        PREFIX dcat: <http://www.w3.org/ns/dcat#>
-
-        SELECT ?p ?o
-        WHERE {{
-          <{dataset}> ?p ?o .
-        }}
-        """.format(dataset=dataset)
-        metadata = SparqlQuery(metadata_sparql).execute(rdf_database)  # .execute(rdf_database.graph)
-        # dataset_result_data = [{str(k): v for k, v in binding.items()} for binding in
-        #                        metadata_result.data.bindings]
-        # metadata = {d["p"]: d["o"] for d in dataset_result_data}
-        # context = {"dcterms": "http://purl.org/dc/terms/", "dcat": "http://www.w3.org/ns/dcat#",
-        #            "ex": "https://example.org/"}
-        #
-        # g = rdflib.Graph()
-        # for k, v in metadata.items():
-        #     g.add((rdflib.URIRef(res["dataset"]), rdflib.URIRef(k), v))
-        # jsonld = g.serialize(format="json-ld", context=context)
-        # jsonld_dict = json.loads(jsonld)
-        # for k, v in jsonld_dict.items():
-        #     if isinstance(v, dict):
-        #         if len(v) == 1 and "@id" in v:
-        #             jsonld_dict[k] = v["@id"]
-        federated_query_results.append(FederatedQueryResult(data=data, metadata=metadata))
-        # better convert metadata to json-ld string
-
-    return federated_query_results
+    }
+    """
+    return db.federated_query(
+        SparqlQuery(sparql_query),
+        metadata_store="rdf_database",
+        data_store="csv_database",
+        data_loader=load_csv,
+        bindings={"date": date}
+    )
 
 
 class TestGenericLinkedDatabase(unittest.TestCase):
@@ -141,3 +116,118 @@ class TestGenericLinkedDatabase(unittest.TestCase):
         data = get_temperature_data_by_date(db, date="2024-01-01")
         self.assertIsInstance(data, list)
         self.assertIsInstance(data[0], FederatedQueryResult)
+        self.assertTrue(len(data[0].metadata) > 0)
+        self.assertEqual(data[0].metadata["http://purl.org/dc/terms/title"], "Temperature Data Over Time")
+        self.assertEqual(len(data[0].metadata["http://www.w3.org/ns/dcat#keyword"]), 3)
+        self.assertEqual(list(data[0].data.columns), list(csv_database.get_all("temperature.csv").columns))
+
+    def test_federated_query_remote_store(self):
+        n = 5
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tmp_dir = pathlib.Path(tmp_dir)
+            ttl = ["@prefix dcat: <http://www.w3.org/ns/dcat#> .", "@prefix dcterms: <http://purl.org/dc/terms/> ."]
+            csv_database = CSVDatabase()
+            for i in range(n):
+                (tmp_dir / f"table{i}.csv").write_text(f"x,y\n{i},{i * 2}\n")
+                csv_database.upload_file(tmp_dir / f"table{i}.csv")
+                ttl.append(f"<https://example.org/dataset{i}> a dcat:Dataset ; dcterms:title \"Table {i}\" ; "
+                           f"dcat:distribution [ dcat:downloadURL <https://example.org/table{i}.csv> ] .")
+            remote_store = LocalSparqlStore(rdflib.Graph().parse(data="\n".join(ttl), format="ttl"))
+            db = GenericLinkedDatabase(stores={"rdf_database": remote_store, "csv_database": csv_database})
+
+            query = SparqlQuery("""
+            PREFIX dcat: <http://www.w3.org/ns/dcat#>
+            PREFIX dcterms: <http://purl.org/dc/terms/>
+            SELECT ?dataset ?url WHERE {
+              ?dataset a dcat:Dataset ; dcterms:title ?title ; dcat:distribution/dcat:downloadURL ?url .
+            }
+            """)
+            self.assertEqual(len(db.federated_query(query, "rdf_database", "csv_database", data_loader=load_csv)), n)
+            # the bindings are sent with the query:
+            results = db.federated_query(query, "rdf_database", "csv_database", data_loader=load_csv,
+                                         bindings={"title": "Table 3"})
+            self.assertEqual(len(results), 1)
+            self.assertEqual(results[0].metadata["http://purl.org/dc/terms/title"], "Table 3")
+            self.assertEqual(results[0].data["y"].tolist(), [6])
+            self.assertIn('VALUES (?title) { ("Table 3") }', remote_store.queries[-2])
+
+            # the metadata queries of local stores are not kept in the cache of compiled queries:
+            (tmp_dir / "rdf").mkdir()
+            (tmp_dir / "rdf" / "metadata.ttl").write_text("\n".join(ttl))
+            local_db = GenericLinkedDatabase(stores={"rdf_database": InMemoryRDFStore(tmp_dir / "rdf"),
+                                                     "csv_database": csv_database})
+            local_db.federated_query(query, "rdf_database", "csv_database", data_loader=load_csv)
+            cache_size = prepared_query_cache_info().currsize
+            results = local_db.federated_query(query, "rdf_database", "csv_database", data_loader=load_csv,
+                                               bindings={"title": "Table 3"})
+            self.assertEqual(results[0].data["y"].tolist(), [6])
+            self.assertEqual(prepared_query_cache_info().currsize, cache_size)
+
+    def test_federated_query(self):
+        n = 5
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tmp_dir = pathlib.Path(tmp_dir)
+            ttl = ["@prefix dcat: <http://www.w3.org/ns/dcat#> .", "@prefix dcterms: <http://purl.org/dc/terms/> ."]
+            for i in range(n):
+                (tmp_dir / f"table{i}.csv").write_text(f"x,y\n{i},{i * 2}\n")
+                ttl.append(f"<https://example.org/dataset{i}> a dcat:Dataset ; dcterms:title \"Table {i}\" ; "
+                           f"dcat:distribution [ dcat:downloadURL <https://example.org/table{i}.csv> ] .")
+            (tmp_dir / "metadata.ttl").write_text("\n".join(ttl))
+
+            db = GenericLinkedDatabase(stores={"rdf_database": InMemoryRDFStore(tmp_dir / "rdf"),
+                                               "csv_database": CSVDatabase()})
+            for i in range(n):
+                db.linked_upload(tmp_dir / f"table{i}.csv", tmp_dir / "metadata.ttl",
+                                 data_store="csv_database", metadata_store="rdf_database")
+
+            query = SparqlQuery("""
+            PREFIX dcat: <http://www.w3.org/ns/dcat#>
+            SELECT ?dataset ?url WHERE {
+              ?dataset a dcat:Dataset ; dcat:distribution/dcat:downloadURL ?url .
+            } ORDER BY ?dataset
+            """)
+            with patch.object(SparqlQuery, "execute", side_effect=SparqlQuery.execute, autospec=True) as execute:
+                results = db.federated_query(query, "rdf_database", "csv_database", data_loader=load_csv)
+            # one query for the datasets and one for the metadata of all datasets:
+            self.assertEqual(execute.call_count, 2)
+            self.assertEqual(len(results), n)
+            for i, r in enumerate(results):
+                self.assertEqual(r.metadata["http://purl.org/dc/terms/title"], f"Table {i}")
+                self.assertEqual(r.data["y"].tolist(), [i * 2])
+
+            loaded = []
+
+            def counting_loader(csv_database, row):
+                loaded.append(row["url"])
+                return load_csv(csv_database, row)
+
+            cache = QueryResultCache(maxsize=10)
+            lazy = db.federated_query(query, "rdf_database", "csv_database", data_loader=counting_loader,
+                                      lazy=True, cache=cache)
+            self.assertIsInstance(lazy[0], LazyFederatedQueryResult)
+            # filtering by metadata does not load any data:
+            selected = [r for r in lazy if r.metadata["http://purl.org/dc/terms/title"] == "Table 3"]
+            self.assertEqual(loaded, [])
+            self.assertFalse(selected[0].loaded)
+            self.assertEqual(selected[0].data["y"].tolist(), [6])
+            self.assertIs(selected[0].data, selected[0].data)
+            self.assertTrue(selected[0].loaded)
+            self.assertEqual(len(loaded), 1)
+
+            # the cache is shared between queries:
+            lazy = db.federated_query(query, "rdf_database", "csv_database", data_loader=counting_loader,
+                                      lazy=True, prefetch=2, cache=cache)
+            self.assertEqual(lazy[3].data["y"].tolist(), [6])
+            self.assertEqual(cache.stats().hits, 1)
+            # accessing a result loads the following ones in the background, each only once:
+            self.assertEqual(lazy[4].data["y"].tolist(), [8])
+            self.assertEqual(len(loaded), 2)
+            lazy[1].data
+            lazy[2].data
+            self.assertEqual(sorted(loaded[1:]), [f"https://example.org/table{i}.csv" for i in (1, 2, 4)])
+            self.assertFalse(lazy[0].loaded)
+
+            with self.assertRaises(ValueError):
+                db.federated_query(query, "rdf_database", "csv_database", data_loader=load_csv, subject="unknown")
+            with self.assertRaises(TypeError):
+                db.federated_query(query, "csv_database", "rdf_database", data_loader=load_csv)
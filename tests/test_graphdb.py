@@ -1,22 +1,36 @@
+import asyncio
+import bz2
+import gzip
 from unittest.mock import MagicMock
 from unittest.mock import patch, Mock
 
 import pandas as pd
 import pytest
+import rdflib
+import requests
+from rdflib.compare import isomorphic
 
+from gldb import instrumentation
+from gldb.ingest import file_skolem_base
 from gldb.query.metadata_query import RemoteSparqlQuery
-from gldb.stores import GraphDB
+from gldb.stores import BatchUploadError, GraphDB
 
 
-def make_graphdb():
+def read_body(data):
+    """Returns the request body, which may be streamed as an iterable of chunks."""
+    return data if isinstance(data, bytes) else b"".join(data)
+
+
+def make_graphdb(**kwargs):
     return GraphDB(endpoint="http://localhost:7200",
                    repository="testrepo",
                    username="user",
-                   password="pass")
+                   password="pass",
+                   **kwargs)
 
 
 @patch.object(GraphDB, "get_repository_info", return_value={})
-@patch("requests.post")
+@patch("requests.Session.request")
 def test_upload_file_success(mock_post, mock_repo_info, tmp_path):
     # Erfolgreicher Upload
     test_file = tmp_path / "test.ttl"
@@ -28,7 +42,7 @@ def test_upload_file_success(mock_post, mock_repo_info, tmp_path):
 
 
 @patch.object(GraphDB, "get_repository_info", return_value={})
-@patch("requests.post")
+@patch("requests.Session.request")
 def test_upload_file_not_found(mock_post, mock_repo_info):
     db = make_graphdb()
     with pytest.raises(FileNotFoundError):
@@ -37,7 +51,7 @@ def test_upload_file_not_found(mock_post, mock_repo_info):
 
 
 @patch.object(GraphDB, "get_repository_info", return_value={})
-@patch("requests.post")
+@patch("requests.Session.request")
 def test_upload_file_wrong_format(mock_post, mock_repo_info, tmp_path):
     test_file = tmp_path / "test.txt"
     test_file.write_text("dummy")
@@ -48,7 +62,7 @@ def test_upload_file_wrong_format(mock_post, mock_repo_info, tmp_path):
 
 
 @patch.object(GraphDB, "get_repository_info", return_value={})
-@patch("requests.post")
+@patch("requests.Session.request")
 def test_upload_file_server_error(mock_post, mock_repo_info, tmp_path):
     test_file = tmp_path / "test.ttl"
     test_file.write_text("@prefix ex: <http://example.org/> . ex:a ex:b ex:c .")
@@ -98,3 +112,258 @@ def test_select_all(mock_repo_info):
     # ]
     fake.setQuery.assert_called_once_with("SELECT * WHERE { ?s ?p ?o }")
     fake.queryAndConvert.assert_called_once()
+
+
+@patch.object(GraphDB, "get_repository_info", return_value={})
+@patch("requests.Session.request")
+def test_upload_compressed_file(mock_post, mock_repo_info, tmp_path):
+    ttl = b"@prefix ex: <http://example.org/> . ex:a ex:b ex:c ."
+    gz_file = tmp_path / "test.ttl.gz"
+    gz_file.write_bytes(gzip.compress(ttl))
+    bz2_file = tmp_path / "test.ttl.bz2"
+    bz2_file.write_bytes(bz2.compress(ttl))
+    plain_file = tmp_path / "test.ttl"
+    plain_file.write_bytes(ttl)
+    mock_post.return_value = Mock(status_code=204)
+    db = make_graphdb()
+
+    assert db.upload_file(gz_file) is True
+    kwargs = mock_post.call_args.kwargs
+    assert kwargs["headers"] == {"Content-Type": "text/turtle", "Content-Encoding": "gzip"}
+    assert read_body(kwargs["data"]) == gz_file.read_bytes()
+
+    for filename, compress in ((bz2_file, False), (plain_file, True)):
+        assert db.upload_file(filename, compress=compress) is True
+        kwargs = mock_post.call_args.kwargs
+        assert kwargs["headers"]["Content-Encoding"] == "gzip"
+        assert gzip.decompress(read_body(kwargs["data"])) == ttl
+
+    assert db.upload_file(plain_file) is True
+    assert "Content-Encoding" not in mock_post.call_args.kwargs["headers"]
+    assert read_body(mock_post.call_args.kwargs["data"]) == ttl
+
+
+@patch.object(GraphDB, "get_repository_info", return_value={})
+@patch("requests.Session.request")
+def test_upload_file_streamed(mock_post, mock_repo_info, tmp_path):
+    nt = b"<http://example.org/a> <http://example.org/b> <http://example.org/c> .\n"
+    for ext, content_type in ((".nt", "application/n-triples"),
+                              (".nq", "application/n-quads"),
+                              (".trig", "application/trig")):
+        test_file = tmp_path / f"test{ext}"
+        test_file.write_bytes(nt)
+        mock_post.return_value = Mock(status_code=204)
+        db = make_graphdb()
+        assert db.upload_file(test_file) is True
+        kwargs = mock_post.call_args.kwargs
+        assert kwargs["headers"] == {"Content-Type": content_type}
+        assert not isinstance(kwargs["data"], bytes)
+        assert read_body(kwargs["data"]) == nt
+
+
+@patch.object(GraphDB, "get_repository_info", return_value={})
+@patch("requests.Session.request")
+def test_upload_file_in_batches(mock_post, mock_repo_info, tmp_path):
+    test_file = tmp_path / "test.ttl"
+    test_file.write_text("@prefix ex: <http://example.org/> .\n"
+                         "ex:a ex:b ex:c, ex:d, ex:e ; ex:creator [ ex:name \"John\" ] .")
+    mock_post.side_effect = [Mock(status_code=204), Mock(status_code=500, text="Internal Server Error")]
+    db = make_graphdb()
+    with pytest.raises(BatchUploadError) as e:
+        db.upload_file(test_file, batch_size=2)
+    assert e.value.batch_index == 1
+    assert mock_post.call_args.kwargs["headers"] == {"Content-Type": "application/n-triples"}
+
+    mock_post.reset_mock()
+    mock_post.side_effect = None
+    mock_post.return_value = Mock(status_code=204)
+    assert db.upload_file(test_file, batch_size=2, start_batch=e.value.batch_index) is True
+    assert mock_post.call_count == 2
+    uploaded = rdflib.Graph()
+    for call in mock_post.call_args_list:
+        uploaded.parse(data=call.kwargs["data"], format="nt")
+    assert len(uploaded) == 3
+
+    nq_file = tmp_path / "test.nq"
+    nq_file.write_text("<http://example.org/a> <http://example.org/b> <http://example.org/c> <http://example.org/g> .")
+    with pytest.raises(ValueError):
+        db.upload_file(nq_file, batch_size=2)
+
+
+@pytest.mark.parametrize("suffix, content", [
+    (".ttl", "@prefix ex: <http://example.org/> .\n"
+             "ex:a ex:b ex:c, ex:d ; ex:creator [ ex:name \"John\" ; ex:knows [ ex:name \"Jane\" ] ] .\n"
+             "ex:e ex:list ( ex:f ex:g ex:h ) ; ex:creator [ ex:name \"John\" ] ."),
+    (".nt", "<http://example.org/a> <http://example.org/creator> _:john .\n"
+            "_:john <http://example.org/name> \"John\" .\n"
+            "_:john <http://example.org/knows> _:jane .\n"
+            "_:jane <http://example.org/name> \"Jane\" .\n"
+            "<http://example.org/e> <http://example.org/creator> _:jane .\n"),
+], ids=["turtle", "ntriples"])
+@patch.object(GraphDB, "get_repository_info", return_value={})
+@patch("requests.Session.request")
+def test_resume_batch_upload(mock_post, mock_repo_info, tmp_path, suffix, content):
+    test_file = tmp_path / f"test{suffix}"
+    test_file.write_text(content)
+    db = make_graphdb()
+
+    def uploaded_graph():
+        g = rdflib.Graph()
+        for call in mock_post.call_args_list:
+            if call.kwargs["data"] is not None:
+                g.parse(data=read_body(call.kwargs["data"]), format="nt")
+        return g
+
+    mock_post.side_effect = [Mock(status_code=204), Mock(status_code=204),
+                             Mock(status_code=500, text="Internal Server Error")]
+    with pytest.raises(BatchUploadError) as e:
+        db.upload_file(test_file, batch_size=2)
+    assert e.value.batch_index == 2
+    mock_post.call_args_list.pop()  # the failed batch
+    first_attempt = uploaded_graph()
+
+    mock_post.reset_mock()
+    mock_post.side_effect = None
+    mock_post.return_value = Mock(status_code=204)
+    db.upload_file(test_file, batch_size=2, start_batch=e.value.batch_index)
+    uploaded = first_attempt + uploaded_graph()
+
+    # the blank nodes of both attempts got the same skolem IRIs:
+    expected = rdflib.Graph().parse(test_file)
+    assert len(uploaded) == len(expected)
+    base = file_skolem_base(test_file)
+
+    def to_bnode(node):
+        return rdflib.BNode(node[len(base):]) if node.startswith(base) else node
+
+    restored = rdflib.Graph()
+    restored.addN((to_bnode(s), p, to_bnode(o), restored) for s, p, o in uploaded)
+    assert isomorphic(restored, expected)
+
+
+@patch.object(GraphDB, "get_repository_info", return_value={})
+@patch("requests.Session.request")
+def test_retries(mock_request, mock_repo_info, tmp_path):
+    test_file = tmp_path / "test.ttl"
+    test_file.write_text("@prefix ex: <http://example.org/> . ex:a ex:b ex:c .")
+    mock_request.side_effect = [requests.ConnectionError("reset"),
+                                Mock(status_code=503, text="Unavailable"),
+                                Mock(status_code=204)]
+    db = make_graphdb(max_retries=2, backoff_factor=0)
+    assert db.session.auth == ("user", "pass")
+    assert db.upload_file(test_file) is True
+    assert mock_request.call_count == 3
+    # the streamed body is created anew for every attempt:
+    assert read_body(mock_request.call_args.kwargs["data"]) == test_file.read_bytes()
+
+    mock_request.reset_mock()
+    mock_request.side_effect = None
+    mock_request.return_value = Mock(status_code=503, text="Unavailable")
+    with pytest.raises(RuntimeError):
+        db.count_triples()
+    assert mock_request.call_count == 3
+
+
+@patch.object(GraphDB, "get_repository_info", return_value={})
+@patch("requests.Session.request")
+def test_upload_files(mock_request, mock_repo_info, tmp_path):
+    filenames = []
+    for i in range(5):
+        filenames.append(tmp_path / f"test{i}.ttl")
+        filenames[-1].write_text(f"@prefix ex: <http://example.org/> . ex:a ex:b {i} .")
+    filenames.append(tmp_path / "missing.ttl")
+    mock_request.return_value = Mock(status_code=204)
+    db = make_graphdb()
+
+    reports = db.upload_files(filenames, max_workers=3)
+    assert [r.filename for r in reports] == filenames
+    assert [r.success for r in reports] == [True] * 5 + [False]
+    assert isinstance(reports[-1].error, FileNotFoundError)
+    assert all(r.n_bytes > 0 and r.seconds >= 0 for r in reports[:-1])
+    assert reports[0].throughput > 0
+    assert mock_request.call_count == 5
+
+    with pytest.raises(FileNotFoundError):
+        db.upload_files(filenames, raise_on_error=True)
+
+
+@patch.object(GraphDB, "get_repository_info", return_value={})
+@patch("requests.Session.request")
+def test_instrumentation(mock_request, mock_repo_info):
+    mock_request.side_effect = [Mock(status_code=503, text="Unavailable", content=b"Unavailable"),
+                                Mock(status_code=200, content=b'{"total": 3}', json=lambda: {"total": 3})]
+    db = make_graphdb(max_retries=1, backoff_factor=0)
+    events = []
+    instrumentation.register_hook(events.append)
+    try:
+        assert db.count_triples() == 3
+
+        fake = MagicMock()
+        fake.queryAndConvert.return_value = b'?s\n<http://example.org/s1>\n'
+        db._wrapper = fake
+        db._return_format = "tsv"
+        result = RemoteSparqlQuery("SELECT ?s WHERE { ?s ?p ?o }").execute(db)
+    finally:
+        instrumentation.clear_hooks()
+    assert [e.kind for e in events] == ["http", "query"]
+    # one event per request, including the retries:
+    assert events[0].name.startswith("GET http://localhost:7200/rest/repositories/")
+    assert events[0].attributes["status"] == 200
+    assert events[0].attributes["bytes"] == 12
+    assert result.timings.transfer > 0
+    assert (result.timings.rows, result.timings.bytes) == (1, 27)
+    assert events[1].timings is result.timings
+
+
+@patch.object(GraphDB, "get_repository_info", return_value={})
+def test_select_tsv(mock_repo_info):
+    db = make_graphdb(result_format="tsv")
+    assert db.return_format == "tsv"
+    assert db.wrapper.returnFormat == "tsv"
+
+    fake = MagicMock()
+    fake.queryAndConvert.return_value = b'?s\t?n\n<http://example.org/s1>\t"1"^^<http://www.w3.org/2001/XMLSchema#integer>\n'
+    db._wrapper = fake
+    result = RemoteSparqlQuery("SELECT ?s ?n WHERE { ?s ?p ?n }").execute(db)
+    assert result.data.values.tolist() == [["http://example.org/s1", 1]]
+
+
+@patch.object(GraphDB, "get_repository_info", return_value={})
+def test_async_api(mock_repo_info, tmp_path):
+    httpx = pytest.importorskip("httpx")
+    test_file = tmp_path / "test.ttl"
+    test_file.write_text("@prefix ex: <http://example.org/> . ex:a ex:b ex:c .")
+    requests_seen = []
+    responses = {
+        ("GET", "/rest/repositories/testrepo/size"): [httpx.Response(503), httpx.Response(200, json={"total": 3})],
+        ("GET", "/rest/repositories/testrepo"): [httpx.Response(200, json={"id": "testrepo"})],
+        ("POST", "/repositories/testrepo/statements"): [httpx.Response(204)] * 2,
+        ("POST", "/repositories/testrepo"): [httpx.Response(200, json={
+            "head": {"vars": ["s"]}, "results": {"bindings": [{"s": {"type": "uri", "value": "http://example.org/a"}}]}
+        })],
+    }
+
+    def handler(request):
+        requests_seen.append(request)
+        return responses[(request.method, request.url.path)].pop(0)
+
+    db = make_graphdb(backoff_factor=0)
+    db._async_client = httpx.AsyncClient(transport=httpx.MockTransport(handler), auth=("user", "pass"))
+
+    async def main():
+        assert await db.acount_triples() == 3
+        assert await db.aget_repository_info() == {"id": "testrepo"}
+        assert await db.aupload_file(test_file, compress=True) is True
+        reports = await db.aupload_files([test_file, tmp_path / "missing.ttl"])
+        assert [r.success for r in reports] == [True, False]
+        result = await RemoteSparqlQuery("SELECT ?s WHERE { ?s ?p ?o }").aexecute(db)
+        await db.aclose()
+        return result
+
+    result = asyncio.run(main())
+    assert result.data["s"].tolist() == ["http://example.org/a"]
+    upload = requests_seen[3]
+    assert upload.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(upload.content) == test_file.read_bytes()
+    assert requests_seen[-1].headers["Accept"] == "application/sparql-results+json"
+    assert db._async_client is None
@@ -0,0 +1,88 @@
+import logging
+import os
+import pathlib
+import subprocess
+import sys
+import tempfile
+import unittest
+import unittest.mock
+
+__this_dir__ = pathlib.Path(__file__).parent
+
+# cumulative import time of `import gldb` in microseconds (see `python -X importtime`):
+IMPORT_TIME_BUDGET_US = 100_000
+
+
+def run_python(code: str, env: dict = None) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *code], capture_output=True, text=True, check=True,
+                          cwd=__this_dir__.parent, env={**os.environ, **(env or {})})
+
+
+class TestImport(unittest.TestCase):
+
+    def test_import_is_lazy(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            out = run_python(["-c", "import sys, gldb; "
+                                    "print(sorted(m for m in ('rdflib', 'pandas', 'requests', 'gldb.stores') "
+                                    "if m in sys.modules)); print(gldb.logger.handlers)"],
+                             env={"XDG_CACHE_HOME": tmp_dir, "HOME": tmp_dir})
+            self.assertEqual(out.stdout.splitlines(), ["[]", "[]"])
+            # no log directory is created on import:
+            self.assertEqual(os.listdir(tmp_dir), [])
+
+        import gldb
+        from gldb.gldb import GenericLinkedDatabase
+        self.assertIs(gldb.GenericLinkedDatabase, GenericLinkedDatabase)
+        self.assertIn("DataStore", dir(gldb))
+        with self.assertRaises(AttributeError):
+            gldb.UnknownStore
+
+    def test_import_without_pandas(self):
+        # pandas is an optional dependency, so the database must be usable without it:
+        out = run_python(["-c", "import sys; sys.modules['pandas'] = None; "
+                                "from gldb import GenericLinkedDatabase; "
+                                "from gldb.stores import InMemoryRDFStore; "
+                                "print(GenericLinkedDatabase.__name__)"])
+        self.assertEqual(out.stdout.strip(), "GenericLinkedDatabase")
+
+    def test_import_time(self):
+        err = run_python(["-X", "importtime", "-c", "import gldb"]).stderr
+        cumulative = {line.rsplit("|", 1)[-1].strip(): int(line.split("|")[1])
+                      for line in err.splitlines() if line.startswith("import time:") and "|" in line
+                      and line.split("|")[1].strip().isdigit()}
+        self.assertLess(cumulative["gldb"], IMPORT_TIME_BUDGET_US)
+
+    def test_configure_logging(self):
+        import gldb
+        try:
+            logger = gldb.configure_logging(logging.INFO, log_file=False)
+            self.assertEqual(len(logger.handlers), 1)
+            self.assertEqual(logger.level, logging.INFO)
+            # calling it again replaces the handlers:
+            gldb.configure_logging(logging.INFO, log_file=False)
+            self.assertEqual(len(logger.handlers), 1)
+        finally:
+            for handler in list(gldb.logger.handlers):
+                gldb.logger.removeHandler(handler)
+            gldb.logger.setLevel(gldb.DEFAULT_LOGGING_LEVEL)
+
+    def test_queue_logging(self):
+        import gldb
+        from logging.handlers import QueueHandler
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            log_file = pathlib.Path(tmp_dir) / "gldb.log"
+            with unittest.mock.patch("gldb.get_user_log_dir", return_value=pathlib.Path(tmp_dir)):
+                try:
+                    logger = gldb.configure_logging(logging.INFO, use_queue=True)
+                    self.assertEqual([type(h) for h in logger.handlers], [QueueHandler])
+                    logger.info("Uploaded %d files.", 3)
+                    logger.debug("Not logged")
+                finally:
+                    gldb.stop_logging()
+                    gldb.logger.setLevel(gldb.DEFAULT_LOGGING_LEVEL)
+            # stopping the listener writes the pending records:
+            text = log_file.read_text()
+            self.assertIn("Uploaded 3 files.", text)
+            self.assertNotIn("Not logged", text)
+            self.assertEqual(gldb.logger.handlers, [])
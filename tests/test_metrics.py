@@ -0,0 +1,125 @@
+import pathlib
+import tempfile
+import unittest
+import urllib.request
+from unittest.mock import Mock, patch
+
+import requests
+
+from gldb import instrumentation, metrics
+from gldb.query import QueryResultCache, SparqlQuery
+from gldb.stores import GraphDB, InMemoryRDFStore, StoreManager
+
+__this_dir__ = pathlib.Path(__file__).parent
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        metrics.REGISTRY.reset()
+
+    def tearDown(self):
+        metrics.disable()
+        metrics.REGISTRY.reset()
+
+    def test_prometheus_text(self):
+        registry = metrics.Registry()
+        counter = metrics.Counter("test_requests_total", "Requests.", registry=registry)
+        gauge = metrics.Gauge("test_in_flight", "Requests in flight.", registry=registry)
+        histogram = metrics.Histogram("test_seconds", "Durations.", buckets=(0.1, 1), registry=registry)
+        with self.assertRaises(ValueError):
+            metrics.Counter("test_requests_total", "Requests.", registry=registry)
+
+        # nothing is recorded while disabled:
+        counter.inc(endpoint="a")
+        self.assertEqual(counter.value(endpoint="a"), 0)
+
+        metrics.enable()
+        counter.inc(endpoint="a")
+        counter.inc(2, endpoint='b"\\')
+        with self.assertRaises(ValueError):
+            counter.inc(-1)
+        gauge.inc()
+        gauge.inc()
+        gauge.dec()
+        for value in (0.05, 0.1, 0.5, 3):
+            histogram.observe(value, method="GET")
+        self.assertEqual(histogram.value(method="GET"), (4, 3.65))
+        self.assertEqual(registry.render(), """\
+# HELP test_requests_total Requests.
+# TYPE test_requests_total counter
+test_requests_total{endpoint="a"} 1
+test_requests_total{endpoint="b\\"\\\\"} 2
+# HELP test_in_flight Requests in flight.
+# TYPE test_in_flight gauge
+test_in_flight 1
+# HELP test_seconds Durations.
+# TYPE test_seconds histogram
+test_seconds_bucket{method="GET",le="0.1"} 2
+test_seconds_bucket{method="GET",le="1"} 3
+test_seconds_bucket{method="GET",le="+Inf"} 4
+test_seconds_sum{method="GET"} 3.65
+test_seconds_count{method="GET"} 4
+""")
+
+    def test_store_metrics(self):
+        metrics.enable()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tmp_dir = pathlib.Path(tmp_dir)
+            store = InMemoryRDFStore(tmp_dir / "rdf")
+            (tmp_dir / "data.ttl").write_text("@prefix ex: <http://example.org/> . ex:a ex:b ex:c, ex:d .")
+            store.upload_file(tmp_dir / "data.ttl")
+            (tmp_dir / "broken.ttl").write_text("this is not turtle")
+            with self.assertRaises(Exception):
+                store.upload_file(tmp_dir / "broken.ttl")
+            self.assertEqual(metrics.FILES_PARSED.value(format="ttl"), 1)
+            self.assertEqual(metrics.PARSE_FAILURES.value(format="ttl"), 1)
+            self.assertEqual(metrics.TRIPLES_LOADED.value(), 2)
+            self.assertEqual(metrics.FILES_UPLOADED.value(store="InMemoryRDFStore"), 1)
+
+            query = SparqlQuery("SELECT * WHERE { ?s ?p ?o }", cache=QueryResultCache())
+            manager = StoreManager({"rdf": store})
+            manager.execute_all(query)
+            manager.execute_all(query)
+            self.assertEqual(metrics.STORE_MANAGER_QUERIES.value(store="rdf", status="success"), 2)
+            self.assertEqual(metrics.QUERIES.value(query="SparqlQuery", store="InMemoryRDFStore",
+                                                   status="success"), 2)
+            self.assertEqual(metrics.QUERY_CACHE_REQUESTS.value(result="hit"), 1)
+            self.assertEqual(metrics.QUERY_CACHE_REQUESTS.value(result="miss"), 1)
+
+            text = metrics.write_textfile(tmp_dir / "gldb.prom").read_text()
+            self.assertIn('gldb_queries_total{query="SparqlQuery",status="success",store="InMemoryRDFStore"} 2',
+                          text)
+            self.assertIn('gldb_store_manager_query_seconds_count{store="rdf"} 2', text)
+
+        metrics.disable()
+        self.assertFalse(instrumentation.hooks_enabled())
+
+    @patch.object(GraphDB, "get_repository_info", return_value={})
+    @patch("requests.Session.request")
+    def test_graphdb_metrics(self, mock_request, mock_repo_info):
+        metrics.enable()
+        db = GraphDB(endpoint="http://localhost:7200", repository="testrepo", max_retries=0)
+        mock_request.return_value = Mock(status_code=500, text="Internal Server Error", content=b"")
+        with self.assertRaises(RuntimeError):
+            db.count_triples()
+        mock_request.side_effect = requests.ConnectionError("refused")
+        with self.assertRaises(requests.ConnectionError):
+            db.count_triples()
+        endpoint = "http://localhost:7200"
+        self.assertEqual(metrics.HTTP_REQUESTS.value(endpoint=endpoint, method="GET", status=500), 1)
+        self.assertEqual(metrics.HTTP_ERRORS.value(endpoint=endpoint, reason=500), 1)
+        self.assertEqual(metrics.HTTP_ERRORS.value(endpoint=endpoint, reason="ConnectionError"), 1)
+        self.assertEqual(metrics.HTTP_REQUEST_SECONDS.value(endpoint=endpoint, method="GET")[0], 2)
+        self.assertEqual(metrics.HTTP_REQUESTS_IN_FLIGHT.value(endpoint=endpoint), 0)
+
+        server = metrics.start_http_server(0)
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+            with urllib.request.urlopen(url) as response:
+                self.assertEqual(response.headers["Content-Type"], metrics.CONTENT_TYPE)
+                self.assertIn('gldb_http_errors_total{endpoint="http://localhost:7200",reason="500"} 1',
+                              response.read().decode())
+        finally:
+            server.shutdown()
+            server.server_close()
@@ -1,16 +1,27 @@
+import asyncio
 import pathlib
+import subprocess
 import sys
+import tempfile
 import unittest
+from unittest.mock import MagicMock, patch
 
+import pandas as pd
 import rdflib
 from SPARQLWrapper import SPARQLWrapper, JSON
 
-from gldb.query import Query, QueryResult, SparqlQuery, RemoteSparqlQuery
-from gldb.query.metadata_query import sparql_result_to_df
+from gldb import instrumentation
+from gldb.query import Query, QueryResult, QueryResultCache, SparqlQuery, RemoteSparqlQuery
+from gldb.query.metadata_query import prepared_query_cache_info, sparql_result_to_df
+from gldb.query.utils import (_cast_cell, sparql_csv_to_dataframe, sparql_json_to_dataframe,
+                              sparql_tsv_to_dataframe)
 from gldb.stores import InMemoryRDFStore, RemoteSparqlStore
 
 __this_dir__ = pathlib.Path(__file__).parent.resolve()
 
+sys.path.insert(0, str(__this_dir__))
+from example_storage_db import LocalSparqlStore
+
 TESTING_VERSIONS = (9, 12)
 
 
@@ -124,3 +135,337 @@ ORDER BY ?propertyLabel
         ORDER BY DESC(?mass)
         """
         self.assertEqual(3, len(res.derived_graph.query(select_query)))
+
+    def test_query_result_cache(self):
+        cache = QueryResultCache(maxsize=2)
+        select_all = "SELECT * WHERE { ?s ?p ?o }"
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            data_dir = pathlib.Path(tmp_dir)
+            (data_dir / "a.ttl").write_text("<http://example.org/a> <http://example.org/b> 1 .")
+            store = InMemoryRDFStore(data_dir)
+
+            res = SparqlQuery(select_all, cache=cache).execute(store)
+            res.data.loc[0, "o"] = -1  # must not modify the cached result
+            res = SparqlQuery(select_all, description="cached", cache=cache).execute(store)
+            self.assertEqual(res.description, "cached")
+            self.assertEqual(list(res.data["o"]), [1])
+            self.assertEqual((cache.stats().hits, cache.stats().misses), (1, 1))
+
+            version = store.version
+            (data_dir / "b.ttl").write_text("<http://example.org/a> <http://example.org/b> 2 .")
+            store.update()
+            self.assertNotEqual(store.version, version)
+            res = SparqlQuery(select_all, cache=cache).execute(store)
+            self.assertEqual(len(res), 2)
+            self.assertEqual(cache.stats().misses, 2)
+
+            bindings = {"s": rdflib.URIRef("http://example.org/a")}
+            SparqlQuery(select_all, cache=cache).execute(store, initBindings=bindings)
+            SparqlQuery(select_all, cache=cache).execute(store, initBindings=bindings)
+            stats = cache.stats()
+            self.assertEqual((stats.hits, stats.misses, stats.evictions, stats.size), (2, 3, 1, 2))
+            self.assertAlmostEqual(stats.hit_rate, 0.4)
+
+            # results cached by a query running during an update are not returned afterwards:
+            query = SparqlQuery(select_all, cache=QueryResultCache())
+            set_file_graph = InMemoryRDFStore._set_file_graph
+            during_update = []
+
+            def set_file_graph_and_query(self, filename, g):
+                set_file_graph(self, filename, g)
+                during_update.append(len(query.execute(self)))
+
+            (data_dir / "c.ttl").write_text("<http://example.org/a> <http://example.org/b> 3 .")
+            (data_dir / "d.ttl").write_text("<http://example.org/a> <http://example.org/b> 4 .")
+            with patch.object(InMemoryRDFStore, "_set_file_graph", set_file_graph_and_query):
+                store.update()
+            self.assertEqual(during_update[0], 3)
+            self.assertEqual(len(query.execute(store)), 4)
+
+        ttl_cache = QueryResultCache(ttl=10)
+        ttl_cache.put("key", "result")
+        self.assertEqual(ttl_cache.get("key"), "result")
+        with patch("gldb.query.cache.time.monotonic", return_value=float("inf")):
+            self.assertIsNone(ttl_cache.get("key"))
+        self.assertEqual(len(ttl_cache), 0)
+
+    def test_prepared_query(self):
+        query = SparqlQuery("""
+        PREFIX ex: <http://example.org/schema/>
+        SELECT ?planet WHERE { ?planet a ex:Planet ; rdfs:label ?label . }
+        """)
+        store = InMemoryRDFStore(data_dir=__this_dir__ / "data")
+        n_planets = len(query.execute(store))
+        self.assertTrue(n_planets > 1)
+
+        misses = prepared_query_cache_info().misses
+        earth = query.execute(store, bindings={"label": rdflib.Literal("Earth", lang="en")})
+        self.assertEqual(list(earth.data["planet"]), ["http://www.wikidata.org/entity/Q2"])
+        none = query.execute(store, bindings={"?label": "no such planet"})
+        self.assertEqual(len(none), 0)
+        self.assertEqual(prepared_query_cache_info().misses, misses)
+        self.assertIs(query.prepare(dict(store.graph.namespaces())),
+                      query.prepare(dict(store.graph.namespaces())))
+
+    def test_concurrent_compilation(self):
+        # the grammar breaks if its first uses are concurrent, so this runs in a new interpreter:
+        script = """
+import sys
+from concurrent.futures import ThreadPoolExecutor
+import rdflib
+from gldb.query import SparqlQuery
+from gldb.stores import InMemoryRDFStore
+
+store = InMemoryRDFStore(sys.argv[1])
+text = '''PREFIX ex: <http://example.org/schema/>
+SELECT ?planet WHERE {{ ?planet a ex:Planet ; rdfs:label ?label . FILTER(STRLEN(?label) > {}) }}'''
+
+def run(i):
+    query = SparqlQuery(text.format(-i - 1), prepared=i % 3 != 0)
+    if i % 3 == 1:
+        return len(query.execute(store, "sparql"))
+    return len(query.execute(store))
+
+with ThreadPoolExecutor(max_workers=16) as executor:
+    print(set(executor.map(run, range(100))))
+"""
+        out = subprocess.run([sys.executable, "-c", script, str(__this_dir__ / "data")], cwd=__this_dir__.parent,
+                             stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        self.assertEqual(out.returncode, 0, out.stderr)
+        store = InMemoryRDFStore(data_dir=__this_dir__ / "data")
+        n_planets = len(SparqlQuery("SELECT ?planet WHERE { ?planet a <http://example.org/schema/Planet> }"
+                                    ).execute(store))
+        self.assertEqual(out.stdout.strip(), f"{{{n_planets}}}")
+
+    def test_aexecute(self):
+        query = SparqlQuery("""
+        PREFIX ex: <http://example.org/schema/>
+        SELECT ?planet WHERE { ?planet a ex:Planet ; rdfs:label ?label . }
+        """)
+        store = InMemoryRDFStore(data_dir=__this_dir__ / "data")
+
+        async def main():
+            return await asyncio.gather(
+                query.aexecute(store),
+                query.aexecute(store, bindings={"label": rdflib.Literal("Earth", lang="en")})
+            )
+
+        planets, earth = asyncio.run(main())
+        self.assertEqual(len(planets), len(query.execute(store)))
+        self.assertEqual(list(earth.data["planet"]), ["http://www.wikidata.org/entity/Q2"])
+
+    def test_query_timings(self):
+        store = InMemoryRDFStore(data_dir=__this_dir__ / "data")
+        # a query text which was not compiled yet:
+        query = SparqlQuery(f"""
+        PREFIX ex: <http://example.org/schema/>
+        SELECT ?planet WHERE {{ ?planet a ex:Planet . FILTER(?planet != <urn:{id(self)}>) }}
+        """, cache=QueryResultCache())
+        events = []
+        hook = instrumentation.register_hook(events.append)
+        tracer = MagicMock()
+        otel_hook = instrumentation.enable_opentelemetry(tracer)
+        try:
+            result = query.execute(store)
+            n_planets = len(result)
+            self.assertGreater(result.timings.parse, 0)
+            self.assertGreater(result.timings.plan, 0)
+            self.assertGreater(result.timings.execute, 0)
+            self.assertEqual(result.timings.rows, len(result))
+            self.assertAlmostEqual(result.timings.as_dict()["total"], result.timings.total)
+            self.assertEqual(len(events), 1)
+            self.assertEqual((events[0].kind, events[0].name), ("query", "SparqlQuery"))
+            self.assertEqual(events[0].attributes["store"], "InMemoryRDFStore")
+            self.assertIs(events[0].timings, result.timings)
+            self.assertGreaterEqual(events[0].seconds, result.timings.total)
+
+            # the compiled query and the result are cached now:
+            result = query.execute(store)
+            self.assertTrue(result.timings.cached)
+            self.assertEqual(result.timings.parse, 0)
+            result = query.execute(store, bindings={"planet": rdflib.URIRef("urn:x")})
+            self.assertFalse(result.timings.cached)
+            self.assertEqual((result.timings.parse, result.timings.plan), (0, 0))
+
+            self.assertEqual(tracer.start_span.call_count, 3)
+            self.assertEqual(tracer.start_span.call_args.args[0], "gldb.query SparqlQuery")
+            self.assertIn("gldb.timings.execute", tracer.start_span.call_args.kwargs["attributes"])
+
+            # failing hooks do not fail the query:
+            instrumentation.register_hook(lambda event: 1 / 0)
+            with self.assertLogs("gldb", level="WARNING"):
+                self.assertEqual(len(query.execute(store)), n_planets)
+        finally:
+            instrumentation.clear_hooks()
+        self.assertFalse(instrumentation.hooks_enabled())
+        instrumentation.unregister_hook(hook)
+        instrumentation.unregister_hook(otel_hook)
+
+    def test_sparql_result_to_df_dtypes(self):
+        from rdflib import XSD, Literal, URIRef, Variable
+        bindings = [
+            {Variable("i"): Literal(1), Variable("d"): Literal(1.5), Variable("u"): URIRef("http://example.org/a"),
+             Variable("t"): Literal("2024-01-01T00:00:00Z", datatype=XSD.dateTime), Variable("m"): Literal(1)},
+            {Variable("d"): Literal(2.5), Variable("u"): URIRef("http://example.org/b"),
+             Variable("t"): Literal("2024-01-02T00:00:00Z", datatype=XSD.dateTime), Variable("m"): Literal("a"),
+             Variable("late"): Literal(True)},
+        ]
+        df = sparql_result_to_df(bindings)
+        self.assertEqual(list(df.columns), ["i", "d", "u", "t", "m", "late"])
+        self.assertEqual(str(df["i"].dtype), "Int64")
+        self.assertTrue(df["i"].isna()[1])
+        self.assertEqual(str(df["d"].dtype), "float64")
+        # IRIs are categorical only if they repeat:
+        self.assertNotEqual(str(df["u"].dtype), "category")
+        self.assertEqual(list(df["u"]), ["http://example.org/a", "http://example.org/b"])
+        self.assertTrue(str(df["t"].dtype).startswith("datetime64"))
+        self.assertEqual(list(df["m"]), [1, "a"])
+        self.assertEqual(str(df["late"].dtype), "boolean")
+        df = sparql_result_to_df([{Variable("u"): URIRef("http://example.org/a")}] * 3)
+        self.assertEqual(str(df["u"].dtype), "category")
+
+    def test_sparql_json_to_dataframe(self):
+        xsd = "http://www.w3.org/2001/XMLSchema#"
+
+        def lit(value, datatype=None, **kwargs):
+            cell = {"type": "literal", "value": value, **kwargs}
+            if datatype:
+                cell["datatype"] = xsd + datatype
+            return cell
+
+        results = {
+            "head": {"vars": ["i", "f", "dec", "b", "dt", "d", "t", "mixed", "bad", "uri", "lang", "empty"]},
+            "results": {"bindings": [
+                {"i": lit("1", "integer"), "f": lit("1.5", "double"), "dec": lit("1.10", "decimal"),
+                 "b": lit("true", "boolean"), "dt": lit("2024-01-01T00:00:00Z", "dateTime"),
+                 "d": lit("2024-01-01", "date"), "t": lit("12:00:00", "time"), "mixed": lit("1", "int"),
+                 "bad": lit("x", "integer"), "uri": {"type": "uri", "value": "http://example.org/a"},
+                 "lang": lit("Erde", **{"xml:lang": "de"})},
+                {"i": lit("2", "long"), "f": lit("NaN", "float"), "b": lit("FALSE", "boolean"),
+                 "dt": lit("2024-01-02T10:00:00+00:00", "dateTime"), "mixed": lit("a"),
+                 "bad": lit("3", "integer"), "uri": {"type": "bnode", "value": "b0"}},
+                {"mixed": lit("2.5", "double"), "bad": lit("4", "integer")},
+            ]},
+        }
+
+        def reference(cast_literals):
+            # the previous cell by cell conversion:
+            vars_ = results["head"]["vars"]
+            return pd.DataFrame([{var: _cast_cell(b.get(var), cast_literals) for var in vars_}
+                                 for b in results["results"]["bindings"]], columns=vars_)
+
+        for cast_literals in (True, False):
+            pd.testing.assert_frame_equal(sparql_json_to_dataframe(results, cast_literals=cast_literals),
+                                          reference(cast_literals))
+        empty = {"head": {"vars": ["a", "b"]}, "results": {"bindings": []}}
+        pd.testing.assert_frame_equal(sparql_json_to_dataframe(empty), pd.DataFrame([], columns=["a", "b"]))
+
+        df = sparql_json_to_dataframe(results, nullable=True)
+        self.assertEqual(str(df["i"].dtype), "Int64")
+        self.assertTrue(df["i"].isna()[2])
+        self.assertEqual(str(df["f"].dtype), "float64")
+        self.assertEqual(str(df["b"].dtype), "boolean")
+        self.assertTrue(str(df["dt"].dtype).startswith("datetime64"))
+        self.assertEqual(list(df["bad"]), ["x", 3, 4])
+        self.assertEqual(list(df["mixed"]), [1, "a", 2.5])
+
+    def test_remote_bindings(self):
+        query = SparqlQuery("""
+        PREFIX ex: <http://example.org/schema/>
+        PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+        SELECT ?planet WHERE { ?planet a ex:Planet ; rdfs:label ?label . }
+        """)
+        store = LocalSparqlStore(InMemoryRDFStore(data_dir=__this_dir__ / "data").graph)
+        n_planets = len(query.execute(store))
+        self.assertTrue(n_planets > 1)
+
+        earth = query.execute(store, bindings={"label": rdflib.Literal("Earth", lang="en")})
+        self.assertEqual(list(earth.data["planet"]), ["http://www.wikidata.org/entity/Q2"])
+        self.assertTrue(store.queries[-1].endswith('VALUES (?label) { ("Earth"@en) }'))
+        earth = asyncio.run(query.aexecute(store, bindings={"?label": rdflib.Literal("Earth", lang="en")}))
+        self.assertEqual(list(earth.data["planet"]), ["http://www.wikidata.org/entity/Q2"])
+        self.assertEqual(len(query.execute(store, bindings={"label": "no such planet"}).data), 0)
+        with self.assertRaises(ValueError):
+            query.execute(store, bindings={"label": rdflib.BNode()})
+
+    def test_remote_query_chunks(self):
+        class FakeWrapper:
+            """Returns the rows 0..24 of ?i, paged by the LIMIT and OFFSET of the query."""
+
+            def __init__(self):
+                self.queries = []
+
+            def setQuery(self, query):
+                self.queries.append(query)
+
+            def queryAndConvert(self):
+                limit, offset = [int(line.split()[1]) for line in self.queries[-1].splitlines()[-2:]]
+                rows = range(offset, min(offset + limit, 25))
+                return {"head": {"vars": ["i"]}, "results": {"bindings": [
+                    {"i": {"type": "literal", "value": str(i),
+                           "datatype": "http://www.w3.org/2001/XMLSchema#integer"}} for i in rows
+                ]}}
+
+        store = RemoteSparqlStore.__new__(RemoteSparqlStore)
+        store._wrapper = FakeWrapper()
+        store._return_format = "json"
+        query = RemoteSparqlQuery("SELECT ?i WHERE { ?s ?p ?i } ORDER BY ?i")
+        chunks = list(query.iter_chunks(store, page_size=10))
+        self.assertEqual([len(c) for c in chunks], [10, 10, 5])
+        self.assertEqual(list(pd.concat(chunks)["i"]), list(range(25)))
+        self.assertTrue(store.wrapper.queries[-1].endswith("LIMIT 10\nOFFSET 20"))
+
+        chunks = list(query.iter_chunks(store, page_size=5, max_pages=2, nullable=True))
+        self.assertEqual(len(chunks), 2)
+        self.assertEqual(str(chunks[0]["i"].dtype), "Int64")
+        # a full last page needs one more (empty) request:
+        n_queries = len(store.wrapper.queries)
+        self.assertEqual(len(list(query.iter_chunks(store, page_size=25))), 1)
+        self.assertEqual(len(store.wrapper.queries), n_queries + 2)
+
+        with self.assertRaises(ValueError):
+            next(RemoteSparqlQuery("SELECT ?i WHERE { ?s ?p ?i } LIMIT 3").iter_chunks(store))
+
+    def test_sparql_tsv_and_csv_to_dataframe(self):
+        xsd = "http://www.w3.org/2001/XMLSchema#"
+        tsv = ("?s\t?n\t?x\t?label\n"
+               f"<http://example.org/a>\t1\t\"1.5\"^^<{xsd}double>\t\"Erde\"@de\n"
+               f"_:b0\t\"2\"^^<{xsd}integer>\t\t\"tab\\there \\\"quoted\\\"\"\n")
+        json_results = {
+            "head": {"vars": ["s", "n", "x", "label"]},
+            "results": {"bindings": [
+                {"s": {"type": "uri", "value": "http://example.org/a"},
+                 "n": {"type": "literal", "value": "1", "datatype": xsd + "integer"},
+                 "x": {"type": "literal", "value": "1.5", "datatype": xsd + "double"},
+                 "label": {"type": "literal", "value": "Erde", "xml:lang": "de"}},
+                {"s": {"type": "bnode", "value": "b0"},
+                 "n": {"type": "literal", "value": "2", "datatype": xsd + "integer"},
+                 "label": {"type": "literal", "value": 'tab\there "quoted"'}},
+            ]},
+        }
+        pd.testing.assert_frame_equal(sparql_tsv_to_dataframe(tsv.encode()), sparql_json_to_dataframe(json_results))
+        pd.testing.assert_frame_equal(sparql_tsv_to_dataframe(tsv, nullable=True),
+                                      sparql_json_to_dataframe(json_results, nullable=True))
+        # columns of one datatype are cast without binding objects:
+        tsv = f"?y\t?z\n\"1.5\"^^<{xsd}double>\t-3\n\"2\"^^<{xsd}double>\t4\n"
+        json_results = {"head": {"vars": ["y", "z"]}, "results": {"bindings": [
+            {"y": {"type": "literal", "value": v, "datatype": xsd + "double"},
+             "z": {"type": "literal", "value": i, "datatype": xsd + "integer"}} for v, i in (("1.5", "-3"), ("2", "4"))
+        ]}}
+        for nullable in (False, True):
+            pd.testing.assert_frame_equal(sparql_tsv_to_dataframe(tsv, nullable=nullable),
+                                          sparql_json_to_dataframe(json_results, nullable=nullable))
+        # an empty line is an unbound value:
+        self.assertEqual(sparql_tsv_to_dataframe("?a\n<http://example.org/a>\n\n")["a"].isna().tolist(),
+                         [False, True])
+
+        csv = b"s,n,label\r\nhttp://example.org/a,1,\"Erde, Welt\"\r\n_:b0,,x\r\n"
+        df = sparql_csv_to_dataframe(csv)
+        self.assertEqual(list(df.columns), ["s", "n", "label"])
+        self.assertEqual(df.values.tolist(), [["http://example.org/a", "1", "Erde, Welt"], ["_:b0", None, "x"]])
+        # empty lines are rows, in which the single variable is unbound:
+        df = sparql_csv_to_dataframe(b"a\r\nhttp://example.org/a\r\n\r\nhttp://example.org/b\r\n")
+        self.assertEqual(df["a"].tolist(), ["http://example.org/a", None, "http://example.org/b"])
+        # only line feeds end lines, not other line boundaries of str.splitlines() in literals:
+        tsv = '?s\t?l\r\n<http://example.org/a>\t"x\x85y\u2028z\x0c"\r\n'.encode()
+        self.assertEqual(sparql_tsv_to_dataframe(tsv)["l"].tolist(), ["x\x85y\u2028z\x0c"])
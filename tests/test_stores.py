@@ -1,8 +1,18 @@
+import asyncio
+import bz2
+import gzip
+import importlib.util
+import lzma
+import pathlib
 import sys
+import tempfile
+import time
 import unittest
+from unittest.mock import patch
 
-from gldb.query import Query, QueryResult, RemoteSparqlQuery
-from gldb.stores import DataStore
+from gldb.ingest import SKOLEM_BASE_IRI, iter_triple_batches
+from gldb.query import ParquetQuery, Query, QueryResult, RemoteSparqlQuery, SparqlQuery
+from gldb.stores import DataStore, InMemoryRDFStore, ParquetDataStore
 from gldb.stores import RemoteSparqlStore
 from gldb.stores import StoreManager
 
@@ -71,6 +81,41 @@ class TestDataStore(unittest.TestCase):
         self.assertIsInstance(qres, QueryResult)
         self.assertEqual(qres.data, "mock_result")
 
+    def test_execute_all(self):
+        class SlowQuery(Query):
+            """Waits `store.delay` seconds and fails for stores without a delay."""
+
+            def execute(self, store, *args, **kwargs) -> QueryResult:
+                time.sleep(store.delay)
+                return QueryResult(self, store.delay)
+
+        manager = StoreManager()
+        for name, delay in (("fast", 0.1), ("slow", 0.3), ("broken", None), ("hanging", 1)):
+            store = CSVDatabase()
+            store.delay = delay
+            manager.add_store(name, store)
+
+        query = SlowQuery("SELECT 1")
+        start = time.perf_counter()
+        results = manager.execute_all(query, stores=["fast", "slow", "broken"])
+        self.assertLess(time.perf_counter() - start, 0.6)
+        self.assertEqual(list(results), ["fast", "slow", "broken"])
+        self.assertEqual(results["slow"].result.data, 0.3)
+        self.assertGreaterEqual(results["slow"].seconds, 0.3)
+        self.assertFalse(results["broken"].success)
+        self.assertIsInstance(results["broken"].error, TypeError)
+
+        results = manager.execute_all(query, stores=["fast", "hanging"], timeout=0.5)
+        self.assertTrue(results["fast"].success)
+        self.assertIsInstance(results["hanging"].error, TimeoutError)
+
+        results = asyncio.run(manager.aexecute_all(query, stores=["fast", "hanging"], timeout=0.5))
+        self.assertTrue(results["fast"].success)
+        self.assertIsInstance(results["hanging"].error, TimeoutError)
+
+        with self.assertRaises(ValueError):
+            manager.execute_all(query, stores=["unknown"])
+
     def test_wikidata_store(self):
         if not (sys.version_info.major == 3 and sys.version_info.minor == 12):
             self.skipTest("Skipping test on non-3.12 Python to avoid rate limiting")
@@ -87,3 +132,225 @@ ORDER BY ?propertyLabel
         query = RemoteSparqlQuery(sparql_query)
         res = query.execute(remote_store)
         self.assertTrue(len(res.data) >= 172)
+
+
+TTL_WITH_BNODE = """@prefix ex: <http://example.org/> .
+ex:a ex:b ex:c .
+ex:a ex:creator [ ex:name "John" ] .
+"""
+
+
+class TestInMemoryRDFStore(unittest.TestCase):
+
+    def test_graph_cache(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tmp_dir = pathlib.Path(tmp_dir)
+            data_dir = tmp_dir / "data"
+            data_dir.mkdir()
+            (data_dir / "a.ttl").write_text(TTL_WITH_BNODE)
+
+            store = InMemoryRDFStore(data_dir, cache_dir=tmp_dir / "cache")
+            self.assertEqual(len(store.graph), 3)
+            self.assertEqual(len(list(store.graph_cache.cache_dir.glob("*.pickle"))), 1)
+
+            with patch("gldb.ingest.parse_file", side_effect=AssertionError("must not parse")):
+                cached_store = InMemoryRDFStore(data_dir, cache_dir=tmp_dir / "cache")
+            self.assertEqual(set(store.graph), set(cached_store.graph))
+
+            (data_dir / "a.ttl").write_text(TTL_WITH_BNODE + "ex:a ex:b ex:d .\n")
+            updated_store = InMemoryRDFStore(data_dir, cache_dir=tmp_dir / "cache")
+            self.assertEqual(len(updated_store.graph), 4)
+
+            updated_store.graph_cache.clear()
+            self.assertEqual(len(list(updated_store.graph_cache.cache_dir.glob("*.pickle"))), 0)
+
+            # streamed files are written to and loaded from the cache as well:
+            (data_dir / "b.nt").write_text('<http://example.org/a> <http://example.org/b> _:x .\n'
+                                           '_:x <http://example.org/name> "John" .\n')
+            store = InMemoryRDFStore(data_dir, cache_dir=tmp_dir / "cache")
+            self.assertEqual(len(list(store.graph_cache.cache_dir.glob("*.pickle"))), 2)
+            with patch("gldb.stores.iter_triple_batches", side_effect=AssertionError("must not stream")):
+                cached_store = InMemoryRDFStore(data_dir, cache_dir=tmp_dir / "cache")
+            self.assertEqual(set(store.graph), set(cached_store.graph))
+
+    def test_parallel_update(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            data_dir = pathlib.Path(tmp_dir)
+            for i in range(4):
+                (data_dir / f"file{i}.ttl").write_text(
+                    TTL_WITH_BNODE + f"ex:a ex:index {i} .\n"
+                )
+            with self.assertRaises(ValueError):
+                InMemoryRDFStore(data_dir, n_workers=0)
+
+            serial_store = InMemoryRDFStore(data_dir)
+            parallel_store = InMemoryRDFStore(data_dir, n_workers=2)
+            self.assertEqual(parallel_store.filenames, serial_store.filenames)
+            self.assertEqual(len(parallel_store.graph), len(serial_store.graph))
+
+            def without_skolem_iris(graph):
+                return {t for t in graph if not any(str(n).startswith(SKOLEM_BASE_IRI) for n in t)}
+
+            self.assertEqual(without_skolem_iris(parallel_store.graph), without_skolem_iris(serial_store.graph))
+
+            # small line-based files are parsed by the process pool, too:
+            (data_dir / "file4.nt").write_text('<http://example.org/a> <http://example.org/index> "4" .\n')
+            with patch.object(InMemoryRDFStore, "_stream_file", side_effect=AssertionError("must not stream")):
+                parallel_store.update()
+            self.assertEqual(len(parallel_store.graph), len(serial_store.graph) + 1)
+
+    def test_incremental_update(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            data_dir = pathlib.Path(tmp_dir)
+            shared = "@prefix ex: <http://example.org/> .\nex:a ex:b ex:shared .\n"
+            (data_dir / "a.ttl").write_text(shared + "ex:a ex:b ex:onlyA .\n")
+            (data_dir / "b.ttl").write_text(shared + "ex:a ex:b ex:onlyB .\n")
+            store = InMemoryRDFStore(data_dir)
+            self.assertEqual(len(store.graph), 3)
+            self.assertFalse(store.update())
+
+            (data_dir / "a.ttl").write_text(shared + "ex:a ex:b ex:newA .\n")
+            (data_dir / "c.ttl").write_text(shared)
+            result = store.update()
+            self.assertEqual(result.added, [data_dir.resolve() / "c.ttl"])
+            self.assertEqual(result.modified, [data_dir.resolve() / "a.ttl"])
+            self.assertEqual(result.removed, [])
+            objects = {str(o) for o in store.graph.objects()}
+            self.assertEqual(objects, {"http://example.org/shared",
+                                       "http://example.org/newA",
+                                       "http://example.org/onlyB"})
+
+            (data_dir / "b.ttl").unlink()
+            (data_dir / "c.ttl").unlink()
+            result = store.update()
+            self.assertEqual(len(result.removed), 2)
+            self.assertEqual(store.filenames, [data_dir.resolve() / "a.ttl"])
+            objects = {str(o) for o in store.graph.objects()}
+            self.assertEqual(objects, {"http://example.org/shared", "http://example.org/newA"})
+
+    def test_named_graphs(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            data_dir = pathlib.Path(tmp_dir)
+            shared = "@prefix ex: <http://example.org/> .\nex:a ex:b ex:shared .\n"
+            (data_dir / "a.ttl").write_text(shared + "ex:a ex:b ex:onlyA .\n")
+            (data_dir / "b.ttl").write_text(shared + "ex:a ex:b ex:onlyB .\n")
+            store = InMemoryRDFStore(data_dir, named_graphs=True)
+            self.assertEqual(len(store.graph), 3)
+            self.assertEqual(len(store.file_graph(data_dir / "a.ttl")), 2)
+
+            res = SparqlQuery("SELECT ?o WHERE { ?s ?p ?o }").execute(store)
+            self.assertEqual(len(res), 3)
+            res = SparqlQuery(
+                "SELECT ?g WHERE { GRAPH ?g { ?s ?p <http://example.org/onlyB> } }"
+            ).execute(store)
+            self.assertEqual(list(res.data["g"]), [(data_dir.resolve() / "b.ttl").as_uri()])
+
+            (data_dir / "a.ttl").write_text(shared + "ex:a ex:b ex:newA .\n")
+            (data_dir / "b.ttl").unlink()
+            store.update()
+            objects = {str(o) for o in store.graph.objects()}
+            self.assertEqual(objects, {"http://example.org/shared", "http://example.org/newA"})
+
+    def test_streamed_line_based_files(self):
+        nt = ('<http://example.org/a> <http://example.org/b> "1" .\n'
+              '<http://example.org/a> <http://example.org/creator> _:x .\n'
+              '_:x <http://example.org/name> "John" .\n')
+        nq = '<http://example.org/a> <http://example.org/b> "2" <http://example.org/g> .\n'
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            data_dir = pathlib.Path(tmp_dir)
+            (data_dir / "a.nt").write_text(nt)
+            (data_dir / "b.nq").write_text(nq)
+
+            batches = list(iter_triple_batches(data_dir / "a.nt", batch_size=2))
+            self.assertEqual([len(b) for b in batches], [2, 1])
+            # the blank node is the same across batches:
+            self.assertEqual(batches[0][1][2], batches[1][0][0])
+            self.assertTrue(str(batches[1][0][0]).startswith(SKOLEM_BASE_IRI))
+
+            for named_graphs in (False, True):
+                store = InMemoryRDFStore(data_dir, named_graphs=named_graphs, batch_size=2)
+                self.assertEqual(len(store.graph), 4)
+                self.assertEqual(len(store.file_graph(data_dir / "b.nq")), 1)
+
+                broken = pathlib.Path(tmp_dir) / "broken.nt"
+                broken.write_text(nt.replace("John", "Jane") + "this is not n-triples\n")
+                with self.assertRaises(ValueError):
+                    store.upload_file(broken)
+                self.assertNotIn(broken.resolve(), store.filenames)
+                self.assertEqual(len(store.graph), 4)
+                broken.unlink()
+
+            # triples are counted once per file, even if a file repeats them:
+            store = InMemoryRDFStore(data_dir)
+            (data_dir / "c.nt").write_text(nt.splitlines(keepends=True)[0] * 2)
+            store.update()
+            (data_dir / "c.nt").unlink()
+            store.update()
+            self.assertEqual(len(store.graph), 4)
+            (data_dir / "a.nt").unlink()
+            store.update()
+            self.assertEqual(len(store.graph), 1)
+
+    def test_compressed_files(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            data_dir = pathlib.Path(tmp_dir)
+            with gzip.open(data_dir / "a.ttl.gz", "wt") as f:
+                f.write(TTL_WITH_BNODE)
+            with bz2.open(data_dir / "b.nt.bz2", "wt") as f:
+                f.write('<http://example.org/a> <http://example.org/b> "bz2" .\n')
+            with lzma.open(data_dir / "c.jsonld.xz", "wt") as f:
+                f.write('{"@id": "http://example.org/a", "http://example.org/b": "xz"}')
+            (data_dir / "ignored.txt.gz").write_bytes(gzip.compress(b"not rdf"))
+
+            store = InMemoryRDFStore(data_dir)
+            self.assertEqual([f.name for f in store.filenames], ["a.ttl.gz", "b.nt.bz2", "c.jsonld.xz"])
+            self.assertEqual(len(store.graph), 5)
+            with self.assertRaises(ValueError):
+                store.upload_file(data_dir / "ignored.txt.gz")
+
+            store = InMemoryRDFStore(data_dir, formats="ttl")
+            self.assertEqual([f.name for f in store.filenames], ["a.ttl.gz"])
+
+
+@unittest.skipUnless(importlib.util.find_spec("pyarrow"), "pyarrow is not installed")
+class TestParquetDataStore(unittest.TestCase):
+
+    def test_parquet_data_store(self):
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tmp_dir = pathlib.Path(tmp_dir)
+            csv_file = tmp_dir / "temperature.csv"
+            csv_file.write_text("t,temperature,sensor\n" + "".join(f"{i},{20 + i % 10},s{i % 3}\n" for i in range(100)))
+            store = ParquetDataStore(tmp_dir / "tables", row_group_size=10)
+            self.assertTrue(store.upload_file(csv_file))
+            self.assertEqual(store.tables, ["temperature"])
+            self.assertTrue((store.data_dir / "temperature.parquet").exists())
+            self.assertEqual(len(store.get_all("temperature")), 100)
+
+            table = store.read("temperature", columns=["t"], filters=[("t", ">=", 95)])
+            self.assertEqual(table.column_names, ["t"])
+            self.assertEqual(table.column("t").to_pylist(), [95, 96, 97, 98, 99])
+
+            query = ParquetQuery("temperature", columns=["t", "sensor"],
+                                 filters=(pc.field("temperature") == 29) & (pc.field("sensor") == "s0"))
+            result = query.execute(store)
+            self.assertEqual(result.data["t"].tolist(), [9, 39, 69, 99])
+            self.assertEqual(query, ParquetQuery("temperature", columns=["t", "sensor"], filters=query.filters))
+            self.assertNotEqual(query, ParquetQuery("temperature"))
+
+            # Arrow IPC files are memory-mapped
+            with pa.OSFile(str(tmp_dir / "sensors.arrow"), "wb") as sink:
+                data = pa.table({"sensor": ["s0", "s1", "s2"], "room": [1, 2, 2]})
+                with pa.ipc.new_file(sink, data.schema) as writer:
+                    writer.write_table(data)
+            store.upload_file(tmp_dir / "sensors.arrow")
+            self.assertEqual(ParquetQuery("sensors", columns=["sensor"], filters=[("room", "=", 2)]
+                                          ).execute(store).data["sensor"].tolist(), ["s1", "s2"])
+
+            self.assertEqual(ParquetDataStore(tmp_dir / "tables").tables, ["sensors", "temperature"])
+            with self.assertRaises(KeyError):
+                store.read("unknown")
+            with self.assertRaises(ValueError):
+                store.upload_file(__file__)